@@ -0,0 +1,5 @@
+"""Pytest setup: the modules in src/ import each other by name, as when run via run.py."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
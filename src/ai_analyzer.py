@@ -1,20 +1,120 @@
 """AI analysis module using Ollama for forex news analysis."""
 import json
 import asyncio
+import hashlib
 import os
-import shutil
+import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 import httpx
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
-from dataclasses import dataclass
-from market_data import MarketDataFetcher, extract_instrument_from_news
+from dataclasses import asdict, dataclass, field, fields
+from market_data import MarketDataFetcher, extract_instrument_from_news, rank_instruments
+from dag_executor import DagExecutor, DagNode, topological_levels
+from news_digest import DIGEST_PROMPT, build_news_digest, parse_digest_response
+from consensus import (JUNIOR_REPORT_SCHEMA, STRUCTURED_OUTPUT_INSTRUCTIONS, VERDICT_INSTRUCTIONS,
+                       build_consensus_input, extract_direction, measure_agreement, parse_structured_report,
+                       score_confidence)
+from run_archive import RunArchive
+from run_history import RunHistory
+from model_warmup import ModelWarmer
+from deadline import CallEstimate, DeadlineCall, LatencyStats, RunDeadline, ShedError
+from telemetry import RunTelemetry, call_metrics, write_textfile
+from profiling import profiled
+from price_history import PriceHistory, format_indicators
+from report_compaction import SUMMARY_PROMPT, compact_report, estimate_tokens, strip_reasoning, truncate_report
 
 console = Console()
 
 
+def _validated(cls, data: dict, owner: str, kind: str, checks: Dict[str, Tuple[Callable[[Any], bool], str]]):
+    """
+    Create a settings dataclass from its configuration, rejecting unknown keys and out-of-range values.
+
+    Args:
+        cls: Dataclass to create
+        data: Settings as configured in analyst_team.json
+        owner: Analyst, management layer or stage the settings belong to, for error messages
+        kind: Kind of settings, for error messages (e.g. "generation")
+        checks: Validity test and description of the expected value per field; unset (None) fields pass
+    """
+    known = [f.name for f in fields(cls)]
+    unknown = [key for key in data if key not in known]
+    if unknown:
+        raise ValueError(f"{owner} has unknown {kind} settings: {', '.join(unknown)} "
+                         f"(expected {', '.join(known)})")
+    
+    settings = cls(**data)
+    for name, (valid, expected) in checks.items():
+        value = getattr(settings, name)
+        if value is not None and (isinstance(value, bool) or not valid(value)):
+            raise ValueError(f"{owner} {kind} setting {name}={value!r} must be {expected}")
+    return settings
+
+
+@dataclass
+class GenerationOptions:
+    """Ollama generation limits of an analyst, a management layer or (as defaults) a stage."""
+    num_predict: Optional[int] = None  # Maximum output tokens
+    num_ctx: Optional[int] = None  # Context window in tokens
+    stop: Optional[List[str]] = None  # Generation ends at any of these strings
+    top_k: Optional[int] = None
+    top_p: Optional[float] = None
+    timeout: Optional[float] = None  # Seconds a call may take before it is abandoned
+    
+    @classmethod
+    def from_dict(cls, data: dict, owner: str) -> 'GenerationOptions':
+        """Create GenerationOptions from dictionary, rejecting unknown keys and out-of-range values."""
+        if isinstance(data.get('stop'), str):
+            data = {**data, 'stop': [data['stop']]}
+        return _validated(cls, data, owner, "generation", {
+            "num_predict": (lambda v: isinstance(v, int) and (v >= 1 or v in (-1, -2)),
+                            "a positive integer (-1 = unlimited, -2 = fill the context)"),
+            "num_ctx": (lambda v: isinstance(v, int) and v >= 256, "an integer of at least 256"),
+            "stop": (lambda v: isinstance(v, list) and all(isinstance(s, str) and s for s in v),
+                     "a list of non-empty strings"),
+            "top_k": (lambda v: isinstance(v, int) and v >= 1, "a positive integer"),
+            "top_p": (lambda v: isinstance(v, (int, float)) and 0 < v <= 1, "between 0 and 1"),
+            "timeout": (lambda v: isinstance(v, (int, float)) and v > 0, "a positive number of seconds"),
+        })
+    
+    def merged(self, overrides: Optional['GenerationOptions']) -> 'GenerationOptions':
+        """These options with every setting that overrides sets replaced."""
+        if overrides is None:
+            return self
+        return GenerationOptions(**{
+            f.name: getattr(overrides, f.name) if getattr(overrides, f.name) is not None else getattr(self, f.name)
+            for f in fields(self)
+        })
+    
+    def to_ollama(self) -> Dict[str, Any]:
+        """The settings as Ollama request options (the timeout is applied by the client)."""
+        return {
+            f.name: getattr(self, f.name) for f in fields(self)
+            if f.name != "timeout" and getattr(self, f.name) is not None
+        }
+
+
+@dataclass
+class CascadeConfig:
+    """A small, fast model that answers first; the member's own model runs only when it is unsure."""
+    model: str
+    temperature: Optional[float] = None  # defaults to the member's temperature
+    min_confidence: float = 0.6  # escalate below this stated confidence
+    
+    @classmethod
+    def from_dict(cls, data: dict, owner: str) -> 'CascadeConfig':
+        """Create CascadeConfig from dictionary, rejecting unknown keys and out-of-range values."""
+        if not isinstance(data.get('model'), str) or not data['model']:
+            raise ValueError(f"{owner} cascade requires a 'model'")
+        return _validated(cls, data, owner, "cascade", {
+            "temperature": (lambda v: isinstance(v, (int, float)) and v >= 0, "a non-negative number"),
+            "min_confidence": (lambda v: isinstance(v, (int, float)) and 0 <= v <= 1, "between 0 and 1"),
+        })
+
+
 @dataclass
 class AnalystProfile:
     """Defines an AI analyst's personality and behavior."""
@@ -25,6 +125,11 @@ class AnalystProfile:
     temperature: float
     focus_area: str
     system_prompt: str
+    stage: str = "junior_analysts"
+    depends_on: List[str] = field(default_factory=list)
+    priority: int = 0  # Higher is kept longer when a run has to be cut to meet its deadline
+    generation: Optional[GenerationOptions] = None
+    cascade: Optional[CascadeConfig] = None  # small model that answers first
     
     @classmethod
     def from_dict(cls, data: dict) -> 'AnalystProfile':
@@ -36,7 +141,12 @@ class AnalystProfile:
             model=data['model'],
             temperature=data['temperature'],
             focus_area=data['focus_area'],
-            system_prompt=data['system_prompt']
+            system_prompt=data['system_prompt'],
+            stage=data.get('stage', 'junior_analysts'),
+            depends_on=data.get('depends_on', []),
+            priority=data.get('priority', 0),
+            generation=GenerationOptions.from_dict(data['generation'], f"'{data['name']}'") if 'generation' in data else None,
+            cascade=CascadeConfig.from_dict(data['cascade'], f"'{data['name']}'") if 'cascade' in data else None
         )
 
 
@@ -48,6 +158,11 @@ class ManagementLayer:
     model: str
     temperature: float
     system_prompt: str
+    stage: str = ""
+    depends_on: List[str] = field(default_factory=list)
+    priority: int = 0  # Higher is kept longer when a run has to be cut to meet its deadline
+    generation: Optional[GenerationOptions] = None
+    cascade: Optional[CascadeConfig] = None  # small model that answers first
     
     @classmethod
     def from_dict(cls, data: dict) -> 'ManagementLayer':
@@ -57,10 +172,146 @@ class ManagementLayer:
             role=data['role'],
             model=data['model'],
             temperature=data['temperature'],
-            system_prompt=data['system_prompt']
+            system_prompt=data['system_prompt'],
+            stage=data.get('stage') or cls._infer_stage(data['name']),
+            depends_on=data.get('depends_on', []),
+            priority=data.get('priority', 0),
+            generation=GenerationOptions.from_dict(data['generation'], f"'{data['name']}'") if 'generation' in data else None,
+            cascade=CascadeConfig.from_dict(data['cascade'], f"'{data['name']}'") if 'cascade' in data else None
+        )
+    
+    @staticmethod
+    def _infer_stage(name: str) -> str:
+        """Infer the stage of a layer from its name (for configs without explicit stages)."""
+        if 'executive' in name.lower() or 'committee' in name.lower():
+            return "executive_committees"
+        return "senior_managers"
+
+
+@dataclass
+class CompactionConfig:
+    """Defines how a stage's reports are compacted before the next tier reads them."""
+    strip_reasoning: bool = True
+    remove_boilerplate: bool = True
+    max_chars: Optional[int] = None
+    summary_model: Optional[str] = None
+    summary_temperature: float = 0.2
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CompactionConfig':
+        """Create CompactionConfig from dictionary."""
+        return cls(
+            strip_reasoning=data.get('strip_reasoning', True),
+            remove_boilerplate=data.get('remove_boilerplate', True),
+            max_chars=data.get('max_chars'),
+            summary_model=data.get('summary_model'),
+            summary_temperature=data.get('summary_temperature', 0.2)
         )
 
 
+@dataclass
+class AdaptiveFanout:
+    """Defines when a stage runs only its highest-priority members because an earlier stage agrees."""
+    source: Optional[str] = None  # stage whose reports are measured (defaults to the first root ancestor)
+    min_agreement: float = 0.8
+    min_confidence: float = 0.6
+    min_reports: int = 3
+    members: int = 1
+    
+    @classmethod
+    def from_dict(cls, data: dict, owner: str) -> 'AdaptiveFanout':
+        """Create AdaptiveFanout from dictionary, rejecting unknown keys and out-of-range values."""
+        return _validated(cls, data, owner, "adaptive", {
+            "source": (lambda v: isinstance(v, str), "a stage name"),
+            "min_agreement": (lambda v: isinstance(v, (int, float)) and 0 <= v <= 1, "between 0 and 1"),
+            "min_confidence": (lambda v: isinstance(v, (int, float)) and 0 <= v <= 1, "between 0 and 1"),
+            "min_reports": (lambda v: isinstance(v, int) and v >= 1, "a positive integer"),
+            "members": (lambda v: isinstance(v, int) and v >= 1, "a positive integer"),
+        })
+
+
+@dataclass
+class PipelineStage:
+    """Defines a group of analysts that run together in the analysis DAG."""
+    name: str
+    title: str
+    depends_on: List[str] = field(default_factory=list)
+    input: str = "reports"
+    concurrency: Optional[int] = None
+    reports_dir: Optional[str] = None
+    structured_output: bool = False
+    compaction: Optional[CompactionConfig] = None
+    generation: GenerationOptions = field(default_factory=GenerationOptions)  # defaults for the stage's members
+    adaptive: Optional[AdaptiveFanout] = None
+    
+    INPUT_MODES = ("news", "reports", "review", "consensus")
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PipelineStage':
+        """Create PipelineStage from dictionary."""
+        stage = cls(
+            name=data['name'],
+            title=data.get('title', data['name'].replace('_', ' ').title()),
+            depends_on=data.get('depends_on', []),
+            input=data.get('input', 'reports' if data.get('depends_on') else 'news'),
+            concurrency=data.get('concurrency'),
+            reports_dir=data.get('reports_dir'),
+            structured_output=data.get('structured_output', False),
+            compaction=CompactionConfig.from_dict(data['compaction']) if 'compaction' in data else None,
+            generation=GenerationOptions.from_dict(data.get('generation', {}), f"Stage '{data['name']}'"),
+            adaptive=AdaptiveFanout.from_dict(data['adaptive'], f"Stage '{data['name']}'") if 'adaptive' in data else None
+        )
+        if stage.input not in cls.INPUT_MODES:
+            raise ValueError(f"Stage '{stage.name}' has unknown input mode '{stage.input}' "
+                             f"(expected one of {', '.join(cls.INPUT_MODES)})")
+        return stage
+
+
+@dataclass
+class DigestConfig:
+    """Defines the optional Stage 0 that condenses the raw news into a structured event digest."""
+    enabled: bool = False
+    mode: str = "parser"
+    model: Optional[str] = None
+    temperature: float = 0.1
+    max_events: int = 80
+    summary_chars: int = 160
+    max_age_hours: Optional[float] = 36
+    system_prompt: str = DIGEST_PROMPT
+    
+    MODES = ("parser", "model")
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DigestConfig':
+        """Create DigestConfig from dictionary."""
+        digest = cls(
+            enabled=data.get('enabled', False),
+            mode=data.get('mode', 'parser'),
+            model=data.get('model'),
+            temperature=data.get('temperature', 0.1),
+            max_events=data.get('max_events', 80),
+            summary_chars=data.get('summary_chars', 160),
+            max_age_hours=data.get('max_age_hours', 36),
+            system_prompt=data.get('system_prompt', DIGEST_PROMPT)
+        )
+        if digest.mode not in cls.MODES:
+            raise ValueError(f"Unknown digest mode '{digest.mode}' (expected one of {', '.join(cls.MODES)})")
+        if digest.mode == "model" and not digest.model:
+            raise ValueError("Digest mode 'model' requires a 'model' to be configured")
+        return digest
+
+
+# Three-tier topology used when analyst_team.json has no "pipeline" section
+DEFAULT_STAGES = [
+    {"name": "junior_analysts", "title": "Junior Analysts", "input": "news",
+     "reports_dir": "tier1_junior_analysts"},
+    {"name": "senior_managers", "title": "Senior Managers", "depends_on": ["junior_analysts"],
+     "input": "reports", "reports_dir": "tier2_senior_managers"},
+    {"name": "executive_committees", "title": "Executive Committees", "depends_on": ["senior_managers"],
+     "input": "review", "reports_dir": "tier3_executive_committees"},
+]
+
+
 class TeamConfiguration:
     """Loads and manages analyst team configuration from JSON."""
     
@@ -73,6 +324,9 @@ class TeamConfiguration:
         self.config_path = Path(config_path)
         self.junior_analysts: List[AnalystProfile] = []
         self.management_layers: List[ManagementLayer] = []
+        self.stages: List[PipelineStage] = []
+        self.stage_levels: Dict[str, int] = {}
+        self.digest = DigestConfig()
         self._load_config()
     
     def _load_config(self):
@@ -89,6 +343,12 @@ class TeamConfiguration:
             for mgmt_data in config.get('management_layers', []):
                 self.management_layers.append(ManagementLayer.from_dict(mgmt_data))
             
+            # Load pipeline stages (defaults to the classic three-tier layout)
+            stages_data = config.get('pipeline', {}).get('stages', DEFAULT_STAGES)
+            self.stages = [PipelineStage.from_dict(stage_data) for stage_data in stages_data]
+            self.digest = DigestConfig.from_dict(config.get('pipeline', {}).get('digest', {}))
+            self._validate_topology()
+            
             console.print(f"[green]✓[/green] Loaded {len(self.junior_analysts)} analysts and {len(self.management_layers)} management layers from config")
             
         except FileNotFoundError:
@@ -101,29 +361,114 @@ class TeamConfiguration:
             console.print(f"[red]Error loading configuration: {e}[/red]")
             raise
     
-    def get_senior_manager(self) -> Optional[ManagementLayer]:
-        """Get the senior manager layer."""
-        for layer in self.management_layers:
-            if 'senior' in layer.name.lower() or 'manager' in layer.name.lower():
-                return layer
-        return self.management_layers[0] if self.management_layers else None
+    def _validate_topology(self):
+        """Check stage references, unique names and that the stage graph is acyclic."""
+        stage_names = [stage.name for stage in self.stages]
+        if len(set(stage_names)) != len(stage_names):
+            raise ValueError("Pipeline stage names must be unique")
+        
+        member_names = [member.name for member in self.members]
+        if len(set(member_names)) != len(member_names):
+            raise ValueError("Analyst and management layer names must be unique")
+        
+        for member in self.members:
+            if member.stage not in stage_names:
+                raise ValueError(f"'{member.name}' references unknown stage '{member.stage}'")
+            for dep in member.depends_on:
+                if dep not in stage_names and dep not in member_names:
+                    raise ValueError(f"'{member.name}' depends on unknown stage or analyst '{dep}'")
+        
+        self.stage_levels = topological_levels({stage.name: stage.depends_on for stage in self.stages})
+        for stage in self.stages:
+            if stage.adaptive is None:
+                continue
+            ancestors = self.get_stage_ancestors(stage.name)
+            if stage.adaptive.source is None:
+                stage.adaptive.source = next((name for name in ancestors if not self.get_stage(name).depends_on), None)
+            if stage.adaptive.source not in ancestors:
+                raise ValueError(f"Stage '{stage.name}' measures agreement of '{stage.adaptive.source}', "
+                                 f"which is not one of the stages it depends on")
+        for stage in self.stages:
+            if stage.reports_dir is None:
+                stage.reports_dir = f"tier{self.stage_levels[stage.name] + 1}_{stage.name}"
+            if not self.get_stage_members(stage.name):
+                console.print(f"[yellow]Warning: Stage '{stage.name}' has no members configured[/yellow]")
+        
+        # Ollama reloads a model whenever the context size changes between requests
+        contexts: Dict[str, set] = {}
+        for member in self.members:
+            for model in self.member_models(member):
+                contexts.setdefault(model, set()).add(self.generation_options(member).num_ctx)
+        for model, sizes in contexts.items():
+            if len(sizes) > 1:
+                console.print(f"[yellow]Warning: {model} is configured with different num_ctx values "
+                              f"({', '.join(str(size or 'default') for size in sizes)}); Ollama reloads it "
+                              f"every time the context size changes[/yellow]")
+    
+    @property
+    def members(self) -> List[Union[AnalystProfile, ManagementLayer]]:
+        """All analysts and management layers in configuration order."""
+        return [*self.junior_analysts, *self.management_layers]
+    
+    def generation_options(self, member: Union[AnalystProfile, ManagementLayer]) -> GenerationOptions:
+        """A member's generation settings on top of its stage's defaults."""
+        return self.get_stage(member.stage).generation.merged(member.generation)
     
-    def get_executive_committee(self) -> Optional[ManagementLayer]:
-        """Get the executive committee layer."""
-        for layer in self.management_layers:
-            if 'executive' in layer.name.lower() or 'committee' in layer.name.lower():
-                return layer
-        return self.management_layers[-1] if len(self.management_layers) > 1 else None
+    def model_load_options(self) -> Dict[str, Dict[str, Any]]:
+        """Context size to load each model with, for models configured with one."""
+        return {
+            model: {"num_ctx": self.generation_options(member).num_ctx}
+            for member in self.members if self.generation_options(member).num_ctx
+            for model in self.member_models(member)
+        }
+    
+    @staticmethod
+    def member_models(member: Union[AnalystProfile, ManagementLayer]) -> List[str]:
+        """The models a member may call: its cascade's small model first, then its own."""
+        return [member.cascade.model, member.model] if member.cascade else [member.model]
+    
+    def get_stage(self, name: str) -> PipelineStage:
+        """Get a pipeline stage by name."""
+        return next(stage for stage in self.stages if stage.name == name)
+    
+    def get_stage_members(self, stage_name: str) -> List[Union[AnalystProfile, ManagementLayer]]:
+        """Get all analysts and management layers assigned to a stage."""
+        return [member for member in self.members if member.stage == stage_name]
+    
+    def get_terminal_stages(self) -> List[PipelineStage]:
+        """Get the stages whose outputs are not consumed by any other stage (the final decisions)."""
+        consumed = {dep for stage in self.stages for dep in stage.depends_on}
+        return [stage for stage in self.stages if stage.name not in consumed]
+    
+    def get_stage_ancestors(self, stage_name: str) -> List[str]:
+        """Get every stage that a stage transitively depends on, in configuration order."""
+        ancestors = set()
+        pending = list(self.get_stage(stage_name).depends_on)
+        while pending:
+            name = pending.pop()
+            if name not in ancestors:
+                ancestors.add(name)
+                pending.extend(self.get_stage(name).depends_on)
+        return [stage.name for stage in self.stages if stage.name in ancestors]
 
 
 class OllamaAnalyzer:
     """Handles AI analysis using Ollama models."""
     
-    def __init__(self, base_url: str, model: str, temperature: float = 0.8, analyst_profile: Optional[AnalystProfile] = None):
+    def __init__(self, base_url: str, model: str, temperature: float = 0.8, analyst_profile: Optional[AnalystProfile] = None,
+                 output_format: Optional[Union[str, Dict[str, Any]]] = None, keep_alive: Union[int, str] = 0,
+                 num_predict: Optional[int] = None, timeout: float = 300.0,
+                 options: Optional[Dict[str, Any]] = None):
         self.base_url = base_url.rstrip('/')
         self.model = model
         self.temperature = temperature
         self.analyst_profile = analyst_profile
+        self.output_format = output_format  # "json" or a JSON schema for Ollama's structured outputs
+        self.keep_alive = keep_alive  # 0 unloads the model after the request
+        self.num_predict = num_predict  # Output token limit (None = the model's default)
+        self.timeout = timeout
+        self.options = options or {}  # Further Ollama options, e.g. num_ctx, stop, top_k, top_p
+        self.metrics: Dict[str, Any] = {}  # Ollama's timing fields of the last call
     
     async def analyze_async(self, prompt: str, data: Dict[str, Any]) -> str:
         """Send data to Ollama for analysis asynchronously."""
@@ -134,23 +479,30 @@ class OllamaAnalyzer:
             # Construct the full prompt
             full_prompt = prompt.replace("{{ JSON.stringify($json.data, null, 2) }}", data_json)
             
+            request = {
+                "model": self.model,
+                "prompt": full_prompt,
+                "stream": False,
+                "keep_alive": self.keep_alive,  # Requests never share context; this only controls unloading
+                "options": {
+                    **self.options,
+                    "temperature": self.temperature
+                }
+            }
+            if self.output_format is not None:
+                request["format"] = self.output_format
+            if self.num_predict is not None:
+                # The tighter of this call's limit and the configured one
+                configured = request["options"].get("num_predict", -1)
+                request["options"]["num_predict"] = min(self.num_predict, configured) if configured > 0 else self.num_predict
+            
             # Make async request to Ollama with temperature
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": full_prompt,
-                        "stream": False,
-                        "keep_alive": 0,  # Unload model after each request to avoid context mixing
-                        "options": {
-                            "temperature": self.temperature
-                        }
-                    }
-                )
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(f"{self.base_url}/api/generate", json=request)
                 response.raise_for_status()
                 
                 result = response.json()
+                self.metrics = call_metrics(result)
                 return result.get("response", "")
                 
         except httpx.HTTPError as e:
@@ -165,462 +517,1016 @@ class OllamaAnalyzer:
         return asyncio.run(self.analyze_async(prompt, data))
 
 
+DIGEST_NODE = "News Digest"
+
+
+def _input_hash(*inputs: Any) -> str:
+    """Stable hash of everything a call depends on, to tell whether a checkpointed output still applies."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PipelineRun:
+    """State shared by the DAG nodes analyzing one instrument in an analysis run."""
+    aggregated_data: Dict[str, Any]
+    instrument: str
+    market_data_task: asyncio.Task  # resolves to (raw market data, monotonic fetch time)
+    stage_reports: Dict[str, List[Dict[str, Any]]]
+    market_data: Optional[str] = None  # formatted snapshot, set when first needed
+    market_data_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    price_indicators: Optional[str] = None  # formatted indicators, computed once per run when first needed
+    consensus: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    cascades: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # cascade outcome per member
+    fanout: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # adaptive fan-out decision per stage
+    raw_outputs: Dict[str, str] = field(default_factory=dict)
+    run_id: str = ""
+    compaction_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    deadline: Optional[RunDeadline] = None  # shared by the runs of one analysis
+    telemetry: RunTelemetry = field(default_factory=RunTelemetry)  # shared by the runs of one analysis
+    checkpoint: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # completed calls of the run being resumed
+
+
 class ForexAnalysisPipeline:
-    """Orchestrates multi-tier AI analysis with junior analysts, senior synthesis, and executive review."""
+    """Orchestrates multi-tier AI analysis as a DAG of analyst stages defined in analyst_team.json."""
     
-    def __init__(self, ollama_base_url: str, run_concurrent: bool, config_path: Optional[str] = None, market_data_api_key: Optional[str] = None):
+    def __init__(self, ollama_base_url: str, run_concurrent: bool, config_path: Optional[str] = None, market_data_api_key: Optional[str] = None,
+                 archive_path: Optional[str] = None, retention_runs: Optional[int] = 200,
+                 retention_days: Optional[float] = 30, history_db_path: Optional[str] = None, keep_alive: Union[int, str] = 0, warmup: bool = True,
+                 market_data_max_age: float = 120, instruments: Optional[List[str]] = None, instrument_count: int = 1,
+                 price_history_path: Optional[str] = None, price_history_capacity: int = 4096,
+                 market_data_cache_path: Optional[str] = None, market_data_max_stale: float = 3600,
+                 metrics_textfile: Optional[str] = None):
         self.ollama_base_url = ollama_base_url
         self.run_concurrent = run_concurrent
         
-        # Setup reports directory
+        # Models are preloaded ahead of their stage; pointless if Ollama unloads them right away
+        self.keep_alive = keep_alive
+        self.warmup_enabled = warmup and str(keep_alive) not in ("0", "0s")
+        self._warmer: Optional[ModelWarmer] = None
+        
+        # Reports are archived per run by a background writer; history is never cleared at startup
         self.reports_dir = Path(__file__).parent.parent / "reports"
-        self._setup_reports_directory()
+        # Finished runs are also indexed into a searchable SQLite history (relative paths are project-relative)
+        history = None
+        if history_db_path:
+            db_path = Path(history_db_path)
+            history = RunHistory(db_path if db_path.is_absolute() else self.reports_dir.parent / db_path)
+        archive_root = Path(archive_path) if archive_path else self.reports_dir / "runs"
+        if not archive_root.is_absolute():
+            archive_root = self.reports_dir.parent / archive_root
+        self.archive = RunArchive(archive_root, retention_runs, retention_days, history)
         
         # Load team configuration from JSON
         self.team_config = TeamConfiguration(config_path)
         self.junior_analysts = self.team_config.junior_analysts
-        self.senior_managers = [layer for layer in self.team_config.management_layers 
-                               if 'senior' in layer.name.lower() or 'manager' in layer.name.lower() and 'executive' not in layer.name.lower()]
-        self.executive_committees = [layer for layer in self.team_config.management_layers 
-                                     if 'executive' in layer.name.lower() or 'committee' in layer.name.lower()]
-        
-        # Initialize market data fetcher
-        self.market_data_fetcher = MarketDataFetcher(api_key=market_data_api_key)
-        
-        if not self.senior_managers:
-            console.print("[yellow]Warning: No senior managers found in config, using first management layer[/yellow]")
-            self.senior_managers = [self.team_config.management_layers[0]] if self.team_config.management_layers else []
-        if not self.executive_committees:
-            console.print("[yellow]Warning: No executive committees found in config, using last management layer[/yellow]")
-            self.executive_committees = [self.team_config.management_layers[-1]] if len(self.team_config.management_layers) > 1 else []
-    
-    def _setup_reports_directory(self):
-        """Clear and setup the reports directory for a fresh run."""
-        if self.reports_dir.exists():
-            # Clear existing reports
-            shutil.rmtree(self.reports_dir)
-        
-        # Create fresh directory structure
-        self.reports_dir.mkdir(exist_ok=True)
-        (self.reports_dir / "tier1_junior_analysts").mkdir(exist_ok=True)
-        (self.reports_dir / "tier2_senior_managers").mkdir(exist_ok=True)
-        (self.reports_dir / "tier3_executive_committees").mkdir(exist_ok=True)
-        
-        console.print(f"[green]✓[/green] Reports directory cleared and ready: {self.reports_dir}")
-    
-    def _save_report(self, tier: str, name: str, role: str, content: str, order: int = None):
-        """Save an individual report to the reports directory."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Sanitize filename
-        safe_name = "".join(c if c.isalnum() or c in (' ', '_', '-') else '_' for c in name)
-        safe_name = safe_name.replace(' ', '_')
-        
-        # Build filename with order if provided
-        if order is not None:
-            filename = f"{order:02d}_{safe_name}_{timestamp}.txt"
-        else:
-            filename = f"{safe_name}_{timestamp}.txt"
+        self.stages = self.team_config.stages
+        self.members_by_name = {member.name: member for member in self.team_config.members}
         
-        filepath = self.reports_dir / tier / filename
+        # Every fetched rate table is sampled into a per-pair price history for the technical indicators
+        self.price_history = None
+        if price_history_path:
+            history_path = Path(price_history_path)
+            self.price_history = PriceHistory(
+                history_path if history_path.is_absolute() else self.reports_dir.parent / history_path,
+                price_history_capacity
+            )
         
-        # Write report with header
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"{'='*80}\n")
-            f.write(f"{name}\n")
-            f.write(f"Role: {role}\n")
-            f.write(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"{'='*80}\n\n")
-            f.write(content)
+        # Market data is fetched in the background and refreshed before use if older than max_age seconds;
+        # the last good snapshot is kept on disk and served while a refresh runs
+        cache_path = Path(market_data_cache_path) if market_data_cache_path else None
+        if cache_path is not None and not cache_path.is_absolute():
+            cache_path = self.reports_dir.parent / cache_path
+        self.market_data_fetcher = MarketDataFetcher(
+            api_key=market_data_api_key,
+            price_history=self.price_history,
+            cache_path=cache_path,
+            max_stale=market_data_max_stale
+        )
+        self.market_data_max_age = market_data_max_age
+        self._market_data_prefetch: Dict[str, asyncio.Task] = {}
+        self._market_data_spans: List[Tuple[float, float]] = []  # monotonic start and end of each fetch
         
-        console.print(f"[dim]  → Saved report: {filepath.name}[/dim]")
-
+        # Every run's telemetry is archived as JSON; the last run's is also exported for Prometheus
+        self.metrics_textfile = None
+        if metrics_textfile:
+            textfile = Path(metrics_textfile)
+            self.metrics_textfile = textfile if textfile.is_absolute() else self.reports_dir.parent / textfile
+        
+        # Fixed instruments to analyze, or how many of the pairs ranked from the news
+        self.instruments = instruments or []
+        self.instrument_count = max(1, instrument_count)
+        self._last_instruments = self.instruments or ["EUR/USD"]
+        
+        # Call durations of past runs, used to fit runs into a deadline; seeded from the history on first use
+        self.latency = LatencyStats()
+        self._latency_loaded = False
     
-    def analyze_news(self, aggregated_data: Dict[str, Any]) -> str:
-        """Run multi-tier analysis: Junior Analysts → Senior Managers → Executive Committees."""
+    def flush_reports(self):
+        """Wait until all queued reports have been written to the archive."""
+        self.archive.flush()
+    
+    def close(self):
+        """Flush and stop the report archive writer and close the price history."""
+        self.archive.close()
+        if self.price_history is not None:
+            self.price_history.close()
+    
+    def warm_up(self, stage_names: Optional[List[str]] = None):
+        """
+        Start preloading the models of the given stages in the background.
+        
+        Defaults to the first tier (and the digest model). Must be called from the
+        event loop that runs the analysis; does nothing when warm-up is disabled.
+        """
+        if not self.warmup_enabled:
+            return
+        if self._warmer is None:
+            self._warmer = ModelWarmer(self.ollama_base_url, self.keep_alive)
+        if stage_names is None:
+            stage_names = [stage.name for stage in self.stages if self.team_config.stage_levels[stage.name] == 0]
+        self._warmer.warm(self._stage_models(stage_names), self.team_config.model_load_options())
+    
+    def prefetch_market_data(self, instruments: Optional[List[str]] = None):
+        """
+        Start fetching market data in the background before the news is known.
+        
+        Defaults to the configured instruments, or those of the previous run. A
+        prefetch is used if the run analyzes the same instrument; otherwise a new
+        fetch is started. Must be called from the event loop that runs the analysis.
+        """
+        for instrument in instruments or self.instruments or self._last_instruments:
+            if instrument not in self._market_data_prefetch:
+                self._market_data_prefetch[instrument] = asyncio.create_task(self._fetch_market_data(instrument))
+    
+    async def stop_warm_up(self):
+        """Cancel outstanding model preloads."""
+        if self._warmer is not None:
+            await self._warmer.close()
+            self._warmer = None
+    
+    async def aclose(self):
+        """Cancel background work and close the HTTP clients bound to the running event loop."""
+        for task in self._market_data_prefetch.values():
+            task.cancel()
+        self._market_data_prefetch = {}
+        await self.stop_warm_up()
+        await self.market_data_fetcher.aclose()
+    
+    def analyze_news(self, aggregated_data: Dict[str, Any], instruments: Optional[List[str]] = None,
+                     deadline: Optional[datetime] = None, telemetry: Optional[RunTelemetry] = None,
+                     resume: Optional[Dict[str, Any]] = None) -> str:
+        """Run the multi-tier analysis pipeline on a single event loop."""
+        async def analyze_and_close():
+            try:
+                return await self.analyze_news_async(aggregated_data, instruments, deadline, telemetry, resume)
+            finally:
+                await self.aclose()
+        return asyncio.run(analyze_and_close())
+    
+    async def analyze_news_async(self, aggregated_data: Dict[str, Any], instruments: Optional[List[str]] = None,
+                                 deadline: Optional[datetime] = None,
+                                 telemetry: Optional[RunTelemetry] = None,
+                                 resume: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Run every configured stage as one DAG: Junior Analysts → Senior Managers → Executive Committees.
+        
+        Args:
+            aggregated_data: Output of RSSFeedAggregator.fetch_all()
+            instruments: Pairs to analyze; defaults to the configured instruments or the news ranking
+            deadline: Time by which the final decisions must be ready; low-priority analysts and
+                managers are shortened or dropped to meet it, one executive committee always runs
+            telemetry: Collector already holding the caller's spans (e.g. the feed fetch); a new
+                one is started otherwise
+            resume: Checkpoint of an interrupted run (RunArchive.latest_checkpoint()), whose
+                completed calls are reused when their inputs are unchanged; aggregated_data
+                should be the checkpoint's
+            
+        Returns:
+            The final executive decisions, grouped by instrument when there are several
+        """
         
         mode = "Concurrent" if self.run_concurrent else "Sequential"
+        start_time = time.perf_counter()
+        analysis_start = time.monotonic()
+        telemetry = telemetry or RunTelemetry()
         console.print(f"\n[bold cyan]Starting Enhanced Multi-Tier AI Analysis Pipeline ({mode} Mode)[/bold cyan]")
-        console.print(f"[dim]Tier 1: {len(self.junior_analysts)} Junior Analysts[/dim]")
-        console.print(f"[dim]Tier 2: {len(self.senior_managers)} Senior Managers[/dim]")
-        console.print(f"[dim]Tier 3: {len(self.executive_committees)} Executive Committees[/dim]\n")
+        if self.team_config.digest.enabled:
+            console.print(f"[dim]Stage 0: News Digest ({self.team_config.digest.mode})[/dim]")
+        for stage in self.stages:
+            tier = self.team_config.stage_levels[stage.name] + 1
+            console.print(f"[dim]Tier {tier}: {len(self.team_config.get_stage_members(stage.name))} {stage.title}[/dim]")
         
-        if self.run_concurrent:
-            return asyncio.run(self._analyze_news_async(aggregated_data))
-        else:
-            return self._analyze_news_sequential(aggregated_data)
-    
-    def _analyze_news_sequential(self, aggregated_data: Dict[str, Any]) -> str:
-        """Sequential multi-tier analysis pipeline with market data integration."""
-        
-        # Fetch market data first
-        console.print("[bold cyan]Fetching real-time market data...[/bold cyan]")
-        instrument = extract_instrument_from_news(aggregated_data)
-        market_data_raw = asyncio.run(self.market_data_fetcher.get_forex_data_async(instrument))
-        market_data_formatted = self.market_data_fetcher.format_market_data(market_data_raw)
-        console.print(market_data_formatted)
-        
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            console=console
-        ) as progress:
-            total_steps = len(self.junior_analysts) + len(self.senior_managers) + len(self.executive_committees)
-            task = progress.add_task("[cyan]Running analysis pipeline...", total=total_steps)
-            
-            # TIER 1: Junior Analysts Review
-            console.print("[bold yellow]═══ TIER 1: JUNIOR ANALYSTS ═══[/bold yellow]")
-            junior_reports = []
+        # One run per instrument; the news, digest, models and archive run are shared
+        instruments = list(dict.fromkeys(
+            instruments or (resume or {}).get("instruments") or self._select_instruments(aggregated_data)
+        ))
+        self._last_instruments = instruments
+        if len(instruments) > 1:
+            console.print(f"[dim]Instruments: {', '.join(instruments)}[/dim]")
+        console.print()
+        
+        # No-op for models the caller already started loading during the feed fetch
+        self.warm_up()
+        warmed_stages = {stage.name for stage in self.stages if self.team_config.stage_levels[stage.name] == 0}
+        remaining = {
+            stage.name: len(self.team_config.get_stage_members(stage.name)) * len(instruments) for stage in self.stages
+        }
+        
+        # Market data is only needed by prompts with {{MARKET_DATA}}, so it is fetched while Tier 1 runs
+        compaction_stats: Dict[str, Dict[str, int]] = {}
+        runs = [
+            PipelineRun(
+                aggregated_data=aggregated_data,
+                instrument=instrument,
+                market_data_task=self._take_market_data_task(instrument),
+                stage_reports={stage.name: [] for stage in self.stages},
+                compaction_stats=compaction_stats,
+                telemetry=telemetry,
+                checkpoint=resume["nodes"] if resume else {},
+                market_data=((resume or {}).get("contexts", {}).get(instrument) or {}).get("market_data"),
+                price_indicators=((resume or {}).get("contexts", {}).get(instrument) or {}).get("price_indicators")
+            )
+            for instrument in instruments
+        ]
+        for task in self._market_data_prefetch.values():
+            task.cancel()
+        self._market_data_prefetch = {}
+        
+        run_id = self.archive.begin_run({
+            "mode": mode,
+            "instrument": ", ".join(instruments),
+            "instruments": instruments,
+            "article_count": len(aggregated_data.get("data", [])),
+            **({"resumed_from": resume["run_id"]} if resume else {})
+        })
+        # An interrupted or pre-empted run is closed so its file stays readable; its checkpoint is kept for --resume
+        try:
+            telemetry.run_id = run_id
+            # Everything needed to resume the run is checkpointed; a resumed run carries over the previous checkpoint
+            self.archive.write_checkpoint(run_id, "run", aggregated_data=aggregated_data, instruments=instruments)
+            if resume:
+                for instrument, context in resume["contexts"].items():
+                    self.archive.write_checkpoint(run_id, "context", instrument=instrument, **context)
+                for name, node in resume["nodes"].items():
+                    self.archive.write_checkpoint(run_id, "node", name=name, **node)
+                console.print(f"[cyan]Resuming run {resume['run_id']}: {len(resume['nodes'])} completed calls "
+                              f"are reused if their inputs are unchanged[/cyan]")
+            for run in runs:
+                run.run_id = run_id
+            self.archive.write_record(run_id, "inputs", articles=[
+                {key: article.get(key) for key in ("title", "link", "pubDate", "contentSnippet")}
+                for article in aggregated_data.get("data", [])
+            ])
+            terminal_stages = {stage.name for stage in self.team_config.get_terminal_stages()}
+            nodes, targets = self._build_nodes(runs)
+            if deadline is not None:
+                run_deadline = self._plan_deadline(deadline, targets)
+                for run in runs:
+                    run.deadline = run_deadline
+        
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                console=console
+            ) as progress:
+                task = progress.add_task("[cyan]Running analysis pipeline...", total=len(nodes))
+                failed_calls: List[str] = []
             
-            for idx, analyst in enumerate(self.junior_analysts, 1):
-                progress.update(task, description=f"[cyan]{analyst.name} analyzing...")
-                
-                # Use analyst's configured system prompt
-                prompt = analyst.system_prompt
-                analyzer = OllamaAnalyzer(
-                    self.ollama_base_url, 
-                    analyst.model, 
-                    analyst.temperature,
-                    analyst
-                )
+                def on_complete(node: DagNode, result: Any):
+                    if node.name == DIGEST_NODE:
+                        self._on_digest_complete(result, runs[0])
+                        progress.advance(task)
+                        return
                 
-                result = asyncio.run(analyzer.analyze_async(prompt, aggregated_data))
-                
-                # Save individual report
-                self._save_report("tier1_junior_analysts", analyst.name, analyst.role, result, order=idx)
-                
-                junior_reports.append({
-                    "analyst": analyst.name,
-                    "role": analyst.role,
-                    "focus": analyst.focus_area,
-                    "output": result
-                })
-                progress.advance(task)
-                console.print(f"[green]✓[/green] {analyst.name} report complete")
-            
-            # TIER 2: Senior Manager Synthesis (Multiple Managers)
-            if not self.senior_managers:
-                console.print("[red]Error: No senior managers configured[/red]")
-                return "Configuration error: No senior managers found"
-            
-            console.print(f"\n[bold yellow]═══ TIER 2: SENIOR MANAGERS ({len(self.senior_managers)} Managers) ═══[/bold yellow]")
-            senior_reports = []
+                    member, run = targets[node.name]
+                    if (isinstance(result, Exception) and not isinstance(result, ShedError)) or (
+                            isinstance(result, str) and result.startswith("Error:")):
+                        failed_calls.append(node.name)
+                    if isinstance(result, ShedError):
+                        console.print(f"[yellow]–[/yellow] {node.name} skipped: {str(result)}")
+                    elif isinstance(result, Exception):
+                        console.print(f"[red]✗[/red] {node.name} failed: {str(result)}")
+                    else:
+                        stage = self.team_config.get_stage(member.stage)
+                        run.stage_reports[stage.name].append(self._make_report(member, result))
+                        order = self.team_config.get_stage_members(stage.name).index(member) + 1
+                        # Archive the full report; downstream stages read the compacted one
+                        raw_output = run.raw_outputs.get(member.name, result)
+                        extra = {"forwarded": result} if raw_output != result else {}
+                        cascade = run.cascades.get(member.name)
+                        if cascade:
+                            extra["cascade"] = cascade
+                        self.archive.write_report(run_id, stage.name, member.name, member.role, raw_output,
+                                                  order=order, folder=stage.reports_dir,
+                                                  model=(cascade["answered_by"] or member.model) if cascade else member.model,
+                                                  instrument=run.instrument, duration_s=run.timings.get(member.name),
+                                                  final=stage.name in terminal_stages, **extra)
+                        console.print(f"[green]✓[/green] {node.name} ({stage.title}) complete")
+                    remaining[member.stage] -= 1
+                    self._warm_next_stages(remaining, warmed_stages)
+                    progress.advance(task)
             
-            for idx, manager in enumerate(self.senior_managers, 1):
-                progress.update(task, description=f"[cyan]{manager.name} synthesizing...")
-                
-                senior_data = {"data": junior_reports}
-                
-                # Inject market data into prompt
-                manager_prompt = manager.system_prompt.replace("{{MARKET_DATA}}", market_data_formatted)
-                
-                senior_analyzer = OllamaAnalyzer(
-                    self.ollama_base_url,
-                    manager.model,
-                    manager.temperature
-                )
-                senior_report = asyncio.run(
-                    senior_analyzer.analyze_async(manager_prompt, senior_data)
+                # Sequential mode is the same DAG with a global concurrency limit of 1
+                executor = DagExecutor(
+                    group_limits={stage.name: stage.concurrency for stage in self.stages if stage.concurrency},
+                    max_concurrency=None if self.run_concurrent else 1,
+                    on_complete=on_complete
                 )
-                
-                # Save individual report
-                self._save_report("tier2_senior_managers", manager.name, manager.role, senior_report, order=idx)
-                
-                senior_reports.append({
-                    "manager": manager.name,
-                    "role": manager.role,
-                    "output": senior_report
-                })
-                progress.advance(task)
-                console.print(f"[green]✓[/green] {manager.name} synthesis complete")
-            
-            # TIER 3: Executive Committee Final Review (Multiple Committees)
-            if not self.executive_committees:
-                console.print("[red]Error: No executive committees configured[/red]")
-                return senior_reports[0]['output'] if senior_reports else "Error: No reports generated"
+                try:
+                    await executor.run(nodes)
+                finally:
+                    await self.stop_warm_up()
+        
+            if runs[0].deadline is not None:
+                self._report_deadline(runs[0])
+        
+            # Archive the snapshots even if no prompt used them
+            for run in runs:
+                await self._resolve_market_data(run)
+        
+            self._print_compaction_stats(runs[0])
+            self._print_cascade_stats(telemetry)
+        
+            # Keep reports in configuration order regardless of completion order
+            for run in runs:
+                for stage in self.stages:
+                    order = [member.name for member in self.team_config.get_stage_members(stage.name)]
+                    run.stage_reports[stage.name].sort(key=lambda report: order.index(report['name']))
+        
+            final_decisions = {
+                run.instrument: [
+                    report for stage in self.team_config.get_terminal_stages() for report in run.stage_reports[stage.name]
+                ]
+                for run in runs
+            }
+            telemetry.record_span("analysis", analysis_start, time.monotonic())
+            await self._export_telemetry(telemetry)
+            if failed_calls:
+                console.print(f"[yellow]{len(failed_calls)} call(s) failed; run with --resume to retry only those "
+                              f"and the calls that depend on them[/yellow]")
+        
+            if not any(final_decisions.values()):
+                console.print("[red]Error: No final decisions were generated[/red]")
+                self.archive.finish_run(run_id, "Error: No reports generated", {
+                    "error": True,
+                    "instrument": ", ".join(instruments),
+                    "duration_s": round(time.perf_counter() - start_time, 2)
+                }, keep_checkpoint=bool(failed_calls))
+                return "Error: No reports generated"
+        
+            # Return all executive decisions with clear separation
+            result = "\n\n" + "="*80 + "\n"
+            result += "FINAL EXECUTIVE DECISIONS\n"
+            result += "="*80 + "\n\n"
+        
+            for instrument, decisions in final_decisions.items():
+                if len(instruments) > 1:
+                    result += f"\n{'═'*80}\n"
+                    result += f"{instrument}\n"
+                    result += f"{'═'*80}\n"
+                for decision in decisions:
+                    result += f"\n{'─'*80}\n"
+                    result += f"{decision['name']} ({decision['role']})\n"
+                    result += f"{'─'*80}\n\n"
+                    result += decision['output']
+                    result += "\n"
+        
+            result += "\n" + "="*80 + "\n"
+        
+            for run in runs:
+                for stage_name, consensus in run.consensus.items():
+                    self.archive.write_record(run_id, "consensus", stage=stage_name, instrument=run.instrument,
+                                              content=consensus)
+                for stage_name, decision in run.fanout.items():
+                    self.archive.write_record(run_id, "fanout", stage=stage_name, instrument=run.instrument,
+                                              content=decision)
+            self.archive.finish_run(run_id, self._build_final_summary(result, runs), {
+                "instrument": ", ".join(instruments),
+                "instruments": instruments,
+                "mode": mode,
+                "duration_s": round(time.perf_counter() - start_time, 2)
+            }, keep_checkpoint=bool(failed_calls))
+            console.print(f"\n[bold green]✓ Complete analysis archived as run {run_id}: "
+                          f"{self.archive.root / f'FINAL_SUMMARY_{run_id}.txt'}[/bold green]")
+        
+            return result
+        finally:
+            self.archive.abort_run(run_id)
+    
+    def _select_instruments(self, aggregated_data: Dict[str, Any]) -> List[str]:
+        """Configured instruments, else the top instrument_count pairs ranked from the news."""
+        if self.instruments:
+            return self.instruments
+        if self.instrument_count > 1 and 'instrument' not in aggregated_data:
+            ranking = rank_instruments(aggregated_data)[:self.instrument_count]
+            if ranking:
+                return [entry['pair'] for entry in ranking]
+        return [extract_instrument_from_news(aggregated_data)]
+    
+    def _build_nodes(self, runs: List[PipelineRun]) -> Tuple[List[DagNode], Dict[str, Tuple[Any, PipelineRun]]]:
+        """
+        Expand stage and member dependencies into one DAG node per analyst and instrument.
+        
+        Within a stage, nodes are ordered by model so that the requests for one model
+        (across members and instruments) are dispatched back to back.
+        
+        Returns:
+            The nodes, and the member and run behind each analyst node
+        """
+        nodes = []
+        if self.team_config.digest.enabled:
+            nodes.append(DagNode(
+                name=DIGEST_NODE,
+                group="news_digest",
+                action=lambda upstream: profiled(runs[0].telemetry.profiler, "digest", self._run_digest(runs[0]))
+            ))
+        
+        def node_name(member_name: str, run: PipelineRun) -> str:
+            return f"{member_name} [{run.instrument}]" if len(runs) > 1 else member_name
+        
+        targets = {}
+        for stage in self.stages:
+            members = self.team_config.get_stage_members(stage.name)
+            first_model = {member.name: self.team_config.member_models(member)[0] for member in members}
+            models = list(dict.fromkeys(first_model.values()))
+            members = sorted(members, key=lambda member: models.index(first_model[member.name]))
+            for member in members:
+                for run in runs:
+                    depends_on = []
+                    for dep in member.depends_on or stage.depends_on:
+                        if any(s.name == dep for s in self.stages):
+                            depends_on.extend(node_name(m.name, run) for m in self.team_config.get_stage_members(dep))
+                        else:
+                            depends_on.append(node_name(dep, run))
+                    if stage.input == "news" and self.team_config.digest.enabled:
+                        depends_on.append(DIGEST_NODE)
+                    
+                    name = node_name(member.name, run)
+                    targets[name] = (member, run)
+                    nodes.append(DagNode(
+                        name=name,
+                        group=stage.name,
+                        depends_on=depends_on,
+                        action=self._make_action(name, member, stage, run, targets)
+                    ))
+        return nodes, targets
+    
+    def _stage_models(self, stage_names: List[str]) -> List[str]:
+        """Models used by the given stages, in member order and without duplicates."""
+        models = []
+        digest = self.team_config.digest
+        if digest.enabled and digest.mode == "model" and any(
+            self.team_config.get_stage(name).input == "news" for name in stage_names
+        ):
+            models.append(digest.model)
+        for name in stage_names:
+            for member in self.team_config.get_stage_members(name):
+                models.extend(self.team_config.member_models(member))
+            compaction = self.team_config.get_stage(name).compaction
+            if compaction and compaction.summary_model:
+                models.append(compaction.summary_model)
+        return list(dict.fromkeys(models))
+    
+    def _warm_next_stages(self, remaining: Dict[str, int], warmed_stages: set):
+        """
+        Preload the models of stages whose upstream stages are down to their last wave.
+        
+        An upstream stage is on its last wave once all of its remaining members are
+        running, so the downstream models load while those members generate instead
+        of evicting models that are still needed.
+        """
+        if not self.warmup_enabled:
+            return
+        
+        def last_wave(stage: PipelineStage) -> bool:
+            started = all(remaining[dep] == 0 for dep in stage.depends_on)
+            limit = (stage.concurrency or remaining[stage.name]) if self.run_concurrent else 1
+            return started and remaining[stage.name] <= limit
+        
+        ready = [
+            stage.name for stage in self.stages
+            if stage.name not in warmed_stages
+            and all(dep in warmed_stages and last_wave(self.team_config.get_stage(dep))
+                    for dep in stage.depends_on)
+        ]
+        if ready:
+            warmed_stages.update(ready)
+            self.warm_up(ready)
+    
+    def _make_action(self, name: str, member: Union[AnalystProfile, ManagementLayer], stage: PipelineStage,
+                     run: PipelineRun, targets: Dict[str, Tuple[Any, PipelineRun]]):
+        """Create the coroutine function that runs one analyst once its inputs are ready."""
+        async def action(upstream: Dict[str, str]) -> str:
+            dispatched = time.monotonic()
+            if stage.adaptive and member.name not in self._adaptive_fanout(stage, run)["members_run"]:
+                raise ShedError(f"strong consensus in {self.team_config.get_stage(stage.adaptive.source).title}")
+            resumed = run.checkpoint.get(name)
+            # Under a deadline the call may be shortened or dropped when it is due to start
+            # (a checkpointed call only once its inputs are known to have changed)
+            num_predict = run.deadline.admit(name) if run.deadline and resumed is None else None
             
-            console.print(f"\n[bold yellow]═══ TIER 3: EXECUTIVE COMMITTEES ({len(self.executive_committees)} Committees) ═══[/bold yellow]")
-            final_decisions = []
+            # Downstream stages see upstream reports under the member names
+            upstream = {targets[name][0].name if name in targets else name: output for name, output in upstream.items()}
             
-            for idx, committee in enumerate(self.executive_committees, 1):
-                progress.update(task, description=f"[cyan]{committee.name} deliberating...")
-                
-                executive_data = {
-                    "data": {
-                        "senior_reports": senior_reports,
-                        "analyst_count": len(junior_reports),
-                        "manager_count": len(senior_reports)
-                    }
-                }
-                
-                # Inject market data into prompt
-                committee_prompt = committee.system_prompt.replace("{{MARKET_DATA}}", market_data_formatted)
-                
-                executive_analyzer = OllamaAnalyzer(
-                    self.ollama_base_url,
-                    committee.model,
-                    committee.temperature
-                )
-                final_decision = asyncio.run(
-                    executive_analyzer.analyze_async(committee_prompt, executive_data)
-                )
-                
-                # Save individual report
-                self._save_report("tier3_executive_committees", committee.name, committee.role, final_decision, order=idx)
-                
-                final_decisions.append({
-                    "committee": committee.name,
-                    "role": committee.role,
-                    "output": final_decision
-                })
-                progress.advance(task)
-                console.print(f"[green]✓[/green] {committee.name} decision complete")
-        
-        # Return all executive decisions with clear separation
-        result = "\n\n" + "="*80 + "\n"
-        result += "FINAL EXECUTIVE DECISIONS\n"
-        result += "="*80 + "\n\n"
-        
-        for i, decision in enumerate(final_decisions, 1):
-            result += f"\n{'─'*80}\n"
-            result += f"{decision['committee']} ({decision['role']})\n"
-            result += f"{'─'*80}\n\n"
-            result += decision['output']
-            result += "\n"
-        
-        result += "\n" + "="*80 + "\n"
-        
-        # Save final summary (sequential mode)
-        self._save_final_summary(result, junior_reports, senior_reports, final_decisions)
-        
-        return result
-    
-    async def _analyze_news_async(self, aggregated_data: Dict[str, Any]) -> str:
-        """Concurrent multi-tier analysis pipeline with market data integration."""
-        
-        # Fetch market data first
-        console.print("[bold cyan]Fetching real-time market data...[/bold cyan]")
-        instrument = extract_instrument_from_news(aggregated_data)
-        market_data_raw = await self.market_data_fetcher.get_forex_data_async(instrument)
-        market_data_formatted = self.market_data_fetcher.format_market_data(market_data_raw)
-        console.print(market_data_formatted)
-        
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            console=console
-        ) as progress:
-            total_steps = len(self.junior_analysts) + len(self.senior_managers) + len(self.executive_committees)
-            task = progress.add_task("[cyan]Running analysis pipeline...", total=total_steps)
+            # Inject instrument and market data into prompt; only these members wait for the background fetch
+            prompt = member.system_prompt.replace("{{INSTRUMENT}}", run.instrument)
+            if "{{MARKET_DATA}}" in prompt:
+                prompt = prompt.replace("{{MARKET_DATA}}", await self._resolve_market_data(run))
+            if "{{PRICE_HISTORY}}" in prompt:
+                prompt = prompt.replace("{{PRICE_HISTORY}}", self._price_indicators(run))
+            if stage.structured_output:
+                prompt += STRUCTURED_OUTPUT_INSTRUCTIONS
+            elif member.cascade:
+                prompt += VERDICT_INSTRUCTIONS
+            data = self._build_stage_input(stage, upstream, run)
+            generation = self.team_config.generation_options(member)
             
-            # TIER 1: Junior Analysts Review (Concurrent)
-            console.print("[bold yellow]═══ TIER 1: JUNIOR ANALYSTS (CONCURRENT) ═══[/bold yellow]")
-            console.print(f"[dim]Running {len(self.junior_analysts)} analysts in parallel...[/dim]")
+            # A resumed run reuses the output of a completed call if its inputs are unchanged
+            input_hash = _input_hash(member.model, member.temperature, prompt, data, generation.to_ollama(),
+                                     stage.structured_output, *([asdict(member.cascade)] if member.cascade else []))
+            if resumed is not None:
+                if resumed["input_hash"] == input_hash:
+                    if "raw_output" in resumed:
+                        run.raw_outputs[member.name] = resumed["raw_output"]
+                    if "cascade" in resumed:
+                        run.cascades[member.name] = resumed["cascade"]
+                    return resumed["output"]
+                num_predict = run.deadline.admit(name) if run.deadline else None
+            if num_predict is not None:
+                prompt += f"\n\nTIME IS SHORT: keep your entire response under {int(num_predict * 0.75)} words."
             
-            analyst_tasks = []
-            for analyst in self.junior_analysts:
-                # Use analyst's configured system prompt
-                prompt = analyst.system_prompt
+            async def call(model: str, temperature: float, **extra: Any) -> Tuple[str, bool]:
+                """Run one model call; returns its output and whether the deadline cut it off."""
+                # The configured timeout bounds every call; a deadline can tighten it
+                timeout = generation.timeout or 300.0
+                deadline_timeout = run.deadline.timeout(name) if run.deadline else None
+                if deadline_timeout is not None and deadline_timeout < timeout:
+                    timeout = deadline_timeout
+                else:
+                    deadline_timeout = None
                 analyzer = OllamaAnalyzer(
                     self.ollama_base_url,
-                    analyst.model,
-                    analyst.temperature,
-                    analyst
-                )
-                analyst_tasks.append(
-                    self._run_junior_analyst(analyst, analyzer, prompt, aggregated_data)
+                    model,
+                    temperature,
+                    member if isinstance(member, AnalystProfile) else None,
+                    output_format=JUNIOR_REPORT_SCHEMA if stage.structured_output else None,
+                    keep_alive=self.keep_alive,
+                    num_predict=num_predict,
+                    timeout=timeout,
+                    options=generation.to_ollama()
                 )
+                started = time.monotonic()
+                output = await analyzer.analyze_async(prompt, data)
+                finished = time.monotonic()
+                run.telemetry.record_call(name, stage.name, model, started, finished, analyzer.metrics,
+                                          error=output.startswith("Error:"), instrument=run.instrument,
+                                          num_predict=num_predict, **extra)
+                run.telemetry.record_span(stage.name, dispatched, finished)
+                return output, deadline_timeout is not None and finished - started >= timeout
             
-            # Run all junior analysts concurrently
-            analyst_results = await asyncio.gather(*analyst_tasks, return_exceptions=True)
-            
-            junior_reports = []
-            for idx, result in enumerate(analyst_results, 1):
-                if isinstance(result, Exception):
-                    console.print(f"[red]✗[/red] Analyst failed: {str(result)}")
-                    continue
-                
-                analyst_name, analyst_role, focus_area, output = result
-                
-                # Save individual report
-                self._save_report("tier1_junior_analysts", analyst_name, analyst_role, output, order=idx)
-                
-                junior_reports.append({
-                    "analyst": analyst_name,
-                    "role": analyst_role,
-                    "focus": focus_area,
-                    "output": output
-                })
-                progress.advance(task, advance=1)
-                console.print(f"[green]✓[/green] {analyst_name} report complete")
-            
-            # TIER 2: Senior Manager Synthesis (Multiple Managers, run concurrently)
-            if not self.senior_managers:
-                console.print("[red]Error: No senior managers configured[/red]")
-                return "Configuration error: No senior managers found"
-            
-            console.print(f"\n[bold yellow]═══ TIER 2: SENIOR MANAGERS (CONCURRENT - {len(self.senior_managers)} Managers) ═══[/bold yellow]")
-            
-            manager_tasks = []
-            for manager in self.senior_managers:
-                senior_data = {"data": junior_reports}
-                # Inject market data into prompt
-                manager_prompt = manager.system_prompt.replace("{{MARKET_DATA}}", market_data_formatted)
-                
-                senior_analyzer = OllamaAnalyzer(
-                    self.ollama_base_url,
-                    manager.model,
-                    manager.temperature
-                )
-                manager_tasks.append(
-                    self._run_senior_manager(manager, senior_analyzer, manager_prompt, senior_data)
-                )
-            
-            # Run all senior managers concurrently
-            manager_results = await asyncio.gather(*manager_tasks, return_exceptions=True)
-            
-            senior_reports = []
-            for idx, result in enumerate(manager_results, 1):
-                if isinstance(result, Exception):
-                    console.print(f"[red]✗[/red] Manager failed: {str(result)}")
-                    continue
-                
-                manager_name, manager_role, output = result
-                
-                # Save individual report
-                self._save_report("tier2_senior_managers", manager_name, manager_role, output, order=idx)
-                
-                senior_reports.append({
-                    "manager": manager_name,
-                    "role": manager_role,
-                    "output": output
-                })
-                progress.advance(task, advance=1)
-                console.print(f"[green]✓[/green] {manager_name} synthesis complete")
-            
-            # TIER 3: Executive Committee Final Review (Multiple Committees, run concurrently)
-            if not self.executive_committees:
-                console.print("[red]Error: No executive committees configured[/red]")
-                return senior_reports[0]['output'] if senior_reports else "Error: No reports generated"
-            
-            console.print(f"\n[bold yellow]═══ TIER 3: EXECUTIVE COMMITTEES (CONCURRENT - {len(self.executive_committees)} Committees) ═══[/bold yellow]")
-            
-            committee_tasks = []
-            for committee in self.executive_committees:
-                executive_data = {
-                    "data": {
-                        "senior_reports": senior_reports,
-                        "analyst_count": len(junior_reports),
-                        "manager_count": len(senior_reports)
-                    }
+            started = time.monotonic()
+            cascade = member.cascade
+            if cascade is None:
+                output, cut_off = await call(member.model, member.temperature)
+            else:
+                # The small model answers first; the member's model runs only if that answer is unusable or unsure
+                temperature = member.temperature if cascade.temperature is None else cascade.temperature
+                output, cut_off = await call(cascade.model, temperature, analyst=member.name, cascade="first")
+                reason, confidence = self._escalation_reason(output, stage, cascade)
+                outcome = run.cascades[member.name] = {
+                    "model": cascade.model, "escalated": reason is not None, "reason": reason,
+                    "confidence": confidence, "direction": extract_direction(output), "answered_by": cascade.model,
                 }
-                
-                # Inject market data into prompt
-                committee_prompt = committee.system_prompt.replace("{{MARKET_DATA}}", market_data_formatted)
-                
-                executive_analyzer = OllamaAnalyzer(
-                    self.ollama_base_url,
-                    committee.model,
-                    committee.temperature
-                )
-                committee_tasks.append(
-                    self._run_executive_committee(committee, executive_analyzer, committee_prompt, executive_data)
-                )
-            
-            # Run all executive committees concurrently
-            committee_results = await asyncio.gather(*committee_tasks, return_exceptions=True)
-            
-            final_decisions = []
-            for idx, result in enumerate(committee_results, 1):
-                if isinstance(result, Exception):
-                    console.print(f"[red]✗[/red] Committee failed: {str(result)}")
-                    continue
-                
-                committee_name, committee_role, output = result
-                
-                # Save individual report
-                self._save_report("tier3_executive_committees", committee_name, committee_role, output, order=idx)
-                
-                final_decisions.append({
-                    "committee": committee_name,
-                    "role": committee_role,
-                    "output": output
-                })
-                progress.advance(task, advance=1)
-                console.print(f"[green]✓[/green] {committee_name} decision complete")
-        
-        # Return all executive decisions with clear separation
-        result = "\n\n" + "="*80 + "\n"
-        result += "FINAL EXECUTIVE DECISIONS\n"
-        result += "="*80 + "\n\n"
-        
-        for i, decision in enumerate(final_decisions, 1):
-            result += f"\n{'─'*80}\n"
-            result += f"{decision['committee']} ({decision['role']})\n"
-            result += f"{'─'*80}\n\n"
-            result += decision['output']
-            result += "\n"
-        
-        result += "\n" + "="*80 + "\n"
-        
-        # Save final summary (concurrent mode)
-        self._save_final_summary(result, junior_reports, senior_reports, final_decisions)
-        
-        return result
-    
-    async def _run_junior_analyst(self, analyst: AnalystProfile, analyzer: OllamaAnalyzer, 
-                                   prompt: str, data: Dict[str, Any]) -> tuple:
-        """Run a single junior analyst analysis asynchronously."""
-        result = await analyzer.analyze_async(prompt, data)
-        return (analyst.name, analyst.role, analyst.focus_area, result)
-    
-    async def _run_senior_manager(self, manager: ManagementLayer, analyzer: OllamaAnalyzer,
-                                   prompt: str, data: Dict[str, Any]) -> tuple:
-        """Run a single senior manager synthesis asynchronously."""
-        result = await analyzer.analyze_async(prompt, data)
-        return (manager.name, manager.role, result)
-    
-    async def _run_executive_committee(self, committee: ManagementLayer, analyzer: OllamaAnalyzer,
-                                        prompt: str, data: Dict[str, Any]) -> tuple:
-        """Run a single executive committee review asynchronously."""
-        result = await analyzer.analyze_async(prompt, data)
-        return (committee.name, committee.role, result)
-    
-    def _save_final_summary(self, result: str, junior_reports: List[Dict], 
-                           senior_reports: List[Dict], final_decisions: List[Dict]):
-        """Save a comprehensive summary of the entire analysis run."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = self.reports_dir / f"FINAL_SUMMARY_{timestamp}.txt"
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"{'='*80}\n")
-            f.write(f"COMPLETE ANALYSIS SUMMARY\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"{'='*80}\n\n")
-            
-            f.write(f"PIPELINE STATISTICS:\n")
-            f.write(f"  • Junior Analysts: {len(junior_reports)}\n")
-            f.write(f"  • Senior Managers: {len(senior_reports)}\n")
-            f.write(f"  • Executive Committees: {len(final_decisions)}\n\n")
-            
-            f.write(f"{'='*80}\n")
-            f.write(f"EXECUTIVE DECISIONS (SENT TO DISCORD)\n")
-            f.write(f"{'='*80}\n")
-            f.write(result)
+                if reason is not None:
+                    first_output = output
+                    output, cut_off = await call(member.model, member.temperature, analyst=member.name,
+                                                 cascade="escalation", escalation_reason=reason)
+                    if output.startswith("Error:") and not first_output.startswith("Error:"):
+                        # Keep the small model's report rather than none
+                        output, cut_off = first_output, False
+                    else:
+                        outcome["answered_by"] = member.model
+                if output.startswith("Error:"):
+                    outcome["answered_by"] = None  # both models failed
+            elapsed = time.monotonic() - started
+            run.timings[member.name] = round(elapsed, 2)
+            if output.startswith("Error:"):
+                if cut_off:
+                    raise ShedError(f"cut off after {elapsed:.0f}s to keep the deadline")
+            elif num_predict is None:
+                # Shortened calls would skew the estimates
+                self.latency.record(member.name, member.model, elapsed, estimate_tokens(output))
+            if stage.compaction:
+                run.raw_outputs[member.name] = output
+                output = await self._compact_output(output, stage, run)
+            if not output.startswith("Error:"):
+                self.archive.write_checkpoint(run.run_id, "node", name=name, input_hash=input_hash, output=output,
+                                              **({"raw_output": run.raw_outputs[member.name]} if stage.compaction else {}),
+                                              **({"cascade": run.cascades[member.name]} if cascade else {}))
+            return output
+        return lambda upstream: profiled(run.telemetry.profiler, stage.name, action(upstream))
+    
+    @staticmethod
+    def _escalation_reason(output: str, stage: PipelineStage, cascade: CascadeConfig) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Check a cascade's first answer.
+        
+        Returns:
+            Why the member's own model has to run (None to accept the answer), and the stated confidence
+        """
+        if output.startswith("Error:"):
+            return "error", None
+        if stage.structured_output:
+            if parse_structured_report(output) is None:
+                return "invalid", None
+        elif extract_direction(output) is None:
+            return "invalid", None
+        confidence = score_confidence(output)
+        if confidence is None:
+            return "no_confidence", None
+        if confidence < cascade.min_confidence:
+            return "low_confidence", confidence
+        return None, confidence
+    
+    def _plan_deadline(self, deadline: datetime, targets: Dict[str, Tuple[Any, PipelineRun]]) -> RunDeadline:
+        """
+        Estimate every call from past latencies and drop the lowest-priority ones that don't fit.
+        
+        The highest-priority member of each stage (the first in configuration order
+        among equals) is protected for every instrument, so each stage, and at least
+        one executive committee, always produces a report.
+        """
+        if not self._latency_loaded:
+            self._latency_loaded = True
+            history = self.archive.history
+            if history is not None:
+                try:
+                    self.latency.load(history.latency_samples())
+                except Exception as e:
+                    console.print(f"[yellow]Warning: Could not load call latencies from the run history: {str(e)}[/yellow]")
+        
+        protected = {
+            stage.name: max(self.team_config.get_stage_members(stage.name), key=lambda m: m.priority, default=None)
+            for stage in self.stages
+        }
+        # Calls checkpointed by the run being resumed are expected to be reused instantly
+        calls = [
+            DeadlineCall(name, member.stage, member.priority,
+                         CallEstimate(0.0, 0) if name in run.checkpoint else self._estimate_call(member),
+                         protected=member is protected[member.stage])
+            for name, (member, run) in targets.items()
+        ]
+        run_deadline = RunDeadline.plan(
+            time.monotonic() + deadline.timestamp() - time.time(),
+            calls,
+            {stage.name: self.team_config.stage_levels[stage.name] for stage in self.stages},
+            {stage.name: stage.concurrency for stage in self.stages},
+            self.run_concurrent
+        )
+        
+        console.print(f"[cyan]Deadline {deadline.astimezone():%H:%M:%S} ({run_deadline.remaining:.0f}s left)"
+                      + (f": skipping {', '.join(run_deadline.dropped)}" if run_deadline.dropped else "")
+                      + "[/cyan]")
+        return run_deadline
+    
+    def _estimate_call(self, member: Union[AnalystProfile, ManagementLayer]) -> CallEstimate:
+        """Expected duration and report length of a member's call, capped by its configured limits."""
+        estimate = self.latency.estimate(member.name, member.model)
+        generation = self.team_config.generation_options(member)
+        if generation.timeout:
+            estimate.seconds = min(estimate.seconds, generation.timeout)
+        if generation.num_predict and generation.num_predict > 0:
+            estimate.tokens = min(estimate.tokens, generation.num_predict)
+        return estimate
+    
+    async def _export_telemetry(self, telemetry: RunTelemetry):
+        """Archive the run's telemetry as JSON, write the Prometheus textfile and print where the time went."""
+        for start, end in self._market_data_spans:
+            if end >= telemetry.origin:
+                telemetry.record_span("market_data", start, end)
+        self._market_data_spans = []
+        
+        self.archive.write_metrics(telemetry.run_id, telemetry.to_dict())
+        if self.metrics_textfile is not None:
+            try:
+                await asyncio.to_thread(write_textfile, self.metrics_textfile, telemetry.prometheus())
+            except OSError as e:
+                console.print(f"[yellow]Warning: Could not write metrics to {self.metrics_textfile}: {str(e)}[/yellow]")
+        
+        spans = ", ".join(f"{name} {span['duration_s']:.1f}s"
+                          for name, span in sorted(telemetry.spans.items(), key=lambda item: item[1]['start_s']))
+        console.print(f"[dim]Timings: {spans}[/dim]")
+        for model, totals in telemetry.model_summary().items():
+            rate = f"{totals['eval_tokens_per_s']:.1f} tok/s" if totals['eval_tokens_per_s'] else "no token counts"
+            console.print(f"[dim]  {model}: {totals['calls']} calls, {rate}, {totals['load_s']:.1f}s loading, "
+                          f"{totals['wall_s']:.1f}s in calls[/dim]")
+    
+    def _report_deadline(self, run: PipelineRun):
+        """Print and archive how the run did against its deadline."""
+        summary = run.deadline.summary()
+        slack = summary["slack_s"]
+        cuts = f"{len(summary['dropped'])} skipped, {len(summary['shortened'])} shortened"
+        if summary["met"]:
+            console.print(f"[green]✓[/green] Deadline met with {slack:.1f}s to spare ({cuts})")
+        else:
+            console.print(f"[red]✗ Deadline missed by {-slack:.1f}s ({cuts})[/red]")
+        self.archive.write_record(run.run_id, "deadline", content=summary)
+    
+    async def _fetch_market_data(self, instrument: str, force_refresh: bool = False) -> Tuple[Dict[str, Any], float]:
+        """Fetch market data and return it with the monotonic time the snapshot was taken."""
+        started = time.monotonic()
+        data = await self.market_data_fetcher.get_forex_data_async(instrument, force_refresh=force_refresh)
+        self._market_data_spans.append((started, time.monotonic()))
+        # Cached snapshots can be older than this call
+        return data, time.monotonic() - data.get('age_seconds', 0)
+    
+    def _take_market_data_task(self, instrument: str) -> asyncio.Task:
+        """Reuse the prefetch if there was one for this instrument, otherwise start a new fetch."""
+        task = self._market_data_prefetch.pop(instrument, None)
+        if task is not None:
+            return task
+        console.print(f"[cyan]Fetching real-time market data for {instrument} in the background...[/cyan]")
+        return asyncio.create_task(self._fetch_market_data(instrument))
+    
+    async def _resolve_market_data(self, run: PipelineRun) -> str:
+        """
+        Wait for the background market data fetch and format the snapshot.
+        
+        The first caller refreshes the snapshot if it is older than market_data_max_age;
+        later callers in the same run get the same snapshot.
+        """
+        async with run.market_data_lock:
+            if run.market_data is not None:
+                return run.market_data
             
-            f.write(f"\n\n{'='*80}\n")
-            f.write(f"DETAILED BREAKDOWN\n")
-            f.write(f"{'='*80}\n\n")
+            data, fetched_at = await run.market_data_task
+            if time.monotonic() - fetched_at > self.market_data_max_age:
+                # A background refresh may have landed since; otherwise wait for a new snapshot
+                data, fetched_at = await self._fetch_market_data(run.instrument)
+                age = time.monotonic() - fetched_at
+                if age > self.market_data_max_age:
+                    console.print(f"[cyan]Market data is {age:.0f}s old, refreshing...[/cyan]")
+                    data, fetched_at = await self._fetch_market_data(run.instrument, force_refresh=True)
             
-            f.write(f"All individual reports are saved in:\n")
-            f.write(f"  • {self.reports_dir / 'tier1_junior_analysts'}\n")
-            f.write(f"  • {self.reports_dir / 'tier2_senior_managers'}\n")
-            f.write(f"  • {self.reports_dir / 'tier3_executive_committees'}\n")
+            run.market_data = self.market_data_fetcher.format_market_data(data)
+            self.archive.write_checkpoint(run.run_id, "context", instrument=run.instrument, market_data=run.market_data)
+            console.print(run.market_data)
+            self.archive.write_record(run.run_id, "market_data", content=data,
+                                      age_s=round(time.monotonic() - fetched_at, 2))
+            return run.market_data
+    
+    def _price_indicators(self, run: PipelineRun) -> str:
+        """
+        Format the technical indicators of the run's instrument from the recorded price history.
         
-        console.print(f"\n[bold green]✓ Complete analysis saved to: {filepath}[/bold green]")
-
-
+        Uses the samples recorded so far without waiting for the current fetch; every
+        member of the run sees the same indicators.
+        """
+        if run.price_indicators is None:
+            indicators = self.price_history.indicators(run.instrument) if self.price_history else None
+            run.price_indicators = format_indicators(run.instrument, indicators)
+            self.archive.write_checkpoint(run.run_id, "context", instrument=run.instrument,
+                                          price_indicators=run.price_indicators)
+            self.archive.write_record(run.run_id, "price_indicators", instrument=run.instrument, content=indicators)
+        return run.price_indicators
+    
+    async def _compact_output(self, output: str, stage: PipelineStage, run: PipelineRun) -> str:
+        """Strip reasoning and boilerplate and enforce the stage's length limit on one report."""
+        config = stage.compaction
+        # Structured JSON reports are already compact and must stay parseable
+        max_chars = None if stage.structured_output else config.max_chars
+        compacted = compact_report(output, config.strip_reasoning, config.remove_boilerplate)
+        
+        if max_chars and len(compacted) > max_chars and config.summary_model:
+            summarizer = OllamaAnalyzer(self.ollama_base_url, config.summary_model, config.summary_temperature,
+                                        keep_alive=self.keep_alive)
+            prompt = SUMMARY_PROMPT.replace("{max_chars}", str(max_chars))
+            started = time.monotonic()
+            summary = await summarizer.analyze_async(prompt, {"report": compacted})
+            run.telemetry.record_call(f"{stage.title} summary", "compaction", config.summary_model, started,
+                                      time.monotonic(), summarizer.metrics, error=summary.startswith("Error:"))
+            if not summary.startswith("Error:"):
+                compacted = strip_reasoning(summary)
+        if max_chars:
+            compacted = truncate_report(compacted, max_chars)
+        
+        stats = run.compaction_stats.setdefault(stage.name, {"reports": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["reports"] += 1
+        stats["tokens_before"] += estimate_tokens(output)
+        stats["tokens_after"] += estimate_tokens(compacted)
+        return compacted
+    
+    def _print_compaction_stats(self, run: PipelineRun):
+        """Print the estimated token reduction achieved by compaction for each stage."""
+        for stage_name, stats in run.compaction_stats.items():
+            before, after = stats["tokens_before"], stats["tokens_after"]
+            reduction = (1 - after / before) * 100 if before else 0
+            console.print(f"[dim]Compaction {self.team_config.get_stage(stage_name).title}: {stats['reports']} reports, "
+                          f"~{before:,} → ~{after:,} tokens ({reduction:.0f}% smaller)[/dim]")
+    
+    def _print_cascade_stats(self, telemetry: RunTelemetry):
+        """Print how many cascade calls each small model answered and why the others escalated."""
+        by_model: Dict[str, Dict[str, Any]] = {}
+        for stats in telemetry.cascade_summary().values():
+            totals = by_model.setdefault(stats["model"], {"calls": 0, "escalations": 0, "failed": 0, "reasons": {}})
+            totals["calls"] += stats["calls"]
+            totals["escalations"] += stats["escalations"]
+            totals["failed"] += stats["failed"]
+            for reason, count in stats["reasons"].items():
+                totals["reasons"][reason] = totals["reasons"].get(reason, 0) + count
+        for model, totals in by_model.items():
+            reasons = ", ".join(f"{reason} {count}" for reason, count in totals["reasons"].items())
+            console.print(f"[dim]Cascade {model}: answered {totals['calls'] - totals['escalations']}/{totals['calls']} "
+                          f"calls" + (f", escalated {totals['escalations']} ({reasons})" if reasons else "")
+                          + (f", both models failed {totals['failed']}" if totals["failed"] else "") + "[/dim]")
+    
+    def _build_stage_input(self, stage: PipelineStage, upstream: Dict[str, str], run: PipelineRun) -> Dict[str, Any]:
+        """Build the data payload a stage receives, according to its input mode."""
+        if stage.input == "news":
+            # Use the Stage 0 digest when it succeeded, the raw articles otherwise
+            if DIGEST_NODE in upstream:
+                return {"data": upstream[DIGEST_NODE]}
+            return run.aggregated_data
+        
+        reports = [self._make_report(self.members_by_name[name], output) for name, output in upstream.items()]
+        if stage.input == "reports":
+            return {"data": reports}
+        
+        if stage.input == "consensus":
+            for report in reports:
+                report["parsed"] = parse_structured_report(report["output"])
+            consensus_input = build_consensus_input(reports)
+            self._report_consensus(stage, consensus_input["consensus"], run)
+            return {"data": consensus_input}
+        
+        # "review": upstream reports plus how many reports each earlier stage produced
+        return {
+            "data": {
+                "reports": reports,
+                "report_counts": {
+                    name: len(run.stage_reports[name]) for name in self.team_config.get_stage_ancestors(stage.name)
+                }
+            }
+        }
+    
+    def _adaptive_fanout(self, stage: PipelineStage, run: PipelineRun) -> Dict[str, Any]:
+        """
+        Decide, once per run, which members of an adaptive stage run.
+        
+        When the source stage's reports agree strongly enough, only the stage's
+        highest-priority members run (the first in configuration order among equals);
+        otherwise the full stage does.
+        """
+        if stage.name in run.fanout:
+            return run.fanout[stage.name]
+        adaptive = stage.adaptive
+        agreement = measure_agreement([report["output"] for report in run.stage_reports[adaptive.source]])
+        strong = (agreement["reports"] >= adaptive.min_reports
+                  and agreement["agreement"] >= adaptive.min_agreement
+                  and agreement["leading_mean_confidence"] >= adaptive.min_confidence)
+        members = self.team_config.get_stage_members(stage.name)
+        if strong:
+            members = sorted(members, key=lambda member: -member.priority)[:adaptive.members]
+        decision = run.fanout[stage.name] = {
+            "source": adaptive.source,
+            **agreement,
+            "strong_consensus": strong,
+            "members_run": [member.name for member in members],
+            "members_total": len(self.team_config.get_stage_members(stage.name)),
+        }
+        
+        source_title = self.team_config.get_stage(adaptive.source).title
+        measured = (f"{agreement['leading_direction'] or 'none'} (agreement {agreement['agreement']:.0%}, "
+                    f"confidence {agreement['leading_mean_confidence']:.2f}, {agreement['reports']} reports)")
+        if strong:
+            console.print(f"[cyan]Adaptive fan-out for {stage.title} ({run.instrument}): strong consensus in "
+                          f"{source_title} on {measured}; running {len(members)}/{decision['members_total']} "
+                          f"({', '.join(decision['members_run'])})[/cyan]")
+        else:
+            console.print(f"[cyan]Adaptive fan-out for {stage.title} ({run.instrument}): {source_title} "
+                          f"{measured} below the consensus thresholds; running the full stage[/cyan]")
+        return decision
+    
+    def _report_consensus(self, stage: PipelineStage, consensus: Dict[str, Any], run: PipelineRun):
+        """Print the numeric consensus the first time a stage computes it."""
+        if stage.name in run.consensus:
+            return
+        run.consensus[stage.name] = consensus
+        votes = ", ".join(f"{direction}: {count}" for direction, count in consensus["votes"].items() if count)
+        console.print(f"[cyan]Consensus for {stage.title} ({run.instrument}): {consensus['leading_direction'] or 'none'} "
+                      f"(agreement {consensus['agreement']:.0%}, mean confidence {consensus['mean_confidence']:.2f}; "
+                      f"{votes or 'no structured votes'}; "
+                      f"{consensus['analysts_structured']}/{consensus['analysts_total']} structured)[/cyan]")
+    
+    async def _run_digest(self, run: PipelineRun) -> Dict[str, Any]:
+        """Condense and deduplicate the raw articles into a structured event digest (Stage 0)."""
+        with run.telemetry.span("digest"):
+            input_hash = _input_hash(run.aggregated_data, asdict(self.team_config.digest))
+            resumed = run.checkpoint.get(DIGEST_NODE)
+            if resumed is not None and resumed["input_hash"] == input_hash:
+                return resumed["output"]
+            digest = await self._build_digest(run)
+            self.archive.write_checkpoint(run.run_id, "node", name=DIGEST_NODE, input_hash=input_hash, output=digest)
+            return digest
+    
+    async def _build_digest(self, run: PipelineRun) -> Dict[str, Any]:
+        digest_config = self.team_config.digest
+        aggregated_data = run.aggregated_data
+        if digest_config.mode == "model":
+            analyzer = OllamaAnalyzer(self.ollama_base_url, digest_config.model, digest_config.temperature,
+                                      keep_alive=self.keep_alive)
+            started = time.monotonic()
+            response = await analyzer.analyze_async(digest_config.system_prompt, aggregated_data)
+            run.telemetry.record_call(DIGEST_NODE, "digest", digest_config.model, started, time.monotonic(),
+                                      analyzer.metrics, error=response.startswith("Error:"))
+            digest = parse_digest_response(response, aggregated_data)
+            if digest is not None:
+                return digest
+            console.print("[yellow]Warning: Digest model returned invalid JSON, falling back to the parser[/yellow]")
+        
+        return build_news_digest(
+            aggregated_data,
+            max_events=digest_config.max_events,
+            summary_chars=digest_config.summary_chars,
+            max_age_hours=digest_config.max_age_hours
+        )
+    
+    def _on_digest_complete(self, result: Any, run: PipelineRun):
+        """Report and archive the Stage 0 digest."""
+        if isinstance(result, Exception):
+            console.print(f"[red]✗[/red] News digest failed, juniors will read the raw news: {str(result)}")
+            return
+        
+        raw_size = len(json.dumps(run.aggregated_data, indent=2, default=str))
+        digest_json = json.dumps(result, indent=2, ensure_ascii=False)
+        reduction = (1 - len(digest_json) / raw_size) * 100 if raw_size else 0
+        console.print(f"[green]✓[/green] News digest: {result['article_count']} articles → {result['event_count']} events "
+                      f"({raw_size:,} → {len(digest_json):,} chars, {reduction:.0f}% smaller)")
+        self.archive.write_record(run.run_id, "digest", content=result)
+    
+    @staticmethod
+    def _make_report(member: Union[AnalystProfile, ManagementLayer], output: str) -> Dict[str, Any]:
+        """Package an analyst's output with its identity for downstream stages."""
+        report = {"name": member.name, "role": member.role}
+        if isinstance(member, AnalystProfile):
+            report["focus"] = member.focus_area
+        report["output"] = output
+        return report
+    
+    def _build_final_summary(self, result: str, runs: List[PipelineRun]) -> str:
+        """Build a comprehensive summary of the entire analysis run."""
+        run = runs[0]
+        lines = [
+            "="*80,
+            "COMPLETE ANALYSIS SUMMARY",
+            f"Run: {run.run_id}",
+            f"Instruments: {', '.join(r.instrument for r in runs)}",
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            "="*80,
+            "",
+            "PIPELINE STATISTICS:",
+        ]
+        for stage in self.stages:
+            lines.append(f"  • {stage.title}: {sum(len(r.stage_reports[stage.name]) for r in runs)}")
+        lines.append("")
+        
+        for stage_name, stats in run.compaction_stats.items():
+            before, after = stats["tokens_before"], stats["tokens_after"]
+            lines.append(f"  • {self.team_config.get_stage(stage_name).title} compaction: ~{before:,} → ~{after:,} tokens")
+        if run.compaction_stats:
+            lines.append("")
+        
+        for r in runs:
+            for stage_name, decision in r.fanout.items():
+                lines.append(f"  • {self.team_config.get_stage(stage_name).title} adaptive fan-out ({r.instrument}): "
+                             f"{len(decision['members_run'])}/{decision['members_total']} members, "
+                             f"{decision['source']} agreement {decision['agreement']:.0%} on "
+                             f"{decision['leading_direction'] or 'none'}")
+        if any(r.fanout for r in runs):
+            lines.append("")
+        
+        for r in runs:
+            for stage_name, consensus in r.consensus.items():
+                lines.append(f"CONSENSUS INPUT FOR {self.team_config.get_stage(stage_name).title.upper()} ({r.instrument}):")
+                lines.append(json.dumps(consensus, indent=2))
+                lines.append("")
+        
+        lines.extend([
+            "="*80,
+            "EXECUTIVE DECISIONS (SENT TO DISCORD)",
+            "="*80,
+            result,
+            "",
+            "="*80,
+            "DETAILED BREAKDOWN",
+            "="*80,
+            "",
+            "All individual reports are archived in:",
+            f"  • {self.archive.root / f'run_{run.run_id}.jsonl.gz'}",
+            f"Export them as per-tier text files with: python src/run_archive.py export {run.run_id}",
+            "",
+        ])
+        return "\n".join(lines)
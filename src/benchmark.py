@@ -0,0 +1,629 @@
+"""Local performance benchmark: the full workflow against stub Ollama, RSS, FX-rate and Discord servers."""
+import asyncio
+import importlib
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+
+from config import settings
+from main import SquawkWorkflow
+from rss_fetcher import FEED_HEADERS, RSSFeedAggregator
+
+console = Console()
+
+# Settings applied on top of the common benchmark settings, per scheduling mode
+SCHEDULING_MODES: Dict[str, Dict[str, Any]] = {
+    "sequential": {"run_concurrent": False},
+    "concurrent": {"run_concurrent": True},
+    # Models unloaded after every request and never preloaded: every call pays the load time
+    "concurrent-cold": {"run_concurrent": True, "ollama_keep_alive": "0", "ollama_warmup": False},
+    "multi-instrument": {"run_concurrent": True, "instruments": "EUR/USD,GBP/USD,USD/JPY"},
+}
+
+# Modules whose console output is silenced unless --verbose is given
+WORKFLOW_MODULES = ("ai_analyzer", "discord_sender", "main", "market_data", "model_warmup",
+                    "price_history", "rss_fetcher", "run_archive", "run_history")
+
+# (result key, statistic, True if a higher value is worse) compared against a baseline
+REGRESSION_CHECKS = (
+    ("run_s", "p50", True),
+    ("run_s", "p95", True),
+    ("call_s", "p95", True),
+    ("calls_per_s", None, False),
+)
+
+USD_RATES = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "AUD": 1.52, "NZD": 1.66, "CAD": 1.36, "CHF": 0.88, "JPY": 149.5}
+HEADLINES = (
+    "{pair} climbs as {event} beats expectations",
+    "{pair} slips after {event} surprise",
+    "Traders eye {event} as {pair} consolidates",
+    "{pair} outlook: what {event} means for the week ahead",
+    "{pair} volatility jumps on {event}",
+)
+EVENTS = ("US CPI", "Nonfarm Payrolls", "ECB rate decision", "UK GDP", "BoJ minutes",
+          "FOMC minutes", "US retail sales", "Eurozone PMI", "SNB statement", "RBA decision")
+FILLER = ("price", "support", "resistance", "momentum", "yields", "risk", "inflation", "central", "bank",
+          "traders", "positioning", "data", "outlook", "dollar", "euro", "volatility", "range", "breakout")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linearly interpolated percentile of the values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (rank - low), 3)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 resets connections when a run sends a burst of concurrent requests
+    request_queue_size = 128
+
+
+class StubServer:
+    """A local HTTP server on a free port, answering requests on background threads."""
+
+    def __init__(self):
+        self._server = _StubHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Tuple[int, str, bytes]:
+        """Answer one request with (status, content type, body)."""
+        raise NotImplementedError
+
+    @staticmethod
+    def json_response(data: Dict[str, Any], status: int = 200) -> Tuple[int, str, bytes]:
+        return status, "application/json", json.dumps(data).encode("utf-8")
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = urlparse(self.path)
+                status, content_type, payload = stub.handle(self.command, url.path, parse_qs(url.query), body)
+                self.send_response(status)
+                if status != 204:
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if status != 204:
+                    self.wfile.write(payload)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@dataclass
+class OllamaProfile:
+    """Simulated performance of the Ollama server."""
+    latency: float = 0.05  # Seconds of overhead per request
+    token_rate: float = 1500.0  # Output tokens generated per second, per request
+    prompt_rate: float = 100000.0  # Prompt tokens evaluated per second
+    load_delay: float = 0.5  # Seconds to load a model that is not in memory
+    response_tokens: int = 300  # Typical report length (varies by ±30%)
+    num_parallel: int = 4  # Requests served at once per model, as OLLAMA_NUM_PARALLEL
+    max_loaded_models: int = 3  # Models kept in memory, as OLLAMA_MAX_LOADED_MODELS
+
+
+class MockOllama(StubServer):
+    """
+    An Ollama-compatible /api/generate with simulated load, prompt and generation times.
+
+    Models load one at a time and the least recently used one is evicted beyond
+    max_loaded_models; a model with keep_alive 0 is unloaded after its last
+    request. Responses carry Ollama's timing fields, a direction for the
+    consensus and JSON when a format is requested.
+    """
+
+    def __init__(self, profile: OllamaProfile, seed: int = 0):
+        super().__init__()
+        self.profile = profile
+        self.seed = seed
+        self.requests: List[Dict[str, Any]] = []
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded: 'OrderedDict[str, None]' = OrderedDict()
+        self._active: Dict[str, int] = {}
+        self._slots: Dict[str, threading.Semaphore] = {}
+
+    def reset(self):
+        """Unload every model and forget the recorded requests."""
+        with self._lock:
+            self._loaded.clear()
+            self.requests.clear()
+            self.loads = 0
+
+    def handle(self, method, path, query, body):
+        if method != "POST" or path != "/api/generate":
+            return self.json_response({"error": "not found"}, 404)
+        request = json.loads(body or b"{}")
+        model = request.get("model", "")
+        with self._lock:
+            self._active[model] = self._active.get(model, 0) + 1
+            slots = self._slots.setdefault(model, threading.Semaphore(max(1, self.profile.num_parallel)))
+        try:
+            received = time.perf_counter()
+            load_s = self._ensure_loaded(model)
+            if not request.get("prompt"):
+                # A request without a prompt only loads the model
+                return self.json_response({"model": model, "done": True, "load_duration": int(load_s * 1e9)})
+            with slots:
+                queued_s = time.perf_counter() - received - load_s
+                result = self._generate(model, request, load_s)
+            self._record(model, queued_s, load_s, result)
+            return self.json_response(result)
+        finally:
+            with self._lock:
+                self._active[model] -= 1
+                if str(request.get("keep_alive")) in ("0", "0s") and not self._active[model]:
+                    self._loaded.pop(model, None)
+
+    def _ensure_loaded(self, model: str) -> float:
+        with self._lock:
+            if model in self._loaded:
+                self._loaded.move_to_end(model)
+                return 0.0
+        with self._load_lock:
+            with self._lock:
+                if model in self._loaded:
+                    return 0.0
+            time.sleep(self.profile.load_delay)
+            with self._lock:
+                self._loaded[model] = None
+                self.loads += 1
+                while len(self._loaded) > max(1, self.profile.max_loaded_models):
+                    self._loaded.popitem(last=False)
+        return self.profile.load_delay
+
+    def _generate(self, model: str, request: Dict[str, Any], load_s: float) -> Dict[str, Any]:
+        prompt = request["prompt"]
+        rng = random.Random(f"{self.seed}:{model}:{len(prompt)}:{prompt[:200]}")
+        tokens = max(1, int(self.profile.response_tokens * rng.uniform(0.7, 1.3)))
+        num_predict = (request.get("options") or {}).get("num_predict")
+        if isinstance(num_predict, int) and num_predict > 0:
+            tokens = min(tokens, num_predict)
+        prompt_tokens = max(1, len(prompt) // 4)
+        prompt_s = prompt_tokens / self.profile.prompt_rate
+        eval_s = tokens / self.profile.token_rate
+        time.sleep(self.profile.latency + prompt_s + eval_s)
+
+        direction = rng.choices(("long", "short", "neutral", "no_trade"), weights=(4, 3, 2, 1))[0]
+        filler = " ".join(rng.choice(FILLER) for _ in range(max(tokens - 20, 1)))
+        if request.get("format"):
+            response = json.dumps({
+                "direction": direction,
+                "confidence": round(rng.uniform(0.3, 0.9), 2),
+                "time_windows": [{"start_utc": "13:30", "end_utc": "15:00", "reason": "US data"}],
+                "evidence_ids": ["E1"],
+                "risks": ["Headline risk"],
+                "justification": filler,
+            })
+        else:
+            response = f"Direction: {direction.replace('_', ' ').title()}\nConfidence: Medium\n\n{filler}"
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": response,
+            "done": True,
+            "total_duration": int((load_s + self.profile.latency + prompt_s + eval_s) * 1e9),
+            "load_duration": int(load_s * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_s * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(eval_s * 1e9),
+        }
+
+    def _record(self, model: str, queued_s: float, load_s: float, result: Dict[str, Any]):
+        with self._lock:
+            self.requests.append({"model": model, "queued_s": queued_s, "load_s": load_s,
+                                  "eval_count": result["eval_count"]})
+
+
+class MockFeeds(StubServer):
+    """Serves /feed/<index>: a recorded feed if one exists for the index, otherwise a generated one."""
+
+    def __init__(self, feed_count: int, items_per_feed: int = 10, latency: float = 0.05,
+                 recordings: Optional[Dict[int, bytes]] = None, seed: int = 0):
+        super().__init__()
+        self.latency = latency
+        self.recordings = recordings or {}
+        self._feeds = {index: self._generate(index, items_per_feed, seed) for index in range(feed_count)}
+
+    @staticmethod
+    def load_recordings(directory: Path) -> Dict[int, bytes]:
+        """Feeds saved by the record-feeds command, by feed index."""
+        return {int(path.stem): path.read_bytes() for path in Path(directory).glob("*.xml") if path.stem.isdigit()}
+
+    def handle(self, method, path, query, body):
+        parts = path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "feed" or not parts[1].isdigit():
+            return 404, "text/plain", b"not found"
+        time.sleep(self.latency)
+        index = int(parts[1])
+        content = self.recordings.get(index, self._feeds.get(index))
+        if content is None:
+            return 404, "text/plain", b"not found"
+        return 200, "application/rss+xml", content
+
+    def _generate(self, index: int, items: int, seed: int) -> bytes:
+        rng = random.Random(f"{seed}:feed:{index}")
+        pairs = ["EUR/USD", "GBP/USD", "USD/JPY", "AUD/USD", "USD/CAD", "USD/CHF", "EUR/GBP"]
+        now = datetime.now(timezone.utc)
+        entries = []
+        for item in range(items):
+            title = rng.choice(HEADLINES).format(pair=rng.choice(pairs), event=rng.choice(EVENTS))
+            summary = " ".join(rng.choice(FILLER) for _ in range(15))
+            published = format_datetime(now - timedelta(minutes=rng.randint(1, 240)))
+            link = f"http://feeds.local/{index}/{item}"
+            entries.append(f"<item><title>{escape(title)} ({index}-{item})</title><link>{link}</link>"
+                           f"<guid>{link}</guid><pubDate>{published}</pubDate>"
+                           f"<description>{escape(summary)}</description></item>")
+        return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                f"<title>Feed {index}</title><link>http://feeds.local/{index}</link>"
+                f"<description>Benchmark feed</description>{''.join(entries)}</channel></rss>").encode("utf-8")
+
+
+class MockRates(StubServer):
+    """The exchangerate-api (/v6/latest/<base>) and Frankfurter (/latest?from=<base>) rate APIs."""
+
+    def __init__(self, latency: float = 0.05):
+        super().__init__()
+        self.latency = latency
+
+    def handle(self, method, path, query, body):
+        time.sleep(self.latency)
+        if path.startswith("/v6/latest/"):
+            base = path.rsplit("/", 1)[-1].upper()
+            return self.json_response({"result": "success", "base_code": base, "rates": self._rates(base),
+                                       "time_last_update_utc": format_datetime(datetime.now(timezone.utc))})
+        if path == "/latest":
+            base = query.get("from", ["EUR"])[0].upper()
+            rates = {currency: rate for currency, rate in self._rates(base).items() if currency != base}
+            return self.json_response({"base": base, "date": datetime.now().strftime("%Y-%m-%d"), "rates": rates})
+        return self.json_response({"error": "not found"}, 404)
+
+    @staticmethod
+    def _rates(base: str) -> Dict[str, float]:
+        # A little noise, so the price history moves between runs
+        base_rate = USD_RATES.get(base, 1.0)
+        return {currency: round(rate / base_rate * random.gauss(1.0, 0.0005), 6) for currency, rate in USD_RATES.items()}
+
+
+class MockDiscord(StubServer):
+    """A Discord webhook that accepts every message."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = 0
+
+    def handle(self, method, path, query, body):
+        self.messages += 1
+        return 204, "", b""
+
+
+@contextmanager
+def _settings(**overrides: Any) -> Iterator[None]:
+    """Temporarily override application settings."""
+    saved = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def _quiet(quiet: bool):
+    for name in WORKFLOW_MODULES:
+        importlib.import_module(name).console.quiet = quiet
+
+
+class Benchmark:
+    """
+    Runs SquawkWorkflow end to end in each scheduling mode against local stub servers.
+
+    Each mode starts with a fresh workflow, unloaded models and its own
+    working directory, so modes do not share caches, history or archives.
+    """
+
+    def __init__(self, profile: OllamaProfile, runs: int = 3, feed_latency: float = 0.05,
+                 rate_latency: float = 0.05, recordings: Optional[Dict[int, bytes]] = None, seed: int = 0):
+        self.profile = profile
+        self.runs = runs
+        self.seed = seed
+        self.ollama = MockOllama(profile, seed)
+        self.feeds = MockFeeds(len(RSSFeedAggregator().feeds), latency=feed_latency, recordings=recordings, seed=seed)
+        self.rates = MockRates(rate_latency)
+        self.discord = MockDiscord()
+
+    def run(self, modes: List[str]) -> Dict[str, Any]:
+        """
+        Benchmark the given scheduling modes.
+
+        Returns:
+            The profile and the results of each mode
+        """
+        servers = (self.ollama, self.feeds, self.rates, self.discord)
+        for server in servers:
+            server.start()
+        try:
+            results = {}
+            for mode in modes:
+                console.print(f"[cyan]Benchmarking {mode} ({self.runs} runs)...[/cyan]")
+                with tempfile.TemporaryDirectory(prefix=f"day-trader-bench-{mode}-") as work_dir:
+                    results[mode] = self._run_mode(mode, Path(work_dir))
+            return {"profile": asdict(self.profile), "runs": self.runs, "seed": self.seed, "modes": results}
+        finally:
+            for server in servers:
+                server.stop()
+
+    def _run_mode(self, mode: str, work_dir: Path) -> Dict[str, Any]:
+        self.ollama.reset()
+        overrides = {
+            "ollama_base_url": self.ollama.url,
+            "ollama_keep_alive": "10m",
+            "ollama_warmup": True,
+            "discord_webhook_url": f"{self.discord.url}/webhook",
+            "reports_archive_path": str(work_dir / "runs"),
+            "reports_retention_runs": 0,
+            "reports_retention_days": 0,
+            "history_enabled": True,
+            "history_db_path": str(work_dir / "history.db"),
+            "price_history_enabled": True,
+            "price_history_path": str(work_dir / "price_history"),
+            "market_data_cache_path": str(work_dir / "market_data_cache.json"),
+            "metrics_textfile": "",
+            "instruments": "",
+            "instrument_count": 1,
+            "run_deadline_cron": "",
+            "run_deadline_minutes": 0,
+            **SCHEDULING_MODES[mode],
+        }
+        with _settings(**overrides):
+            workflow = self._build_workflow(work_dir)
+            run_times: List[float] = []
+
+            async def run_all():
+                try:
+                    for _ in range(self.runs):
+                        started = time.perf_counter()
+                        await workflow.run_async()
+                        run_times.append(time.perf_counter() - started)
+                finally:
+                    await workflow.aclose()
+
+            try:
+                asyncio.run(run_all())
+            finally:
+                workflow.close()
+
+        metrics = [json.loads(path.read_text(encoding="utf-8")) for path in sorted((work_dir / "runs").glob("metrics_*.json"))]
+        return self._summarize(run_times, metrics)
+
+    def _build_workflow(self, work_dir: Path) -> SquawkWorkflow:
+        workflow = SquawkWorkflow()
+        # Feeds keep their real domain, so per-domain limits apply as in production
+        for index, feed in enumerate(workflow.rss_aggregator.feeds):
+            feed.url = f"{self.feeds.url}/feed/{index}"
+        fetcher = workflow.ai_pipeline.market_data_fetcher
+        fetcher.EXCHANGERATE_API_URL = f"{self.rates.url}/v6/latest/{{base}}"
+        fetcher.FRANKFURTER_URL = f"{self.rates.url}/latest?from={{base}}"
+        return workflow
+
+    def _summarize(self, run_times: List[float], metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+        calls = [call for run in metrics for call in run["calls"]]
+        elapsed = sum(run_times) or 1.0
+        stages: Dict[str, List[float]] = {}
+        for run in metrics:
+            for name, span in run["spans"].items():
+                stages.setdefault(name, []).append(span["duration_s"])
+        queued = [request["queued_s"] for request in self.ollama.requests]
+        return {
+            "completed": len(metrics),
+            "failed": self.runs - len(metrics),
+            "run_s": {"p50": percentile(run_times, 50), "p95": percentile(run_times, 95),
+                      "max": round(max(run_times), 3) if run_times else None},
+            "call_s": {f"p{pct}": percentile([call["wall_s"] for call in calls if not call["error"]], pct)
+                       for pct in (50, 90, 95, 99)},
+            "queue_s": {f"p{pct}": percentile(queued, pct) for pct in (50, 95)},
+            "calls": len(calls),
+            "call_errors": sum(call["error"] for call in calls),
+            "model_loads": self.ollama.loads,
+            "calls_per_s": round(len(calls) / elapsed, 3),
+            "eval_tokens_per_s": round(sum(call.get("eval_count", 0) for call in calls) / elapsed, 1),
+            "runs_per_hour": round(len(metrics) * 3600 / elapsed, 1),
+            "stage_s": {name: round(sum(values) / len(values), 3) for name, values in stages.items()},
+        }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare benchmark results with a saved baseline.
+
+    Args:
+        results: Output of Benchmark.run
+        baseline: Earlier output of Benchmark.run
+        tolerance: Allowed relative change for the worse (0.2 = 20%)
+
+    Returns:
+        A description of every regression beyond the tolerance
+    """
+    regressions = []
+    for mode, result in results["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if previous is None:
+            continue
+        if result["failed"] > previous.get("failed", 0) or result["call_errors"] > previous.get("call_errors", 0):
+            regressions.append(f"{mode}: more failed runs or calls than the baseline")
+        for key, statistic, higher_is_worse in REGRESSION_CHECKS:
+            current, before = result[key], previous.get(key)
+            if statistic is not None:
+                current, before = current.get(statistic), (before or {}).get(statistic)
+            if not current or not before:
+                continue
+            change = (current - before) / before
+            if (change if higher_is_worse else -change) > tolerance:
+                label = f"{key} {statistic}" if statistic else key
+                regressions.append(f"{mode}: {label} {before:g} -> {current:g} ({change:+.0%})")
+    return regressions
+
+
+def check_results(results: Dict[str, Any]) -> List[str]:
+    """
+    Self-check of benchmark results: against the stub servers every run and call should succeed.
+
+    Returns:
+        A description of every mode with failed runs or calls
+    """
+    return [
+        f"{mode}: {result['failed']} failed runs, {result['call_errors']} failed calls"
+        for mode, result in results["modes"].items() if result["failed"] or result["call_errors"]
+    ]
+
+
+def print_results(results: Dict[str, Any]):
+    """Print a table of the results of each mode."""
+    table = Table(title="Benchmark results (seconds unless noted)")
+    for column in ("Mode", "Runs", "Run p50", "Run p95", "Call p50", "Call p95", "Loads", "Calls/s", "Tok/s", "Errors"):
+        table.add_column(column, justify="left" if column == "Mode" else "right")
+
+    def cell(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:g}"
+
+    for mode, result in results["modes"].items():
+        table.add_row(
+            mode, f"{result['completed']}/{result['completed'] + result['failed']}",
+            cell(result["run_s"]["p50"]), cell(result["run_s"]["p95"]),
+            cell(result["call_s"]["p50"]), cell(result["call_s"]["p95"]), str(result["model_loads"]),
+            cell(result["calls_per_s"]), cell(result["eval_tokens_per_s"]), str(result["call_errors"])
+        )
+    console.print(table)
+    for mode, result in results["modes"].items():
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["stage_s"].items())
+        console.print(f"[dim]{mode}: call p99 {cell(result['call_s']['p99'])}s, "
+                      f"Ollama queue p95 {cell(result['queue_s']['p95'])}s; stages (mean): {stages}[/dim]")
+
+
+async def record_feeds(destination: Path) -> int:
+    """Save the current content of every configured feed as <index>.xml for replay; returns the count saved."""
+    destination.mkdir(parents=True, exist_ok=True)
+    feeds = RSSFeedAggregator().feeds
+    saved = 0
+    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
+        for index, feed in enumerate(feeds):
+            try:
+                response = await client.get(feed.url, headers=FEED_HEADERS)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                console.print(f"[yellow]Skipped {feed.name}: {str(e)}[/yellow]")
+                continue
+            (destination / f"{index:02d}.xml").write_bytes(response.content)
+            saved += 1
+    return saved
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Benchmark the workflow against local stub servers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the benchmark")
+    run_parser.add_argument("--modes", default=",".join(SCHEDULING_MODES),
+                            help=f"Comma-separated scheduling modes ({', '.join(SCHEDULING_MODES)})")
+    run_parser.add_argument("--runs", type=int, default=3, help="Workflow runs per mode")
+    defaults = OllamaProfile()
+    for name in asdict(defaults):
+        run_parser.add_argument(f"--{name.replace('_', '-')}", type=type(getattr(defaults, name)),
+                                default=getattr(defaults, name), help=f"Mock Ollama {name.replace('_', ' ')}")
+    run_parser.add_argument("--feed-latency", type=float, default=0.05, help="Seconds to serve a feed")
+    run_parser.add_argument("--rate-latency", type=float, default=0.05, help="Seconds to serve a rate table")
+    run_parser.add_argument("--feeds-dir", help="Recorded feeds to serve (see record-feeds)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--save", help="Write the results as JSON to this file")
+    run_parser.add_argument("--baseline", help="Fail on regressions against results saved with --save")
+    run_parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed relative change for the worse against the baseline")
+    run_parser.add_argument("--verbose", action="store_true", help="Show the workflow's own output")
+    record_parser = subparsers.add_parser("record-feeds", help="Save the live feeds for replay")
+    record_parser.add_argument("dest")
+    args = parser.parse_args()
+
+    if args.command == "record-feeds":
+        console.print(f"[green]✓[/green] Recorded {asyncio.run(record_feeds(Path(args.dest)))} feeds to {args.dest}")
+        sys.exit(0)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in SCHEDULING_MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    _quiet(not args.verbose)
+    profile = OllamaProfile(**{name: getattr(args, name) for name in asdict(defaults)})
+    benchmark = Benchmark(profile, runs=args.runs, feed_latency=args.feed_latency, rate_latency=args.rate_latency,
+                          recordings=MockFeeds.load_recordings(Path(args.feeds_dir)) if args.feeds_dir else None,
+                          seed=args.seed)
+    results = benchmark.run(modes)
+    print_results(results)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        console.print(f"[dim]Results saved to {args.save}[/dim]")
+    problems = check_results(results)
+    for problem in problems:
+        console.print(f"[red]✗ Self-check failed: {problem} against the stub servers[/red]")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("profile") != results["profile"] or baseline.get("runs") != results["runs"]:
+            console.print("[yellow]Warning: the baseline was recorded with different settings[/yellow]")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            console.print(f"[red]✗ Regression: {regression}[/red]")
+        if regressions:
+            sys.exit(1)
+        console.print(f"[green]✓[/green] No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    if problems:
+        sys.exit(1)
@@ -1,3 +1,4 @@
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings
 from typing import Optional, List
 
@@ -7,6 +8,9 @@ class Settings(BaseSettings):
     
     # Ollama Configuration
     ollama_base_url: str = "http://localhost:11434"
+    ollama_keep_alive: str = "10m"  # How long models stay loaded after a request ("0" unloads immediately)
+    # Preload models while feeds are fetched and earlier tiers run ("model_" names are reserved by pydantic)
+    ollama_warmup: bool = Field(True, validation_alias=AliasChoices("ollama_warmup", "MODEL_WARMUP"))
     
     # AI Models Configuration (comma-separated list)
     ai_models: str = "deepseek-r1:8b,gpt-oss:20b,gpt-oss:20b,gpt-oss:20b,llama3:70b,mistral:latest"
@@ -25,6 +29,57 @@ class Settings(BaseSettings):
     # Workflow Configuration
     run_once: bool = True
     schedule_interval_hours: int = 1
+    # Cron entries with optional time zone, separated by ';' (overrides the interval), e.g.
+    # "0 7 * * 1-5 Europe/London; 30 13 * * 1-5 America/New_York"
+    schedule_cron: str = ""
+    schedule_overlap: str = "skip"  # Trigger during a run: "skip" it or "queue" one follow-up run
+    schedule_run_at_start: bool = True
+    shutdown_timeout_seconds: float = 300  # How long a run in progress may finish on shutdown
+    
+    # Watch Mode (daemon only): poll core feeds and run as soon as a high-impact headline appears
+    watch_enabled: bool = False
+    watch_only: bool = False  # Run only on triggering headlines, not on the schedule
+    watch_feeds: str = ""  # Comma-separated feed names (empty = built-in squawk and data feeds)
+    watch_poll_seconds: float = 60
+    watch_debounce_seconds: float = 45  # Wait for follow-up headlines before triggering
+    watch_cooldown_seconds: float = 900  # Minimum time between two triggered runs
+    watch_preempt: bool = True  # A triggered run cancels a scheduled run in progress
+    
+    # Run Deadline: the next time of these cron entries (same syntax as schedule_cron) and/or a
+    # budget in minutes from the start of each run; the earlier one applies (empty/0 = none)
+    run_deadline_cron: str = ""
+    run_deadline_minutes: float = 0
+    
+    # Report Archive (relative paths are project-relative) and its retention (0 = no limit)
+    reports_archive_path: str = "reports/runs"
+    reports_retention_runs: int = 200
+    reports_retention_days: float = 30
+    
+    # Run History (SQLite database with full-text search over past runs)
+    history_enabled: bool = True
+    history_db_path: str = "reports/history.db"
+    
+    # Instruments: comma-separated pairs to analyze in every run (empty = rank pairs from the news)
+    instruments: str = ""
+    instrument_count: int = 1  # How many top-ranked pairs to analyze when instruments is empty
+    
+    # Market Data (refreshed before use when older than this many seconds)
+    market_data_max_age_seconds: float = 120
+    # Last good snapshot kept on disk and served while refreshing; never served past the hard limit
+    market_data_cache_path: str = "reports/market_data_cache.json"
+    market_data_max_stale_seconds: float = 3600
+    
+    # Price History (every fetch is sampled per pair for technical indicators in analyst prompts)
+    price_history_enabled: bool = True
+    price_history_path: str = "reports/price_history"
+    price_history_capacity: int = 4096  # Samples kept per pair
+    
+    # Telemetry: every run's timings are archived as reports/runs/metrics_<run_id>.json; the last
+    # run's are also written here in Prometheus text format for node_exporter's textfile collector
+    metrics_textfile: str = "reports/metrics/day_trader.prom"  # empty = disabled
+    
+    # Profiling (run with --profile): event-loop stalls at least this long are reported with their call site
+    profile_lag_threshold_ms: float = 100
     
     # Logging
     log_level: str = "INFO"
@@ -0,0 +1,267 @@
+"""Structured junior analyst output and numeric consensus computed in Python."""
+import json
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+DIRECTIONS = ("long", "short", "neutral", "no_trade")
+CONFIDENCE_LEVELS = {"low": 0.25, "medium": 0.5, "high": 0.8}
+
+# Free-text direction cues, e.g. "Direction: Short" or "**Direction:** SELL"
+_DIRECTION_PATTERN = re.compile(
+    r'\bdirection\b[^a-z\n]{0,8}(long|short|buy|sell|neutral|wait|watch|no[ _-]?trade)\b(?!\s*/)', re.IGNORECASE
+)
+_NO_TRADE_PATTERN = re.compile(r'\bno[ _-]?trade\b', re.IGNORECASE)
+# Free-text confidence cues, e.g. "Confidence: High", "Confidence level - 7/10" or "confidence: 70%"
+_CONFIDENCE_PATTERN = re.compile(
+    r'\bconfidence\b(?:\s*level)?[^a-z0-9\n]{0,8}(high|medium|moderate|low|\d{1,3}(?:\.\d+)?(?:\s*%|\s*/\s*10\b)?)',
+    re.IGNORECASE
+)
+_DIRECTION_ALIASES = {"buy": "long", "sell": "short", "wait": "neutral", "watch": "neutral"}
+
+# JSON schema passed to Ollama's "format" option for structured analyst reports
+JUNIOR_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "direction": {"type": "string", "enum": list(DIRECTIONS)},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        "time_windows": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "start_utc": {"type": "string"},
+                    "end_utc": {"type": "string"},
+                    "reason": {"type": "string"}
+                },
+                "required": ["start_utc", "end_utc"]
+            }
+        },
+        "evidence_ids": {"type": "array", "items": {"type": "string"}},
+        "risks": {"type": "array", "items": {"type": "string"}},
+        "justification": {"type": "string"}
+    },
+    "required": ["direction", "confidence", "time_windows", "evidence_ids", "justification"]
+}
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+
+OUTPUT FORMAT: Respond ONLY with a JSON object with these fields:
+- "direction": one of "long", "short", "neutral", "no_trade" for the instrument under review
+- "confidence": number from 0 to 1 (Low ≈ 0.25, Medium ≈ 0.5, High ≈ 0.8)
+- "time_windows": list of {"start_utc": "HH:MM", "end_utc": "HH:MM", "reason": "..."} trade or avoid windows
+- "evidence_ids": IDs of the news events (e.g. "E3") or article links supporting your view
+- "risks": up to 3 short risk factors
+- "justification": at most 2 sentences of evidence-based reasoning"""
+
+# Appended to free-text prompts whose answer is checked before it is accepted (cascades)
+VERDICT_INSTRUCTIONS = """
+
+End your report with these two lines:
+Direction: long, short, neutral or no trade (for the instrument under review)
+Confidence: your confidence in that direction as a percentage from 0 to 100%"""
+
+
+def parse_structured_report(output: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse and normalise a structured analyst report.
+
+    Returns None if the output is not a JSON object with a valid direction
+    and confidence. Reasoning blocks before the JSON are ignored.
+    """
+    start = output.find('{', output.find('</think>') + 1)
+    end = output.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        report = json.loads(output[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(report, dict):
+        return None
+
+    direction = str(report.get('direction', '')).strip().lower().replace(' ', '_').replace('-', '_')
+    if direction not in DIRECTIONS:
+        return None
+
+    confidence = report.get('confidence')
+    if isinstance(confidence, str):
+        confidence = CONFIDENCE_LEVELS.get(confidence.strip().lower())
+    if not isinstance(confidence, (int, float)):
+        return None
+
+    return {
+        'direction': direction,
+        'confidence': min(max(float(confidence), 0.0), 1.0),
+        'time_windows': [w for w in report.get('time_windows') or [] if isinstance(w, dict)],
+        'evidence_ids': [str(e) for e in report.get('evidence_ids') or []],
+        'risks': [str(r) for r in report.get('risks') or []][:3],
+        'justification': str(report.get('justification', '')).strip(),
+    }
+
+
+def extract_direction(output: str) -> Optional[str]:
+    """
+    Determine the trade direction a report recommends.
+
+    Structured reports are parsed; free-text reports are scanned for an explicit
+    "Direction:" line, then a "no trade" call. Returns None when unclear.
+    """
+    parsed = parse_structured_report(output)
+    if parsed:
+        return parsed['direction']
+
+    match = _DIRECTION_PATTERN.search(output)
+    if match:
+        direction = match.group(1).lower().replace(' ', '_').replace('-', '_')
+        direction = 'no_trade' if direction.startswith('no') else direction
+        return _DIRECTION_ALIASES.get(direction, direction)
+    if _NO_TRADE_PATTERN.search(output):
+        return 'no_trade'
+    return None
+
+
+def score_confidence(output: str) -> Optional[float]:
+    """
+    Determine the confidence (0 to 1) a report states.
+
+    Structured reports are parsed; free-text reports are scanned for a
+    "Confidence:" cue given as a level, a percentage or a score out of 10.
+    Returns None when no confidence is stated.
+    """
+    parsed = parse_structured_report(output)
+    if parsed:
+        return parsed['confidence']
+
+    match = _CONFIDENCE_PATTERN.search(output)
+    if not match:
+        return None
+    value = match.group(1).lower()
+    if value == 'moderate':
+        value = 'medium'
+    if value in CONFIDENCE_LEVELS:
+        return CONFIDENCE_LEVELS[value]
+    number = float(re.match(r'[\d.]+', value).group())
+    if '%' in value:
+        number /= 100
+    elif '/' in value:
+        number /= 10
+    elif number > 1:
+        number /= 100 if number > 10 else 10
+    return min(max(number, 0.0), 1.0)
+
+
+def measure_agreement(outputs: List[str]) -> Dict[str, Any]:
+    """
+    Measure how strongly a stage's reports agree, structured or free text.
+
+    Every report counts towards the agreement ratio, so reports without a clear
+    direction weaken it. Leading reports that state no confidence count as medium.
+
+    Args:
+        outputs: The reports of one stage
+
+    Returns:
+        Dictionary with the vote counts, the leading direction, the share of all
+        reports voting for it and the mean confidence of those reports
+    """
+    votes: Counter = Counter()
+    confidences: Dict[str, List[float]] = {direction: [] for direction in DIRECTIONS}
+    for output in outputs:
+        direction = extract_direction(output)
+        if direction not in DIRECTIONS:
+            continue
+        votes[direction] += 1
+        confidence = score_confidence(output)
+        confidences[direction].append(CONFIDENCE_LEVELS['medium'] if confidence is None else confidence)
+
+    leader = max(DIRECTIONS, key=lambda d: (votes[d], sum(confidences[d]))) if votes else None
+    return {
+        'reports': len(outputs),
+        'votes': {direction: votes.get(direction, 0) for direction in DIRECTIONS},
+        'leading_direction': leader,
+        'agreement': round(votes[leader] / len(outputs), 3) if leader else 0.0,
+        'leading_mean_confidence': round(
+            sum(confidences[leader]) / len(confidences[leader]), 3
+        ) if leader else 0.0,
+    }
+
+
+def compute_consensus(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute the vote distribution and confidence-weighted consensus of parsed reports.
+
+    Args:
+        reports: Reports with a 'parsed' structured report (or None)
+
+    Returns:
+        Dictionary with vote counts, weighted scores, the leading direction and
+        its agreement ratio, the most cited evidence and the common time windows
+    """
+    parsed = [r for r in reports if r.get('parsed')]
+    votes = Counter(r['parsed']['direction'] for r in parsed)
+    weighted = {direction: 0.0 for direction in DIRECTIONS}
+    for report in parsed:
+        weighted[report['parsed']['direction']] += report['parsed']['confidence']
+
+    total_weight = sum(weighted.values())
+    leader = max(DIRECTIONS, key=lambda d: (weighted[d], votes[d])) if parsed else None
+    leader_reports = [r['parsed'] for r in parsed if r['parsed']['direction'] == leader]
+
+    evidence = Counter(e for r in parsed for e in set(r['parsed']['evidence_ids']))
+    windows = Counter(
+        f"{w.get('start_utc', '?')}-{w.get('end_utc', '?')}"
+        for r in parsed for w in r['parsed']['time_windows']
+    )
+
+    return {
+        'analysts_total': len(reports),
+        'analysts_structured': len(parsed),
+        'votes': {direction: votes.get(direction, 0) for direction in DIRECTIONS},
+        'weighted_votes': {direction: round(score, 3) for direction, score in weighted.items()},
+        'leading_direction': leader,
+        'agreement': round(weighted[leader] / total_weight, 3) if leader and total_weight else 0.0,
+        'leading_mean_confidence': round(
+            sum(r['confidence'] for r in leader_reports) / len(leader_reports), 3
+        ) if leader_reports else 0.0,
+        'mean_confidence': round(total_weight / len(parsed), 3) if parsed else 0.0,
+        'top_evidence': [{'id': e, 'citations': n} for e, n in evidence.most_common(10)],
+        'common_time_windows': [{'window_utc': w, 'analysts': n} for w, n in windows.most_common(5)],
+    }
+
+
+def build_consensus_input(reports: List[Dict[str, Any]], excerpt_chars: int = 400) -> Dict[str, Any]:
+    """
+    Build the compact payload managers receive instead of the full junior reports.
+
+    Args:
+        reports: Reports with 'name', 'role', 'output' and 'parsed' keys
+        excerpt_chars: Length of the excerpt kept for reports that could not be parsed
+
+    Returns:
+        Dictionary with the numeric consensus and one short entry per analyst
+    """
+    analysts = []
+    for report in reports:
+        parsed = report.get('parsed')
+        if parsed:
+            analysts.append({
+                'analyst': report['name'],
+                'role': report['role'],
+                'direction': parsed['direction'],
+                'confidence': parsed['confidence'],
+                'time_windows': parsed['time_windows'],
+                'evidence_ids': parsed['evidence_ids'],
+                'justification': parsed['justification'],
+            })
+        else:
+            analysts.append({
+                'analyst': report['name'],
+                'role': report['role'],
+                'unstructured_excerpt': report['output'][:excerpt_chars],
+            })
+
+    return {
+        'consensus': compute_consensus(reports),
+        'analysts': analysts,
+    }
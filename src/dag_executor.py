@@ -0,0 +1,126 @@
+"""Async DAG executor used to run analyst team topologies on a single event loop."""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class DagNode:
+    """A single unit of work in the pipeline graph.
+
+    The action receives a dict of ``{dependency_name: result}`` for every
+    dependency that completed successfully.
+    """
+    name: str
+    group: str
+    action: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: List[str] = field(default_factory=list)
+
+
+def topological_levels(dependencies: Dict[str, List[str]]) -> Dict[str, int]:
+    """
+    Compute the depth of every vertex in a dependency graph.
+
+    Args:
+        dependencies: Mapping of vertex name to the names it depends on
+
+    Returns:
+        Mapping of vertex name to its level (0 for vertices without dependencies)
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph contains a cycle
+    """
+    for name, deps in dependencies.items():
+        for dep in deps:
+            if dep not in dependencies:
+                raise ValueError(f"'{name}' depends on unknown node '{dep}'")
+
+    levels: Dict[str, int] = {}
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps.issubset(levels)]
+        if not ready:
+            raise ValueError(f"Dependency cycle detected between: {', '.join(sorted(remaining))}")
+        for name in ready:
+            deps = remaining.pop(name)
+            levels[name] = max((levels[dep] + 1 for dep in deps), default=0)
+    return levels
+
+
+class DagExecutor:
+    """Runs DagNodes respecting dependencies, per-group and global concurrency limits."""
+
+    def __init__(self, group_limits: Optional[Dict[str, int]] = None,
+                 max_concurrency: Optional[int] = None,
+                 on_complete: Optional[Callable[[DagNode, Any], None]] = None):
+        """
+        Initialize the executor.
+
+        Args:
+            group_limits: Maximum simultaneous nodes per group (missing groups are unbounded)
+            max_concurrency: Maximum simultaneous nodes overall; 1 gives sequential execution
+            on_complete: Callback invoked with each node and its result (or exception)
+        """
+        self.group_limits = group_limits or {}
+        self.max_concurrency = max_concurrency
+        self.on_complete = on_complete
+
+    async def run(self, nodes: List[DagNode]) -> Dict[str, Any]:
+        """
+        Execute all nodes and return a mapping of node name to result.
+
+        Failed nodes map to the raised exception; their dependents still run
+        with the remaining successful inputs.
+        """
+        by_name = {node.name: node for node in nodes}
+        if len(by_name) != len(nodes):
+            raise ValueError("DAG node names must be unique")
+        topological_levels({node.name: node.depends_on for node in nodes})
+
+        group_semaphores = {
+            group: asyncio.Semaphore(limit)
+            for group, limit in self.group_limits.items() if limit and limit > 0
+        }
+        global_semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        futures: Dict[str, asyncio.Future] = {
+            node.name: asyncio.get_running_loop().create_future() for node in nodes
+        }
+        results: Dict[str, Any] = {}
+
+        async def execute(node: DagNode):
+            upstream = {}
+            for dep in node.depends_on:
+                dep_result = await futures[dep]
+                if not isinstance(dep_result, BaseException):
+                    upstream[dep] = dep_result
+
+            try:
+                async with _optional(group_semaphores.get(node.group)):
+                    async with _optional(global_semaphore):
+                        result = await node.action(upstream)
+            except Exception as e:
+                result = e
+
+            results[node.name] = result
+            futures[node.name].set_result(result)
+            if self.on_complete:
+                self.on_complete(node, result)
+
+        # Tasks are created in node order so semaphore waiters are served in config order
+        await asyncio.gather(*(execute(node) for node in nodes))
+        return {node.name: results[node.name] for node in nodes}
+
+
+class _optional:
+    """Async context manager that is a no-op when no semaphore is given."""
+
+    def __init__(self, semaphore: Optional[asyncio.Semaphore]):
+        self.semaphore = semaphore
+
+    async def __aenter__(self):
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.semaphore is not None:
+            self.semaphore.release()
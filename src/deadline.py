@@ -0,0 +1,192 @@
+"""Run deadlines: call durations estimated from past runs, and priority-based shedding to meet them."""
+import heapq
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_CALL_SECONDS = 90.0  # Estimate for a call without any recorded history
+DEFAULT_REPORT_TOKENS = 800  # Typical report length when none has been recorded
+MIN_REPORT_TOKENS = 150  # A shorter report is not worth generating: the call is dropped instead
+
+
+class ShedError(Exception):
+    """Raised instead of running (or finishing) an analyst that was dropped to meet the deadline."""
+
+
+@dataclass
+class CallEstimate:
+    """Expected duration and output length of one model call."""
+    seconds: float
+    tokens: int
+
+
+class LatencyStats:
+    """
+    Recent call durations and report lengths per analyst and model.
+
+    Estimates use a high quantile of the recent durations, so most calls finish
+    within them; analysts without history fall back to other analysts on the
+    same model, then to every recorded call.
+    """
+
+    def __init__(self, window: int = 20, quantile: float = 0.8, default_seconds: float = DEFAULT_CALL_SECONDS):
+        self.window = window
+        self.quantile = quantile
+        self.default_seconds = default_seconds
+        self._calls: Dict[Tuple[str, str], Deque[Tuple[float, int]]] = {}
+
+    def record(self, name: str, model: str, seconds: float, tokens: int):
+        """Record one completed call."""
+        if seconds > 0:
+            self._calls.setdefault((name, model), deque(maxlen=self.window)).append((seconds, tokens))
+
+    def load(self, samples: Iterable[Dict[str, Any]]):
+        """Record past calls (dicts with name, model, duration_s and tokens), oldest first."""
+        for sample in samples:
+            self.record(sample["name"], sample["model"], sample["duration_s"], sample["tokens"])
+
+    def estimate(self, name: str, model: str) -> CallEstimate:
+        samples = list(self._calls.get((name, model), ()))
+        if not samples:
+            samples = [call for (_, call_model), calls in self._calls.items() if call_model == model for call in calls]
+        if not samples:
+            samples = [call for calls in self._calls.values() for call in calls]
+        if not samples:
+            return CallEstimate(self.default_seconds, DEFAULT_REPORT_TOKENS)
+        durations = sorted(seconds for seconds, _ in samples)
+        seconds = durations[min(int(len(durations) * self.quantile), len(durations) - 1)]
+        return CallEstimate(seconds, int(statistics.median(tokens for _, tokens in samples)) or DEFAULT_REPORT_TOKENS)
+
+
+@dataclass
+class DeadlineCall:
+    """One model call of a run, as the deadline planner sees it."""
+    name: str
+    stage: str
+    priority: int
+    estimate: CallEstimate
+    protected: bool = False  # Never dropped, only shortened
+
+
+@dataclass
+class RunDeadline:
+    """
+    Fits one analysis run into a deadline.
+
+    Before the run, the lowest-priority calls are dropped until the estimated
+    run time fits. As each call starts, it gets the time left minus a reserve
+    for the protected calls of the later stages; with less time than its
+    estimate it is shortened (a lower output token limit), and with too little
+    for a useful report it is dropped unless protected.
+    """
+    deadline: float  # time.monotonic() value
+    calls: Dict[str, DeadlineCall]
+    reserves: Dict[str, float]  # seconds kept free for later stages, per stage
+    dropped: Dict[str, str] = field(default_factory=dict)  # call name -> reason
+    shortened: Dict[str, int] = field(default_factory=dict)  # call name -> output token limit
+
+    @classmethod
+    def plan(cls, deadline: float, calls: List[DeadlineCall], stage_levels: Dict[str, int],
+             stage_concurrency: Dict[str, Optional[int]], concurrent: bool) -> 'RunDeadline':
+        """
+        Drop the lowest-priority unprotected calls until the estimated run time fits the deadline.
+
+        Args:
+            deadline: time.monotonic() value by which the run must finish
+            calls: Every call of the run, in dispatch order
+            stage_levels: Topological level of each stage
+            stage_concurrency: Concurrency limit of each stage (None = unbounded)
+            concurrent: False if calls run one at a time
+
+        Returns:
+            The deadline with the planned drops and the per-stage reserves
+        """
+        def duration(selected: List[DeadlineCall], after_level: int = -1) -> float:
+            """Estimated time of the selected calls, stage by stage, from the level after after_level."""
+            total = 0.0
+            for level in sorted(set(stage_levels.values())):
+                if level <= after_level:
+                    continue
+                stage_times = []
+                for stage, stage_level in stage_levels.items():
+                    estimates = [call.estimate.seconds for call in selected if call.stage == stage]
+                    if stage_level != level or not estimates:
+                        continue
+                    # Calls start in dispatch order on the first free slot, as in the DAG executor
+                    width = min(len(estimates), stage_concurrency.get(stage) or len(estimates)) if concurrent else 1
+                    slots = [0.0] * width
+                    for seconds in estimates:
+                        heapq.heapreplace(slots, slots[0] + seconds)
+                    stage_times.append(max(slots))
+                total += (max(stage_times) if concurrent else sum(stage_times)) if stage_times else 0.0
+            return total
+
+        protected = [call for call in calls if call.protected]
+        reserves = {stage: duration(protected, level) for stage, level in stage_levels.items()}
+        run_deadline = cls(deadline, {call.name: call for call in calls}, reserves)
+
+        available = deadline - time.monotonic()
+        # Lowest priority first; among equals, the last in configuration order
+        candidates = sorted((call for call in calls if not call.protected),
+                            key=lambda call: (call.priority, -calls.index(call)))
+        dropped: List[DeadlineCall] = []
+        for call in candidates:
+            if duration([c for c in calls if c not in dropped]) <= available:
+                break
+            dropped.append(call)
+        # Put back, most important first, the drops that turned out not to be needed
+        # (e.g. one of several committees running side by side, or a call in a partly filled wave)
+        for call in reversed(dropped[:]):
+            if duration([c for c in calls if c is call or c not in dropped]) <= available:
+                dropped.remove(call)
+        for call in dropped:
+            run_deadline.dropped[call.name] = "dropped from the plan to meet the deadline"
+        return run_deadline
+
+    @property
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def admit(self, name: str) -> Optional[int]:
+        """
+        Decide how a call that is about to start runs.
+
+        Returns:
+            The output token limit for a shortened call, or None to run it in full
+
+        Raises:
+            ShedError: If the call was dropped
+        """
+        if name in self.dropped:
+            raise ShedError(self.dropped[name])
+        call = self.calls[name]
+        available = self.remaining - self.reserves[call.stage]
+        if available >= call.estimate.seconds:
+            return None
+
+        tokens = int(call.estimate.tokens * max(available, 0.0) / call.estimate.seconds)
+        if tokens < MIN_REPORT_TOKENS:
+            if not call.protected:
+                self.dropped[name] = f"only {max(available, 0.0):.0f}s left before the deadline"
+                raise ShedError(self.dropped[name])
+            tokens = MIN_REPORT_TOKENS
+        self.shortened[name] = tokens
+        return tokens
+
+    def timeout(self, name: str) -> Optional[float]:
+        """Seconds an unprotected call may take before it eats into the later stages' reserve."""
+        call = self.calls[name]
+        if call.protected:
+            return None
+        return max(self.remaining - self.reserves[call.stage], 1.0)
+
+    def summary(self) -> Dict[str, Any]:
+        """Outcome of the run against its deadline, for the archive."""
+        return {
+            "slack_s": round(self.remaining, 1),
+            "met": self.remaining >= 0,
+            "dropped": dict(self.dropped),
+            "shortened": dict(self.shortened),
+        }
@@ -1,52 +1,232 @@
 """Discord integration module for sending analysis results."""
+import asyncio
+import random
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
 import httpx
 from rich.console import Console
 
 console = Console()
 
+MESSAGE_LIMIT = 2000  # Discord's maximum message length
+SEPARATOR = "\n" + "=" * 50
+
+# Split points, coarsest first: the start of a header block (a rule line, a title and
+# the same rule again), a blank line, a line break
+_BOUNDARIES = [
+    re.compile(r'(?<=\n)(?=(([═─=])\2{19,})\n[^\n]+\n\1\n)'),
+    re.compile(r'(?<=\n\n)(?!\n)'),
+    re.compile(r'(?<=\n)'),
+]
+
+
+def _pieces(text: str, boundary: re.Pattern) -> List[str]:
+    starts = [0] + [m.start() for m in boundary.finditer(text) if m.start()]
+    return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+
+def _split(text: str, limit: int, level: int = 0) -> List[str]:
+    if len(text) <= limit:
+        return [text]
+    if level == len(_BOUNDARIES):
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+    chunks: List[str] = []
+    for piece in _pieces(text, _BOUNDARIES[level]):
+        for part in _split(piece, limit, level + 1):
+            if chunks and len(chunks[-1]) + len(part) <= limit:
+                chunks[-1] += part
+            else:
+                chunks.append(part)
+    return chunks
+
+
+def split_message(content: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Split content into Discord messages of at most limit characters.
+
+    Sections (a title between two rule lines) stay together where they fit;
+    longer ones are split at blank lines, then line breaks, and only cut
+    mid-line as a last resort. Multi-part messages are numbered and the last
+    part ends with the separator line.
+    """
+    label_room = len("\n(99/99)")
+    chunks = [chunk.strip("\n") for chunk in _split(content, limit - len(SEPARATOR) - label_room)]
+    chunks = [chunk for chunk in chunks if chunk.strip()] or [""]
+    if len(chunks) > 1:
+        chunks = [f"{chunk}\n({i}/{len(chunks)})" for i, chunk in enumerate(chunks, 1)]
+    chunks[-1] += SEPARATOR
+    return chunks
+
 
 class DiscordSender:
-    """Handles sending messages to Discord via webhook."""
-    
-    def __init__(self, webhook_url: str):
+    """
+    Handles sending messages to Discord via webhook.
+
+    send_message() only queues a message: a background thread with its own event
+    loop splits it into parts and posts them in order, waiting out Discord's
+    rate-limit buckets and retrying failures with backoff, so a slow or
+    rate-limited webhook never holds up the workflow.
+    """
+
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 1.0  # seconds; doubled on every retry
+    BACKOFF_MAX = 30.0
+
+    def __init__(self, webhook_url: str, timeout: float = 30.0):
         self.webhook_url = webhook_url
-        self.client = httpx.Client(timeout=30.0)
-    
+        self.timeout = timeout
+        # Latest rate-limit state reported for the webhook's bucket (reset_at is monotonic)
+        self.rate_limit: Dict[str, Any] = {}
+        self._global_reset_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+
     def send_message(self, content: str) -> bool:
-        """Send a message to Discord."""
+        """Queue a message for delivery to Discord; returns False if no webhook is configured."""
         if not self.webhook_url:
             console.print("[yellow]Warning: No Discord webhook URL configured. Skipping Discord notification.[/yellow]")
             console.print("\n[bold]Analysis Result:[/bold]")
             console.print(f"{content}\n")
             return False
-        
+
+        self._start()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, content)
+        console.print("[dim]Message queued for Discord delivery[/dim]")
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued message has been delivered or given up on."""
+        if self._thread is None:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop)
         try:
-            # Add separator line at the end for clarity
-            separator = "\n" + "="*50
-            content_with_separator = content + separator
-            
-            # Discord has a 2000 character limit
-            if len(content_with_separator) > 2000:
-                console.print("[yellow]Warning: Message exceeds Discord's 2000 character limit. Truncating...[/yellow]")
-                # Ensure we keep the separator even when truncating
-                content_with_separator = content[:1947] + "..." + separator
-            
-            response = self.client.post(
-                self.webhook_url,
-                json={"content": content_with_separator}
-            )
-            response.raise_for_status()
-            
-            console.print("[green]✓[/green] Message sent to Discord successfully")
+            future.result(timeout)
             return True
-            
-        except httpx.HTTPError as e:
-            console.print(f"[red]Error sending to Discord: {str(e)}[/red]")
-            return False
-        except Exception as e:
-            console.print(f"[red]Unexpected error sending to Discord: {str(e)}[/red]")
+        except FutureTimeoutError:
+            future.cancel()
             return False
-    
-    def close(self):
-        """Close the HTTP client."""
-        self.client.close()
+
+    def close(self, timeout: Optional[float] = 120.0):
+        """Deliver the queued messages (waiting up to timeout seconds) and stop the delivery thread."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            console.print(f"[yellow]Warning: {self._queue.qsize()} Discord message(s) not delivered before exit[/yellow]")
+        self._thread = None
+
+    def _start(self):
+        """Start the delivery thread and its event loop on first use."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._queue = asyncio.Queue()
+        self._thread = threading.Thread(target=self._run_loop, name="discord-sender", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._worker())
+        finally:
+            self._loop.close()
+
+    async def _worker(self):
+        """Deliver queued messages one at a time until close() is called."""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            while True:
+                content = await self._queue.get()
+                try:
+                    if content is None:
+                        return
+                    await self.deliver(content, client)
+                except Exception as e:
+                    console.print(f"[red]Unexpected error sending to Discord: {str(e)}[/red]")
+                finally:
+                    self._queue.task_done()
+
+    async def deliver(self, content: str, client: httpx.AsyncClient) -> bool:
+        """Post a message, split into as many parts as needed; stops at the first part that fails."""
+        parts = split_message(content)
+        for index, part in enumerate(parts, 1):
+            if not await self._post(client, {"content": part}):
+                console.print(f"[red]Discord delivery stopped at part {index}/{len(parts)}[/red]")
+                return False
+        suffix = f" ({len(parts)} parts)" if len(parts) > 1 else ""
+        console.print(f"[green]✓[/green] Message sent to Discord successfully{suffix}")
+        return True
+
+    async def _post(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> bool:
+        """Post one message, honouring rate limits and retrying 429s, server and network errors."""
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            await self._wait_for_rate_limit()
+            try:
+                response = await client.post(self.webhook_url, json=payload)
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            else:
+                self._update_rate_limit(response)
+                if response.status_code == 429:
+                    delay = self._retry_after(response)
+                    console.print(f"[yellow]Discord rate limit reached, retrying in {delay:.1f}s[/yellow]")
+                    await asyncio.sleep(delay)
+                    continue
+                if response.status_code < 500:
+                    try:
+                        response.raise_for_status()
+                        return True
+                    except httpx.HTTPStatusError as e:
+                        console.print(f"[red]Error sending to Discord: {str(e)}[/red]")
+                        return False
+                error = f"HTTP {response.status_code}"
+
+            if attempt < self.MAX_ATTEMPTS:
+                # Exponential backoff with jitter
+                delay = min(self.BACKOFF_BASE * 2 ** (attempt - 1), self.BACKOFF_MAX) * random.uniform(0.5, 1.0)
+                console.print(f"[yellow]Error sending to Discord ({error}), retrying in {delay:.1f}s[/yellow]")
+                await asyncio.sleep(delay)
+            else:
+                console.print(f"[red]Error sending to Discord: {error}[/red]")
+        return False
+
+    async def _wait_for_rate_limit(self):
+        """Sleep until the bucket has requests left (and any global limit has passed)."""
+        now = time.monotonic()
+        wait = self._global_reset_at - now
+        if self.rate_limit.get('remaining', 1) <= 0:
+            wait = max(wait, self.rate_limit['reset_at'] - now)
+        if wait > 0:
+            console.print(f"[dim]Waiting {wait:.1f}s for the Discord rate limit to reset[/dim]")
+            await asyncio.sleep(wait)
+
+    def _update_rate_limit(self, response: httpx.Response):
+        """Record the bucket state from Discord's X-RateLimit-* headers."""
+        headers = response.headers
+        try:
+            self.rate_limit = {
+                'bucket': headers.get('X-RateLimit-Bucket'),
+                'remaining': int(headers['X-RateLimit-Remaining']),
+                'reset_at': time.monotonic() + float(headers['X-RateLimit-Reset-After']),
+            }
+        except (KeyError, ValueError):
+            pass
+
+    def _retry_after(self, response: httpx.Response) -> float:
+        """Seconds to wait after a 429, from the JSON body or the Retry-After header."""
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        try:
+            delay = float(body.get('retry_after') or response.headers.get('Retry-After') or 1.0)
+        except (TypeError, ValueError):
+            delay = 1.0
+        if body.get('global') or response.headers.get('X-RateLimit-Global'):
+            self._global_reset_at = time.monotonic() + delay
+        return max(delay, 0.0)
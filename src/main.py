@@ -1,6 +1,8 @@
 """Main workflow orchestrator for the forex news analysis system."""
+import asyncio
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
@@ -9,6 +11,10 @@ from config import settings
 from rss_fetcher import RSSFeedAggregator
 from ai_analyzer import ForexAnalysisPipeline
 from discord_sender import DiscordSender
+from scheduler import IntervalSchedule, Scheduler, parse_schedules
+from news_watch import DEFAULT_WATCH_FEEDS, FeedWatcher, HeadlineClassifier, NewsWatch
+from telemetry import RunTelemetry
+from profiling import RunProfiler, profiled
 
 console = Console()
 
@@ -16,37 +22,68 @@ console = Console()
 class SquawkWorkflow:
     """Main workflow orchestrator."""
     
-    def __init__(self):
+    def __init__(self, profile: bool = False, resume: bool = False):
+        """
+        Initialize the workflow.
+        
+        Args:
+            profile: Record per-stage CPU profiles and event-loop stalls of every run
+            resume: Make the first run resume the last interrupted or partly failed run
+        """
+        self.profile = profile
+        self.resume = resume
         self.rss_aggregator = RSSFeedAggregator()
         self.ai_pipeline = ForexAnalysisPipeline(
             ollama_base_url=settings.ollama_base_url,
-            run_concurrent=settings.run_concurrent
+            run_concurrent=settings.run_concurrent,
+            archive_path=settings.reports_archive_path,
+            retention_runs=settings.reports_retention_runs or None,
+            retention_days=settings.reports_retention_days or None,
+            history_db_path=settings.history_db_path if settings.history_enabled else None,
+            keep_alive=settings.ollama_keep_alive,
+            warmup=settings.ollama_warmup,
+            market_data_max_age=settings.market_data_max_age_seconds,
+            instruments=[pair.strip().upper() for pair in settings.instruments.split(",") if pair.strip()],
+            instrument_count=settings.instrument_count,
+            price_history_path=settings.price_history_path if settings.price_history_enabled else None,
+            price_history_capacity=settings.price_history_capacity,
+            market_data_cache_path=settings.market_data_cache_path,
+            market_data_max_stale=settings.market_data_max_stale_seconds,
+            metrics_textfile=settings.metrics_textfile or None
         )
         self.discord_sender = DiscordSender(
             webhook_url=settings.discord_webhook_url
         )
     
     def run(self):
-        """Execute the complete workflow."""
+        """Execute the complete workflow once on its own event loop."""
+        async def run_and_close():
+            try:
+                await self.run_async()
+            finally:
+                await self.aclose()
+        
+        try:
+            asyncio.run(run_and_close())
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Workflow interrupted by user[/yellow]")
+    
+    async def run_async(self):
+        """Execute the complete workflow on the running event loop; HTTP clients stay open for the next run."""
         start_time = time.time()
         
         # Display banner
         self._display_banner()
         
         try:
-            # Step 1: Fetch RSS feeds
-            console.print("[bold cyan]Step 1: Fetching RSS Feeds[/bold cyan]")
-            aggregated_data = self.rss_aggregator.fetch_all()
+            # Steps 1-2: Fetch RSS feeds and run the AI analysis
+            aggregated_data, analysis_result = await self._fetch_and_analyze(self._run_deadline())
             
-            if not aggregated_data.get("data"):
+            if analysis_result is None:
                 console.print("[red]No data fetched. Exiting.[/red]")
                 return
             
-            # Step 2: AI Analysis
-            console.print("[bold cyan]Step 2: AI Analysis[/bold cyan]")
-            analysis_result = self.ai_pipeline.analyze_news(aggregated_data)
-            
-            # Step 3: Send to Discord
+            # Step 3: Send to Discord (delivered in the background)
             console.print("[bold cyan]Step 3: Sending to Discord[/bold cyan]\n")
             self.discord_sender.send_message(analysis_result)
             
@@ -54,12 +91,145 @@ class SquawkWorkflow:
             elapsed_time = time.time() - start_time
             self._display_summary(elapsed_time, len(aggregated_data.get("data", [])))
             
-        except KeyboardInterrupt:
-            console.print("\n[yellow]Workflow interrupted by user[/yellow]")
         except Exception as e:
             console.print(f"\n[red]Error during workflow execution: {str(e)}[/red]")
         finally:
-            self.discord_sender.close()
+            await asyncio.to_thread(self.ai_pipeline.flush_reports)
+    
+    async def serve(self):
+        """Run the workflow on the configured schedule from one long-lived event loop."""
+        try:
+            if settings.watch_enabled and settings.watch_only:
+                schedules = []
+            elif settings.schedule_cron.strip():
+                schedules = parse_schedules(settings.schedule_cron)
+            else:
+                schedules = [IntervalSchedule(settings.schedule_interval_hours)]
+            scheduler = Scheduler(
+                self.run_async,
+                schedules,
+                overlap=settings.schedule_overlap,
+                run_at_start=settings.schedule_run_at_start,
+                shutdown_timeout=settings.shutdown_timeout_seconds
+            )
+        except ValueError as e:
+            console.print(f"[red]Invalid schedule configuration: {str(e)}[/red]")
+            return
+        
+        if schedules:
+            console.print(f"[dim]Scheduling workflow: {'; '.join(s.label for s in schedules)} "
+                          f"(overlapping runs: {settings.schedule_overlap})[/dim]")
+        background = [self._build_news_watch(scheduler).run] if settings.watch_enabled else []
+        console.print("[dim]Press Ctrl+C to stop[/dim]\n")
+        try:
+            await scheduler.serve(background)
+        finally:
+            await self.aclose()
+    
+    def _build_news_watch(self, scheduler: Scheduler) -> NewsWatch:
+        """Watch the core feeds and trigger a run (pre-empting a scheduled one) on high-impact headlines."""
+        names = [name.strip() for name in settings.watch_feeds.split(",") if name.strip()] or DEFAULT_WATCH_FEEDS
+        feeds_by_name = {feed.name: feed for feed in self.rss_aggregator.feeds}
+        for name in names:
+            if name not in feeds_by_name:
+                console.print(f"[yellow]Warning: Unknown watch feed '{name}'[/yellow]")
+        
+        # With fixed instruments, only headlines about their currencies trigger
+        instruments = self.ai_pipeline.instruments
+        currencies = {currency for pair in instruments for currency in pair.split("/")} or None
+        return NewsWatch(
+            FeedWatcher([feeds_by_name[name] for name in names if name in feeds_by_name]),
+            HeadlineClassifier(currencies),
+            trigger=lambda reason: scheduler.trigger(reason, priority=settings.watch_preempt),
+            poll_seconds=settings.watch_poll_seconds,
+            debounce_seconds=settings.watch_debounce_seconds,
+            cooldown_seconds=settings.watch_cooldown_seconds
+        )
+    
+    async def aclose(self):
+        """Close the HTTP clients bound to the running event loop."""
+        await self.rss_aggregator.aclose()
+        await self.ai_pipeline.aclose()
+    
+    def close(self):
+        """Deliver queued Discord messages and flush the report archive before exiting."""
+        self.discord_sender.close()
+        self.ai_pipeline.close()
+    
+    def _run_deadline(self) -> Optional[datetime]:
+        """The earlier of the next deadline cron time and the per-run budget, or None if neither is set."""
+        now = datetime.now(timezone.utc)
+        deadlines = []
+        if settings.run_deadline_minutes > 0:
+            deadlines.append(now + timedelta(minutes=settings.run_deadline_minutes))
+        if settings.run_deadline_cron.strip():
+            try:
+                deadlines.extend(schedule.next_after(now) for schedule in parse_schedules(settings.run_deadline_cron))
+            except ValueError as e:
+                console.print(f"[red]Invalid run deadline configuration: {str(e)}[/red]")
+        return min(deadlines, default=None)
+    
+    async def _fetch_and_analyze(self, deadline: Optional[datetime] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Fetch the feeds while the first-tier models load and market data is prefetched, then analyze."""
+        console.print("[bold cyan]Step 1: Fetching RSS Feeds[/bold cyan]")
+        telemetry = RunTelemetry()
+        if self.profile:
+            telemetry.profiler = RunProfiler(settings.profile_lag_threshold_ms / 1000)
+            telemetry.profiler.start()
+        try:
+            # The news of a resumed run is the checkpointed one, so unchanged calls can be reused
+            checkpoint = self._take_checkpoint()
+            if checkpoint is not None:
+                self.ai_pipeline.prefetch_market_data(checkpoint["instruments"])
+                self.ai_pipeline.warm_up()
+                aggregated_data = checkpoint["aggregated_data"]
+                console.print(f"[dim]Using the {len(aggregated_data.get('data', []))} articles of run "
+                              f"{checkpoint['run_id']}[/dim]")
+            else:
+                self.ai_pipeline.warm_up()
+                self.ai_pipeline.prefetch_market_data()
+                with telemetry.span("fetch"):
+                    aggregated_data = await profiled(telemetry.profiler, "fetch", self.rss_aggregator.fetch_all_async())
+            
+            if not aggregated_data.get("data"):
+                await self.ai_pipeline.stop_warm_up()
+                return aggregated_data, None
+            
+            console.print("[bold cyan]Step 2: AI Analysis[/bold cyan]")
+            return aggregated_data, await profiled(telemetry.profiler, "analysis", self.ai_pipeline.analyze_news_async(
+                aggregated_data, deadline=deadline, telemetry=telemetry, resume=checkpoint
+            ))
+        finally:
+            if telemetry.profiler is not None:
+                await self._write_profile(telemetry)
+    
+    def _take_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """The checkpoint to resume if --resume was given and not used yet."""
+        if not self.resume:
+            return None
+        self.resume = False
+        checkpoint = self.ai_pipeline.archive.latest_checkpoint()
+        if checkpoint is None:
+            console.print("[yellow]No interrupted run to resume, starting a new run[/yellow]")
+        return checkpoint
+    
+    async def _write_profile(self, telemetry: RunTelemetry):
+        """Stop the run's profiler, archive its output next to the run's reports and print the stalls."""
+        profiler = telemetry.profiler
+        profiler.stop()
+        run_id = telemetry.run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.ai_pipeline.archive.write_profile(run_id, await asyncio.to_thread(profiler.files, run_id))
+        
+        busy = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in
+                         sorted(profiler.busy.items(), key=lambda item: item[1], reverse=True) if stage != "event_loop")
+        console.print(f"[dim]Profile written to {self.ai_pipeline.archive.root / f'profile_{run_id}'} "
+                      f"(event loop held by: {busy or 'no stage'})[/dim]")
+        stalls = sorted(profiler.lag.stalls, key=lambda stall: stall["duration_s"], reverse=True)
+        for stall in stalls[:5]:
+            console.print(f"[yellow]Event loop blocked {stall['duration_s'] * 1000:.0f} ms "
+                          f"in {stall['stage'] or 'unknown stage'} at {stall['call_site'] or 'unknown call site'}[/yellow]")
+        if len(stalls) > 5:
+            console.print(f"[yellow]...and {len(stalls) - 5} more stalls (see stalls.json)[/yellow]")
     
     def _display_banner(self):
         """Display the application banner."""
@@ -86,25 +256,27 @@ class SquawkWorkflow:
 
 def main():
     """Main entry point."""
-    workflow = SquawkWorkflow()
+    import argparse
     
-    if settings.run_once:
-        console.print("[dim]Running workflow once...[/dim]\n")
-        workflow.run()
-    else:
-        console.print(f"[dim]Scheduling workflow to run every {settings.schedule_interval_hours} hour(s)[/dim]")
-        console.print("[dim]Press Ctrl+C to stop[/dim]\n")
-        
-        import schedule
-        schedule.every(settings.schedule_interval_hours).hours.do(workflow.run)
-        
-        # Run immediately
-        workflow.run()
-        
-        # Then run on schedule
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+    parser = argparse.ArgumentParser(description="Forex news squawk analyzer")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write per-stage CPU profiles and event-loop stalls next to each run's reports")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the last interrupted run, rerunning only its failed or missing calls")
+    args = parser.parse_args()
+    
+    workflow = SquawkWorkflow(profile=args.profile, resume=args.resume)
+    
+    try:
+        if settings.run_once:
+            console.print("[dim]Running workflow once...[/dim]\n")
+            workflow.run()
+        else:
+            asyncio.run(workflow.serve())
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Stopped by user[/yellow]")
+    finally:
+        workflow.close()
 
 
 if __name__ == "__main__":
@@ -1,147 +1,394 @@
 """Market data fetcher for real-time forex prices."""
 import asyncio
+import json
+import os
+import re
+import time
 import httpx
-from typing import Dict, Any, Optional
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from rich.console import Console
 from datetime import datetime
+from price_history import PriceHistory
 
 console = Console()
 
+# Major currencies in market quoting priority: the higher-priority currency is the base of a pair
+MAJOR_CURRENCIES = ['EUR', 'GBP', 'AUD', 'NZD', 'USD', 'CAD', 'CHF', 'JPY']
+# USD majors first, then crosses; this order also breaks ranking ties
+FOREX_PAIRS = sorted(
+    (f"{base}/{quote}" for i, base in enumerate(MAJOR_CURRENCIES) for quote in MAJOR_CURRENCIES[i + 1:]),
+    key=lambda pair: 'USD' not in pair
+)
+
+# Every pair in any order, case and spelling (EUR/USD, eurusd, EUR-USD, USD/EUR) as one pattern,
+# so each article is scanned in a single pass regardless of how many pairs are tracked
+_CODES = '|'.join(MAJOR_CURRENCIES)
+_PAIR_PATTERN = re.compile(rf'(?<![A-Za-z])({_CODES})\s?[/-]?\s?({_CODES})(?![A-Za-z])', re.IGNORECASE)
+_PAIR_NAMES = {}
+for _pair in FOREX_PAIRS:
+    _base, _quote = _pair.split('/')
+    _PAIR_NAMES[(_base, _quote)] = _PAIR_NAMES[(_quote, _base)] = _pair
+
+TITLE_WEIGHT = 3  # a pair in the headline says more about the article than one in the body
+
+
+@dataclass
+class SourceStats:
+    """Latency and success-rate statistics of one market data source."""
+    attempts: int = 0
+    successes: int = 0
+    latency: Optional[float] = None  # exponentially weighted mean of successful request latencies
+    
+    def record(self, success: bool, elapsed: float):
+        self.attempts += 1
+        if success:
+            self.successes += 1
+            self.latency = elapsed if self.latency is None else 0.7 * self.latency + 0.3 * elapsed
+    
+    @property
+    def success_rate(self) -> float:
+        # Untried sources count as reliable so they get a chance to be measured
+        return (self.successes + 1) / (self.attempts + 1)
+    
+    @property
+    def expected_latency(self) -> float:
+        """Expected time to a valid answer, penalising sources that often fail."""
+        return (self.latency if self.latency is not None else 1.0) / self.success_rate
+
+
+@dataclass
+class RateTable:
+    """All exchange rates quoted against one base currency, as returned by a single request."""
+    base: str
+    rates: Dict[str, float]
+    source: str
+    timestamp: str  # provider's last update time
+    fetched_at: float = field(default_factory=time.monotonic)
+    fetched_unix: float = field(default_factory=time.time)  # persisted; monotonic time doesn't survive restarts
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the table was fetched."""
+        return time.monotonic() - self.fetched_at
+    
+    def covers(self, *currencies: str) -> bool:
+        return all(currency == self.base or currency in self.rates for currency in currencies)
+    
+    def rate(self, base: str, quote: str) -> float:
+        """Price of base in quote currency, derived through the table's base if needed."""
+        rates = {**self.rates, self.base: 1.0}
+        return rates[quote] / rates[base]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'base': self.base,
+            'rates': self.rates,
+            'source': self.source,
+            'timestamp': self.timestamp,
+            'fetched_unix': self.fetched_unix,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RateTable':
+        fetched_unix = float(data['fetched_unix'])
+        return cls(
+            base=data['base'],
+            rates={currency: float(rate) for currency, rate in data['rates'].items()},
+            source=data['source'],
+            timestamp=data['timestamp'],
+            fetched_at=time.monotonic() - max(time.time() - fetched_unix, 0.0),
+            fetched_unix=fetched_unix
+        )
+
+
+def format_age(seconds: float) -> str:
+    """Format a snapshot age, e.g. "45s", "12m 5s" or "3h 20m"."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+
 
 class MarketDataFetcher:
     """Fetches real-time market data for forex pairs."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    HEDGE_DELAY_MIN = 0.25  # seconds before the next-best source is started as well
+    HEDGE_DELAY_MAX = 2.0
+    
+    # Source endpoints (overridden by the benchmark's local stub servers)
+    EXCHANGERATE_API_URL = "https://open.er-api.com/v6/latest/{base}"
+    FRANKFURTER_URL = "https://api.frankfurter.app/latest?from={base}"
+    FIXER_URL = "http://data.fixer.io/api/latest?access_key={api_key}&base={base}"
+    
+    def __init__(self, api_key: Optional[str] = None, timeout: float = 10.0,
+                 price_history: Optional[PriceHistory] = None,
+                 cache_path: Optional[Union[str, Path]] = None, max_stale: float = 3600):
         """
         Initialize market data fetcher.
         
         Args:
             api_key: Optional API key for premium data sources
+            timeout: Timeout of a single source request in seconds
+            price_history: Store that samples every pair of each fetched rate table
+            cache_path: JSON file the last good rate tables are kept in across restarts
+            max_stale: Oldest snapshot (seconds) served while refreshing or when the sources fail
         """
         self.api_key = api_key
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.timeout = timeout
+        self.price_history = price_history
+        # Full rate tables per base currency; any pair, crosses included, is derived from them
+        self.rate_tables: Dict[str, RateTable] = {}
         self.cache_duration = 60  # Cache for 60 seconds
+        self.max_stale = max_stale
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.source_stats: Dict[str, SourceStats] = defaultdict(SourceStats)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._table_fetch: Optional[asyncio.Task] = None
+        self._load_cache()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client for all sources, recreated when called from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+            self._client_loop = loop
+            self._table_fetch = None
+        return self._client
+    
+    async def aclose(self):
+        """Cancel an unfinished background refresh and close the shared HTTP client."""
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            if self._table_fetch is not None and not self._table_fetch.done():
+                self._table_fetch.cancel()
+            await self._client.aclose()
+        self._client = self._client_loop = self._table_fetch = None
         
-    async def get_forex_data_async(self, symbol: str = "EUR/USD") -> Dict[str, Any]:
+    async def get_forex_data_async(self, symbol: str = "EUR/USD", force_refresh: bool = False) -> Dict[str, Any]:
         """
         Fetch real-time forex data for a given symbol.
         
+        A snapshot younger than cache_duration is served as is. An older one within
+        max_stale is served immediately while a refresh runs in the background
+        (stale-while-revalidate); it is also the fallback when the sources fail.
+        
         Args:
             symbol: Forex pair symbol (default: EUR/USD)
+            force_refresh: Wait for a new snapshot instead of serving a cached one
             
         Returns:
-            Dictionary containing market data
+            Dictionary containing market data, with the snapshot's age in 'age_seconds'
         """
-        # Check cache first
-        if symbol in self.cache:
-            cached_data = self.cache[symbol]
-            if (datetime.now() - cached_data['timestamp']).seconds < self.cache_duration:
+        base, quote = self._parse_symbol(symbol)
+        
+        # Check cache first: the latest table of any base that quotes both currencies will do
+        table = self._cached_table(base, quote)
+        if table is not None and not force_refresh:
+            if table.age < self.cache_duration:
                 console.print(f"[dim]Using cached market data for {symbol}[/dim]")
-                return cached_data['data']
+                return self._pair_data(symbol, table)
+            if table.age < self.max_stale:
+                console.print(f"[dim]Using {format_age(table.age)} old market data for {symbol}, "
+                              f"refreshing in the background[/dim]")
+                self._revalidate(base, quote)
+                return self._pair_data(symbol, table)
         
         try:
-            # Try multiple free data sources in order
-            data = await self._fetch_from_exchangerate_api(symbol)
-            if not data:
-                data = await self._fetch_from_frankfurter(symbol)
-            if not data:
-                data = await self._fetch_from_fixer(symbol)
-            
-            if data:
-                # Cache the result
-                self.cache[symbol] = {
-                    'data': data,
-                    'timestamp': datetime.now()
-                }
-                return data
-            else:
-                console.print(f"[yellow]Warning: Could not fetch market data for {symbol}[/yellow]")
-                return self._get_fallback_data(symbol)
-                
+            fetched = await self._get_rate_table(base, quote)
+            if fetched is not None:
+                return self._pair_data(symbol, fetched)
         except Exception as e:
             console.print(f"[red]Error fetching market data: {str(e)}[/red]")
-            return self._get_fallback_data(symbol)
+        
+        table = self._cached_table(base, quote)
+        if table is not None and table.age < self.max_stale:
+            console.print(f"[yellow]Warning: Could not refresh market data for {symbol}, "
+                          f"using the snapshot from {format_age(table.age)} ago[/yellow]")
+            return self._pair_data(symbol, table)
+        console.print(f"[yellow]Warning: Could not fetch market data for {symbol}[/yellow]")
+        return self._get_fallback_data(symbol)
     
-    async def _fetch_from_exchangerate_api(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Fetch from exchangerate-api.com (free, no key required)."""
+    def _cached_table(self, base: str, quote: str) -> Optional[RateTable]:
+        """Most recently fetched table that covers both currencies, regardless of age."""
+        covering = [table for table in self.rate_tables.values() if table.covers(base, quote)]
+        return max(covering, key=lambda table: table.fetched_at, default=None)
+    
+    def _revalidate(self, base: str, quote: str):
+        """Refresh the rate table in the background unless a fetch is already in flight."""
+        self._get_client()
+        if self._table_fetch is None or self._table_fetch.done():
+            self._table_fetch = asyncio.create_task(self._fetch_rate_table(base, quote))
+    
+    async def _get_rate_table(self, base: str, quote: str) -> Optional[RateTable]:
+        """
+        Fetch a rate table covering both currencies.
+        
+        Concurrent callers share one in-flight request, so analysing several pairs
+        at once costs a single HTTP call.
+        """
+        self._get_client()
+        if self._table_fetch is not None and not self._table_fetch.done():
+            table = await asyncio.shield(self._table_fetch)
+            if table is not None and table.covers(base, quote):
+                return table
+        
+        self._table_fetch = asyncio.create_task(self._fetch_rate_table(base, quote))
+        table = await asyncio.shield(self._table_fetch)
+        return table if table is not None and table.covers(base, quote) else None
+    
+    async def _fetch_rate_table(self, base: str, quote: str) -> Optional[RateTable]:
+        """Race the sources for a base currency's table, then cache, persist and sample it."""
+        table = await self._race_sources(base)
+        if table is not None:
+            self.rate_tables[table.base] = table
+            self._record_prices(table, f"{base}/{quote}")
+            self._save_cache()
+        return table
+    
+    def _load_cache(self):
+        """Load the rate tables saved by a previous process."""
+        if self.cache_path is None or not self.cache_path.exists():
+            return
         try:
-            base, quote = self._parse_symbol(symbol)
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"https://open.er-api.com/v6/latest/{base}"
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get('result') == 'success' and quote in data.get('rates', {}):
-                    rate = data['rates'][quote]
-                    return {
-                        'symbol': symbol,
-                        'price': rate,
-                        'bid': rate * 0.9999,  # Estimate spread
-                        'ask': rate * 1.0001,
-                        'source': 'exchangerate-api.com',
-                        'timestamp': data.get('time_last_update_utc', 'N/A'),
-                        'note': 'Estimated bid/ask spread based on typical forex spreads'
-                    }
-        except Exception as e:
-            console.print(f"[dim]exchangerate-api failed: {str(e)}[/dim]")
-            return None
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                tables = [RateTable.from_dict(entry) for entry in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            console.print(f"[yellow]Ignoring unreadable market data cache: {str(e)}[/yellow]")
+            return
+        self.rate_tables = {table.base: table for table in tables if table.age < self.max_stale}
     
-    async def _fetch_from_frankfurter(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Fetch from frankfurter.app (free ECB data, no key required)."""
+    def _save_cache(self):
+        """Write the rate tables to the cache file, replacing it atomically."""
+        if self.cache_path is None:
+            return
         try:
-            base, quote = self._parse_symbol(symbol)
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"https://api.frankfurter.app/latest?from={base}&to={quote}"
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if quote in data.get('rates', {}):
-                    rate = data['rates'][quote]
-                    return {
-                        'symbol': symbol,
-                        'price': rate,
-                        'bid': rate * 0.9999,
-                        'ask': rate * 1.0001,
-                        'source': 'frankfurter.app (ECB)',
-                        'timestamp': data.get('date', 'N/A'),
-                        'note': 'Estimated bid/ask spread based on typical forex spreads'
-                    }
-        except Exception as e:
-            console.print(f"[dim]frankfurter.app failed: {str(e)}[/dim]")
-            return None
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump([table.to_dict() for table in self.rate_tables.values()], f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            console.print(f"[yellow]Could not save market data cache: {str(e)}[/yellow]")
     
-    async def _fetch_from_fixer(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Fetch from fixer.io (requires free API key if available)."""
-        if not self.api_key:
-            return None
-            
+    def _record_prices(self, table: RateTable, symbol: str):
+        """Sample the requested pair and every major pair the table quotes into the price history."""
+        if self.price_history is None:
+            return
+        sampled_at = time.time()
+        for pair in dict.fromkeys([symbol, *FOREX_PAIRS]):
+            base, quote = pair.split('/')
+            if table.covers(base, quote):
+                self.price_history.record(pair, table.rate(base, quote), sampled_at)
+    
+    def _pair_data(self, symbol: str, table: RateTable) -> Dict[str, Any]:
+        """Market data for a pair derived from a rate table."""
+        base, quote = self._parse_symbol(symbol)
+        rate = table.rate(base, quote)
+        data = {
+            'symbol': symbol,
+            'price': rate,
+            'bid': rate * 0.9999,  # Estimate spread
+            'ask': rate * 1.0001,
+            'source': table.source,
+            'timestamp': table.timestamp,
+            'age_seconds': round(table.age, 1),
+            'note': 'Estimated bid/ask spread based on typical forex spreads'
+        }
+        if table.base not in (base, quote):
+            data['note'] += f"; cross rate derived from {table.base} rates"
+        return data
+    
+    def _ordered_sources(self) -> List[Tuple[str, Callable[[str, httpx.AsyncClient], Awaitable[Optional[RateTable]]]]]:
+        """Available sources, fastest expected valid answer first."""
+        sources = [
+            ('exchangerate-api', self._fetch_from_exchangerate_api),
+            ('frankfurter', self._fetch_from_frankfurter),
+        ]
+        if self.api_key:
+            sources.append(('fixer', self._fetch_from_fixer))
+        return sorted(sources, key=lambda source: self.source_stats[source[0]].expected_latency)
+    
+    async def _race_sources(self, base: str) -> Optional[RateTable]:
+        """
+        Query the sources concurrently for the rate table of a base currency.
+        
+        The best source starts first; each next one starts when the previous ones
+        fail or the hedge delay (based on the leader's typical latency) passes
+        without an answer. The first valid answer wins and the rest are cancelled.
+        """
+        client = self._get_client()
+        loop = asyncio.get_running_loop()
+        pending_sources = self._ordered_sources()
+        leader = self.source_stats[pending_sources[0][0]]
+        hedge_delay = min(max((leader.latency or 0) * 1.5, self.HEDGE_DELAY_MIN), self.HEDGE_DELAY_MAX)
+        if leader.latency is None:
+            hedge_delay = 0  # nothing measured yet: start every source at once
+        
+        async def timed(name, fetch):
+            started = loop.time()
+            try:
+                result = await fetch(base, client)
+            except Exception as e:
+                console.print(f"[dim]{name} failed: {str(e)}[/dim]")
+                result = None
+            self.source_stats[name].record(result is not None, loop.time() - started)
+            return result
+        
+        running: Dict[asyncio.Task, str] = {}
         try:
-            base, quote = self._parse_symbol(symbol)
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"http://data.fixer.io/api/latest?access_key={self.api_key}&base={base}&symbols={quote}"
-                )
-                response.raise_for_status()
-                data = response.json()
+            while pending_sources or running:
+                if pending_sources:
+                    name, fetch = pending_sources.pop(0)
+                    running[asyncio.create_task(timed(name, fetch))] = name
                 
-                if data.get('success') and quote in data.get('rates', {}):
-                    rate = data['rates'][quote]
-                    return {
-                        'symbol': symbol,
-                        'price': rate,
-                        'bid': rate * 0.9999,
-                        'ask': rate * 1.0001,
-                        'source': 'fixer.io',
-                        'timestamp': data.get('date', 'N/A'),
-                        'note': 'Estimated bid/ask spread based on typical forex spreads'
-                    }
-        except Exception as e:
-            console.print(f"[dim]fixer.io failed: {str(e)}[/dim]")
+                done, _ = await asyncio.wait(
+                    running, timeout=hedge_delay if pending_sources else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = running.pop(task)
+                    if task.result() is not None:
+                        console.print(f"[dim]{base} rate table from {name} ({len(task.result().rates)} currencies)[/dim]")
+                        return task.result()
             return None
+        finally:
+            for task in running:
+                task.cancel()
+    
+    async def _fetch_from_exchangerate_api(self, base: str, client: httpx.AsyncClient) -> Optional[RateTable]:
+        """Fetch from exchangerate-api.com (free, no key required)."""
+        response = await client.get(self.EXCHANGERATE_API_URL.format(base=base))
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('result') == 'success' and data.get('rates'):
+            return RateTable(base, data['rates'], 'exchangerate-api.com', data.get('time_last_update_utc', 'N/A'))
+        return None
+    
+    async def _fetch_from_frankfurter(self, base: str, client: httpx.AsyncClient) -> Optional[RateTable]:
+        """Fetch from frankfurter.app (free ECB data, no key required)."""
+        response = await client.get(self.FRANKFURTER_URL.format(base=base))
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('rates'):
+            return RateTable(base, data['rates'], 'frankfurter.app (ECB)', data.get('date', 'N/A'))
+        return None
+    
+    async def _fetch_from_fixer(self, base: str, client: httpx.AsyncClient) -> Optional[RateTable]:
+        """Fetch from fixer.io (requires free API key)."""
+        response = await client.get(self.FIXER_URL.format(api_key=self.api_key, base=base))
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('success') and data.get('rates'):
+            return RateTable(data.get('base', base), data['rates'], 'fixer.io', data.get('date', 'N/A'))
+        return None
     
     def _parse_symbol(self, symbol: str) -> tuple:
         """Parse forex symbol into base and quote currencies."""
@@ -178,6 +425,12 @@ Management should NOT make specific price-based recommendations without current
 Focus on timing and directional bias only.
 """
         
+        age = data.get('age_seconds', 0)
+        if age >= self.cache_duration:
+            age_line = f"Snapshot Age: {format_age(age)} (STALE - prices may have moved since)"
+        else:
+            age_line = f"Snapshot Age: {format_age(age)}"
+        
         return f"""
 ━━━━ REAL-TIME MARKET DATA ━━━━
 Symbol: {data['symbol']}
@@ -187,6 +440,7 @@ Ask: {data['ask']:.5f}
 Spread: {(data['ask'] - data['bid']):.5f} ({((data['ask'] - data['bid']) / data['price'] * 10000):.1f} pips)
 Source: {data['source']}
 Updated: {data['timestamp']}
+{age_line}
 {data.get('note', '')}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """
@@ -196,6 +450,59 @@ Updated: {data['timestamp']}
         return asyncio.run(self.get_forex_data_async(symbol))
 
 
+def count_pair_mentions(text: str) -> Dict[str, int]:
+    """Count mentions of each forex pair in a piece of text."""
+    counts: Dict[str, int] = defaultdict(int)
+    for match in _PAIR_PATTERN.finditer(text):
+        pair = _PAIR_NAMES.get((match.group(1).upper(), match.group(2).upper()))
+        if pair:
+            counts[pair] += 1
+    return counts
+
+
+def rank_instruments(aggregated_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Rank the forex pairs mentioned in the news by relevance.
+    
+    Each article's title and body are scanned once; the cost is linear in the
+    article text and nothing is copied beyond the fields being scanned.
+    
+    Args:
+        aggregated_data: The aggregated news data
+        
+    Returns:
+        Pairs sorted by score (title mentions weighted by TITLE_WEIGHT, then the
+        number of articles), each with its mention counts and per-article hits
+    """
+    ranking: Dict[str, Dict[str, Any]] = {}
+    for index, article in enumerate(aggregated_data.get('data', [])):
+        title_counts = count_pair_mentions(article.get('title') or '')
+        body = article.get('content') or ''
+        body_counts = count_pair_mentions(body)
+        snippet = article.get('contentSnippet') or ''
+        if snippet and snippet != body:
+            for pair, count in count_pair_mentions(snippet).items():
+                body_counts[pair] += count
+        
+        for pair in title_counts.keys() | body_counts.keys():
+            entry = ranking.setdefault(pair, {
+                'pair': pair, 'score': 0, 'mentions': 0, 'title_mentions': 0, 'articles': 0, 'article_hits': []
+            })
+            title_hits, body_hits = title_counts.get(pair, 0), body_counts.get(pair, 0)
+            entry['score'] += title_hits * TITLE_WEIGHT + body_hits
+            entry['mentions'] += title_hits + body_hits
+            entry['title_mentions'] += title_hits
+            entry['articles'] += 1
+            entry['article_hits'].append({
+                'index': index,
+                'title': article.get('title', ''),
+                'link': article.get('link', ''),
+                'mentions': title_hits + body_hits
+            })
+    
+    return sorted(ranking.values(), key=lambda e: (-e['score'], -e['articles'], FOREX_PAIRS.index(e['pair'])))
+
+
 def extract_instrument_from_news(aggregated_data: Dict[str, Any]) -> str:
     """
     Extract the trading instrument from news data.
@@ -204,23 +511,17 @@ def extract_instrument_from_news(aggregated_data: Dict[str, Any]) -> str:
         aggregated_data: The aggregated news data
         
     Returns:
-        Trading instrument symbol (e.g., "EUR/USD")
+        The most relevant trading instrument symbol (e.g., "EUR/USD")
     """
-    # For now, default to EUR/USD as mentioned in analyst prompts
-    # This could be enhanced to parse news content and identify the instrument
-    
     # Check if there's an explicit instrument field
     if 'instrument' in aggregated_data:
         return aggregated_data['instrument']
     
-    # Parse news content for forex pairs
-    news_text = str(aggregated_data).upper()
-    
-    common_pairs = ['EUR/USD', 'GBP/USD', 'USD/JPY', 'AUD/USD', 'USD/CHF', 'USD/CAD']
-    for pair in common_pairs:
-        if pair in news_text or pair.replace('/', '') in news_text:
-            console.print(f"[cyan]Detected forex pair from news: {pair}[/cyan]")
-            return pair
+    ranking = rank_instruments(aggregated_data)
+    if ranking:
+        top = ", ".join(f"{e['pair']} ({e['mentions']} in {e['articles']} articles)" for e in ranking[:3])
+        console.print(f"[cyan]Detected forex pair from news: {ranking[0]['pair']}[/cyan] [dim]— top: {top}[/dim]")
+        return ranking[0]['pair']
     
     # Default to EUR/USD
     console.print("[dim]No specific forex pair detected, defaulting to EUR/USD[/dim]")
@@ -0,0 +1,92 @@
+"""Background preloading of Ollama models so load time overlaps with other work."""
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+import httpx
+from rich.console import Console
+
+console = Console()
+
+
+class ModelWarmer:
+    """
+    Loads Ollama models into memory ahead of their first analysis request.
+
+    Loads run one at a time in request order, so the models needed first are
+    ready first and concurrent loads don't compete for disk and GPU memory.
+    Ollama queues generate requests for a model that is still loading, so a
+    warm-up that hasn't finished never delays analysis.
+    """
+
+    def __init__(self, base_url: str, keep_alive: Union[int, str] = "10m", timeout: float = 300.0):
+        """
+        Initialize the warmer.
+
+        Args:
+            base_url: Ollama server URL
+            keep_alive: How long Ollama keeps a preloaded model in memory
+            timeout: Timeout for a single model load in seconds
+        """
+        self.base_url = base_url.rstrip('/')
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.load_times: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def warm(self, models: Iterable[str], options: Optional[Dict[str, Dict[str, Any]]] = None) -> List[asyncio.Task]:
+        """
+        Start loading models in the background; models already requested are skipped.
+
+        Must be called from a running event loop.
+
+        Args:
+            models: Models to load, most urgent first
+            options: Load options per model (e.g. num_ctx, so the first request doesn't reload it)
+
+        Returns:
+            The tasks of the newly requested loads
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+        started = []
+        for model in models:
+            if model and model not in self._tasks:
+                self._tasks[model] = asyncio.create_task(self._load(model, (options or {}).get(model)),
+                                                         name=f"warm-up {model}")
+                started.append(self._tasks[model])
+        return started
+
+    async def wait(self):
+        """Wait for all requested loads to finish."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def close(self):
+        """Cancel loads that have not finished and release the HTTP client."""
+        for task in self._tasks.values():
+            task.cancel()
+        await self.wait()
+        if self._client is not None:
+            await self._client.aclose()
+        self._tasks.clear()
+        self._lock = self._client = None
+
+    async def _load(self, model: str, options: Optional[Dict[str, Any]] = None):
+        async with self._lock:
+            started = time.perf_counter()
+            request = {"model": model, "keep_alive": self.keep_alive}
+            if options:
+                request["options"] = options
+            try:
+                # A generate request without a prompt only loads the model
+                response = await self._client.post(f"{self.base_url}/api/generate", json=request)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                console.print(f"[yellow]Could not preload {model}: {str(e)}[/yellow]")
+                return
+            self.load_times[model] = round(time.perf_counter() - started, 2)
+            console.print(f"[dim]Preloaded {model} in {self.load_times[model]:.1f}s[/dim]")
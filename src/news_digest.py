@@ -0,0 +1,230 @@
+"""Stage 0 news digest: turns the raw article set into a compact list of structured events."""
+import calendar
+import html
+import json
+import re
+from datetime import datetime, timezone, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional
+from zoneinfo import ZoneInfo
+
+# Currency detection: ISO codes plus the institutions and nicknames news headlines use
+CURRENCY_KEYWORDS = {
+    'USD': ['USD', 'dollar', 'greenback', 'Fed', 'FOMC', 'Powell', 'Treasury', 'Treasuries', 'NFP', 'nonfarm'],
+    'EUR': ['EUR', 'euro', 'eurozone', 'euro area', 'ECB', 'Lagarde', 'Bund'],
+    'GBP': ['GBP', 'pound', 'sterling', 'cable', 'BoE', 'Bank of England', 'Bailey', 'gilt'],
+    'JPY': ['JPY', 'yen', 'BoJ', 'Bank of Japan', 'Ueda'],
+    'CHF': ['CHF', 'franc', 'SNB', 'Swiss National Bank'],
+    'CAD': ['CAD', 'loonie', 'BoC', 'Bank of Canada'],
+    'AUD': ['AUD', 'aussie', 'RBA', 'Reserve Bank of Australia'],
+    'NZD': ['NZD', 'kiwi', 'RBNZ'],
+    'CNY': ['CNY', 'yuan', 'renminbi', 'PBoC'],
+}
+
+# Impact classification keywords, checked from highest impact down
+IMPACT_KEYWORDS = {
+    'high': ['CPI', 'inflation', 'nonfarm', 'non-farm', 'payrolls', 'NFP', 'FOMC', 'rate decision',
+             'interest rate', 'rate hike', 'rate cut', 'GDP', 'central bank', 'Powell', 'Lagarde',
+             'intervention', 'emergency'],
+    'medium': ['PMI', 'unemployment', 'jobless claims', 'retail sales', 'PPI', 'trade balance',
+               'minutes', 'speech', 'testimony', 'sentiment', 'industrial production', 'yields',
+               'tariff'],
+}
+IMPACT_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+# Clock times mentioned in article text, e.g. "13:30 GMT" or "8:30 a.m. ET"
+_TIME_PATTERN = re.compile(
+    r'\b(?P<hour>[01]?\d|2[0-3])[:.](?P<minute>[0-5]\d)\s*(?P<ampm>[ap]\.?m\.?)?\s*'
+    r'(?P<tz>GMT|UTC|BST|CET|CEST|ET|EST|EDT|JST|AEST|AEDT)\b',
+    re.IGNORECASE
+)
+_TIMEZONES = {
+    'GMT': 'UTC', 'UTC': 'UTC', 'BST': 'Europe/London', 'CET': 'Europe/Paris', 'CEST': 'Europe/Paris',
+    'ET': 'America/New_York', 'EST': 'America/New_York', 'EDT': 'America/New_York',
+    'JST': 'Asia/Tokyo', 'AEST': 'Australia/Sydney', 'AEDT': 'Australia/Sydney',
+}
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _compile_keywords(keywords: List[str]) -> re.Pattern:
+    # Capitalised keywords (USD, Fed, Bank of England) are matched case-sensitively to avoid false hits
+    parts = []
+    for keyword in keywords:
+        escaped = re.escape(keyword)
+        parts.append(escaped if keyword != keyword.lower() else f'(?i:{escaped})')
+    return re.compile(r'\b(?:' + '|'.join(parts) + r')\b')
+
+
+_CURRENCY_PATTERNS = {code: _compile_keywords(words) for code, words in CURRENCY_KEYWORDS.items()}
+_IMPACT_PATTERNS = {level: _compile_keywords(words) for level, words in IMPACT_KEYWORDS.items()}
+
+
+DIGEST_PROMPT = """You are a news desk assistant preparing a briefing for a team of forex analysts.
+
+Extract every market-relevant event from the articles below. Output ONLY a JSON object of the form:
+{"events": [{"id": "E1", "title": "...", "time_utc": "YYYY-MM-DD HH:MM", "event_times_utc": ["HH:MM"], "currencies": ["USD"], "impact": "high|medium|low", "summary": "one sentence", "source": "article link"}]}
+
+Rules:
+- Convert every time to UTC
+- Merge duplicate stories into one event
+- Skip articles with no relevance to currencies, rates or macro data
+- Never invent facts, times or numbers that are not in the articles
+
+{{ JSON.stringify($json.data, null, 2) }}"""
+
+
+def clean_text(text: str) -> str:
+    """Strip HTML tags, entities and redundant whitespace from article text."""
+    text = html.unescape(_TAG_PATTERN.sub(' ', text or ''))
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def detect_currencies(text: str) -> List[str]:
+    """Return the currency codes referenced in a piece of text."""
+    return [code for code, pattern in _CURRENCY_PATTERNS.items() if pattern.search(text)]
+
+
+def classify_impact(text: str) -> str:
+    """Classify the expected market impact of a piece of text as high, medium or low."""
+    for level, pattern in _IMPACT_PATTERNS.items():
+        if pattern.search(text):
+            return level
+    return 'low'
+
+
+def parse_published_time(article: Dict[str, Any]) -> Optional[datetime]:
+    """Parse an article's publication time into an aware UTC datetime."""
+    published = article.get('pubDate')
+    if published:
+        try:
+            parsed = parsedate_to_datetime(published)
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc)
+        except (TypeError, ValueError):
+            pass
+
+    # feedparser's published_parsed is a UTC struct_time (a list once serialised)
+    parsed_tuple = article.get('isoDate')
+    if parsed_tuple and len(parsed_tuple) >= 6:
+        try:
+            return datetime.fromtimestamp(calendar.timegm(tuple(parsed_tuple)[:9]), tz=timezone.utc)
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return None
+
+
+def extract_event_times(text: str, reference: Optional[datetime] = None) -> List[str]:
+    """Find clock times mentioned in text and convert them to UTC ``HH:MM`` strings."""
+    reference = reference or datetime.now(timezone.utc)
+    times = []
+    for match in _TIME_PATTERN.finditer(text):
+        hour, minute = int(match.group('hour')), int(match.group('minute'))
+        ampm = (match.group('ampm') or '').lower().replace('.', '')
+        if ampm == 'pm' and hour < 12:
+            hour += 12
+        elif ampm == 'am' and hour == 12:
+            hour = 0
+
+        zone = ZoneInfo(_TIMEZONES[match.group('tz').upper()])
+        local_date = reference.astimezone(zone).date()
+        local = datetime(local_date.year, local_date.month, local_date.day, hour, minute, tzinfo=zone)
+        utc_time = local.astimezone(timezone.utc).strftime('%H:%M')
+        if utc_time not in times:
+            times.append(utc_time)
+    return times
+
+
+def build_news_digest(aggregated_data: Dict[str, Any], max_events: int = 80,
+                      summary_chars: int = 160, max_age_hours: Optional[float] = 36) -> Dict[str, Any]:
+    """
+    Build a compact structured digest from aggregated RSS articles.
+
+    Duplicate headlines are merged, articles are tagged with currencies and an
+    expected impact level, and the most relevant events are kept.
+
+    Args:
+        aggregated_data: Output of RSSFeedAggregator.fetch_all()
+        max_events: Maximum number of events to keep
+        summary_chars: Maximum length of each event summary (0 disables summaries)
+        max_age_hours: Drop articles published longer ago than this (None keeps all)
+
+    Returns:
+        Dictionary with the digest events and article counts
+    """
+    now = datetime.now(timezone.utc)
+    events = []
+    seen_titles = set()
+
+    for article in aggregated_data.get('data', []):
+        title = clean_text(article.get('title', ''))
+        title_key = title.lower()
+        if not title or title_key in seen_titles:
+            continue
+        seen_titles.add(title_key)
+
+        published = parse_published_time(article)
+        if max_age_hours is not None and published and now - published > timedelta(hours=max_age_hours):
+            continue
+
+        body = clean_text(article.get('contentSnippet') or article.get('content', ''))
+        text = f"{title} {body}"
+        currencies = detect_currencies(text)
+        impact = classify_impact(text)
+        if not currencies and impact == 'low':
+            continue
+
+        event = {
+            'title': title,
+            'time_utc': published.strftime('%Y-%m-%d %H:%M') if published else None,
+            'event_times_utc': extract_event_times(text, published or now),
+            'currencies': currencies,
+            'impact': impact,
+            'source': article.get('link', ''),
+        }
+        if summary_chars and body and body != title:
+            event['summary'] = body if len(body) <= summary_chars else body[:summary_chars].rsplit(' ', 1)[0] + '…'
+        events.append(event)
+
+    # Most important and most recent first
+    events.sort(key=lambda e: e['time_utc'] or '', reverse=True)
+    events.sort(key=lambda e: IMPACT_RANK[e['impact']])
+    kept = events[:max_events]
+    for idx, event in enumerate(kept, 1):
+        event['id'] = f"E{idx}"
+
+    return {
+        'generated_at': now.strftime('%Y-%m-%d %H:%M UTC'),
+        'article_count': len(aggregated_data.get('data', [])),
+        'event_count': len(kept),
+        'omitted_events': len(events) - len(kept),
+        'events': [{'id': e.pop('id'), **e} for e in kept],
+    }
+
+
+def parse_digest_response(response: str, aggregated_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a model-generated digest, returning None if it is not valid JSON with events.
+
+    Reasoning blocks and markdown fences around the JSON object are ignored.
+    """
+    start, end = response.find('{', response.find('</think>') + 1), response.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+    events = parsed.get('events') if isinstance(parsed, dict) else None
+    if not isinstance(events, list):
+        return None
+
+    return {
+        'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+        'article_count': len(aggregated_data.get('data', [])),
+        'event_count': len(events),
+        'omitted_events': 0,
+        'events': events,
+    }
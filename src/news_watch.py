@@ -0,0 +1,261 @@
+"""Watch mode: poll the core feeds cheaply and trigger an analysis run on high-impact headlines."""
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+import feedparser
+import httpx
+from rich.console import Console
+from market_data import MAJOR_CURRENCIES, count_pair_mentions
+from rss_fetcher import FEED_HEADERS, RSSFeed
+
+console = Console()
+
+# Fast squawk and economic-data feeds polled in watch mode
+DEFAULT_WATCH_FEEDS = [
+    "ForexLive",
+    "InvestingLive",
+    "FXStreet - News",
+    "Investing.com - Forex News",
+    "Investing.com - Economic Indicators",
+    "Newsquawk",
+]
+
+# Headline keywords of the releases and decisions that move FX on their own
+HIGH_IMPACT_EVENTS = {
+    "Inflation": ["cpi", "consumer price index", "consumer prices", "core inflation", "inflation rate", "pce", "hicp"],
+    "Employment": ["nfp", "nonfarm payrolls", "non-farm payrolls", "jobs report", "unemployment rate", "employment change"],
+    "Rate decision": ["rate decision", "rate hike", "rate cut", "raises rates", "hikes rates", "cuts rates",
+                      "lowers rates", "holds rates", "leaves rates unchanged", "keeps rates unchanged",
+                      "interest rate decision", "fomc statement", "monetary policy statement"],
+    "GDP": ["gdp"],
+    "Retail sales": ["retail sales"],
+    "Intervention": ["intervention", "intervenes", "intervene", "rate check"],
+}
+# Central banks and their heads, with the currency they move
+CENTRAL_BANK_ENTITIES = {
+    "USD": ["fed", "fomc", "federal reserve", "powell"],
+    "EUR": ["ecb", "lagarde"],
+    "GBP": ["boe", "bank of england", "bailey"],
+    "JPY": ["boj", "bank of japan", "ueda", "mof", "ministry of finance"],
+    "CHF": ["snb", "swiss national bank"],
+    "AUD": ["rba", "reserve bank of australia", "bullock"],
+    "CAD": ["boc", "bank of canada", "macklem"],
+    "NZD": ["rbnz", "reserve bank of new zealand"],
+}
+# Countries and regions named in data release headlines
+COUNTRY_CURRENCIES = {
+    "USD": ["us", "u.s.", "united states", "america", "american"],
+    "EUR": ["eurozone", "euro area", "euro zone", "germany", "german", "france", "french", "italy", "spain"],
+    "GBP": ["uk", "u.k.", "britain", "british"],
+    "JPY": ["japan", "japanese", "tokyo"],
+    "CHF": ["swiss", "switzerland"],
+    "AUD": ["australia", "australian"],
+    "CAD": ["canada", "canadian"],
+    "NZD": ["new zealand"],
+}
+# Words that make a central bank headline market-moving even without an event keyword
+SHOCK_WORDS = ["emergency", "unexpectedly", "surprise", "surprises", "shock", "unscheduled"]
+
+
+class _PhraseIndex:
+    """One regex with a named group per key, matching any of the key's phrases as whole words."""
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self._keys = {f"g{i}": key for i, key in enumerate(groups)}
+        alternatives = "|".join(
+            f"(?P<{name}>" + "|".join(re.escape(p) for p in sorted(groups[key], key=len, reverse=True)) + ")"
+            for name, key in self._keys.items()
+        )
+        self._pattern = re.compile(rf"(?<![\w.])(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+    def matches(self, text: str) -> Set[str]:
+        """Keys with at least one phrase in the text."""
+        return {self._keys[m.lastgroup] for m in self._pattern.finditer(text)}
+
+
+class HeadlineClassifier:
+    """Classifies headlines against the high-impact keyword and entity index in one regex pass each."""
+
+    def __init__(self, currencies: Optional[Iterable[str]] = None):
+        """
+        Initialize the classifier.
+
+        Args:
+            currencies: Only headlines affecting these currencies trigger (None = all majors)
+        """
+        self.currencies = set(currencies or MAJOR_CURRENCIES)
+        self._events = _PhraseIndex(HIGH_IMPACT_EVENTS)
+        self._banks = _PhraseIndex(CENTRAL_BANK_ENTITIES)
+        self._countries = _PhraseIndex(COUNTRY_CURRENCIES)
+        self._shock = _PhraseIndex({"shock": SHOCK_WORDS})
+
+    def classify(self, headline: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the event and affected currencies of a high-impact headline, or None.
+
+        A headline is high-impact if it names a key release or decision, or a
+        central bank together with a shock word, and affects a watched currency.
+        """
+        events = self._events.matches(headline)
+        banks = self._banks.matches(headline)
+        if not events and not (banks and self._shock.matches(headline)):
+            return None
+
+        currencies = banks | self._countries.matches(headline)
+        for pair in count_pair_mentions(headline):
+            currencies.update(pair.split("/"))
+        # A release without a recognisable country is attributed to the watched currencies
+        affected = currencies & self.currencies if currencies else set(self.currencies)
+        if not affected:
+            return None
+        return {
+            "event": ", ".join(sorted(events)) or "Central bank",
+            "currencies": sorted(affected),
+            "headline": headline,
+        }
+
+
+class FeedWatcher:
+    """
+    Polls a few feeds with conditional requests and reports headlines not seen before.
+
+    ETag and Last-Modified validators make an unchanged feed a bodiless 304
+    response. The first poll only records the current headlines.
+    """
+
+    def __init__(self, feeds: List[RSSFeed], timeout: float = 15.0, seen_limit: int = 5000):
+        self.feeds = feeds
+        self.timeout = timeout
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._seen: Set[str] = set()
+        self._seen_order: Deque[str] = deque()
+        self._seen_limit = seen_limit
+        self._seeded: Set[str] = set()
+        self.stats = {"polls": 0, "not_modified": 0, "errors": 0}
+
+    def _remember(self, key: str) -> bool:
+        """Record a headline key; returns True if it had not been seen."""
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._seen_order.append(key)
+        if len(self._seen_order) > self._seen_limit:
+            self._seen.discard(self._seen_order.popleft())
+        return True
+
+    async def poll(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        """Poll every feed once and return the new entries (title, link, feed)."""
+        results = await asyncio.gather(*(self._poll_feed(client, feed) for feed in self.feeds))
+        return [entry for entries in results for entry in entries]
+
+    async def _poll_feed(self, client: httpx.AsyncClient, feed: RSSFeed) -> List[Dict[str, Any]]:
+        self.stats["polls"] += 1
+        headers = dict(FEED_HEADERS)
+        validators = self._validators.get(feed.url, {})
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            response = await client.get(feed.url, headers=headers)
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+                return []
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.stats["errors"] += 1
+            console.print(f"[dim]Watch: {feed.name} poll failed: {str(e)}[/dim]")
+            return []
+
+        self._validators[feed.url] = {
+            key: response.headers[header]
+            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+            if header in response.headers
+        }
+        parsed = feedparser.parse(response.text)
+        new_entries = []
+        for entry in parsed.entries:
+            title = entry.get("title", "").strip()
+            key = entry.get("id") or entry.get("link") or title
+            if title and self._remember(key):
+                new_entries.append({"title": title, "link": entry.get("link", ""), "feed": feed.name})
+
+        if feed.url not in self._seeded:
+            self._seeded.add(feed.url)
+            return []
+        return new_entries
+
+
+class NewsWatch:
+    """
+    Triggers an analysis run when a high-impact headline appears.
+
+    The first matching headline opens a short debounce window so follow-up
+    headlines of the same release are covered by one run; after a run is
+    triggered, further triggers are suppressed for the cooldown period.
+    """
+
+    def __init__(self, watcher: FeedWatcher, classifier: HeadlineClassifier,
+                 trigger: Callable[[str], Any], poll_seconds: float = 60.0,
+                 debounce_seconds: float = 45.0, cooldown_seconds: float = 900.0):
+        """
+        Initialize the watch.
+
+        Args:
+            watcher: Feed poller
+            classifier: High-impact headline classifier
+            trigger: Called with a reason string to request a run
+            poll_seconds: Interval between polls
+            debounce_seconds: Delay between the first high-impact headline and the trigger
+            cooldown_seconds: Minimum time between two triggers
+        """
+        self.watcher = watcher
+        self.classifier = classifier
+        self.trigger = trigger
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._matches: List[Dict[str, Any]] = []
+        self._fire_at: Optional[float] = None
+        self._last_trigger = float("-inf")
+
+    async def run(self):
+        """Poll until cancelled."""
+        feed_names = ", ".join(feed.name for feed in self.watcher.feeds)
+        console.print(f"[dim]Watching {feed_names} every {self.poll_seconds:g}s for high-impact headlines[/dim]")
+        async with httpx.AsyncClient(timeout=self.watcher.timeout, follow_redirects=True) as client:
+            next_poll = time.monotonic()
+            while True:
+                if time.monotonic() >= next_poll:
+                    self._observe(await self.watcher.poll(client))
+                    # Poll on a fixed grid, skipping polls missed while this one ran
+                    while next_poll <= time.monotonic():
+                        next_poll += self.poll_seconds
+                if self._fire_at is not None and time.monotonic() >= self._fire_at:
+                    self._fire()
+                wake = min(next_poll, self._fire_at) if self._fire_at is not None else next_poll
+                await asyncio.sleep(max(wake - time.monotonic(), 0))
+
+    def _observe(self, entries: List[Dict[str, Any]]):
+        for entry in entries:
+            match = self.classifier.classify(entry["title"])
+            if match is None:
+                continue
+            match["feed"] = entry["feed"]
+            console.print(f"[bold yellow]⚡ High-impact headline ({match['event']}; "
+                          f"{', '.join(match['currencies'])}):[/bold yellow] {entry['title']} [dim]({entry['feed']})[/dim]")
+            self._matches.append(match)
+            if self._fire_at is None:
+                self._fire_at = max(time.monotonic() + self.debounce_seconds,
+                                    self._last_trigger + self.cooldown_seconds)
+
+    def _fire(self):
+        matches, self._matches, self._fire_at = self._matches, [], None
+        if not matches:
+            return
+        self._last_trigger = time.monotonic()
+        events = ", ".join(dict.fromkeys(match["event"] for match in matches))
+        more = f" (+{len(matches) - 1} more)" if len(matches) > 1 else ""
+        self.trigger(f"news: {events} - {matches[0]['headline'][:80]}{more}")
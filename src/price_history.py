@@ -0,0 +1,277 @@
+"""Persistent per-pair price history and the technical indicators computed from it."""
+import math
+import mmap
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from rich.console import Console
+
+console = Console()
+
+# File layout: header, then `capacity` timestamps and `capacity` prices as float64 ring buffers
+_HEADER = struct.Struct("<4sIQQ")  # magic, capacity, count, head (next write position)
+_HEADER_SIZE = 32
+_MAGIC = b"PHv1"
+_DOUBLE = 8
+
+
+class _RingBuffer:
+    """Memory-mapped ring buffer of (timestamp, price) samples for one pair."""
+
+    def __init__(self, path: Path, capacity: int):
+        self.path = path
+        size = _HEADER_SIZE + 2 * capacity * _DOUBLE
+        existing = self._read_existing(path, capacity)
+        if existing is not None or not path.exists() or path.stat().st_size != size:
+            with open(path, "wb") as f:
+                f.truncate(size)
+
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        body = memoryview(self._map)[_HEADER_SIZE:].cast("d")
+        self.capacity = capacity
+        self.times = body[:capacity]
+        self.prices = body[capacity:]
+        if existing is not None:
+            self.count = self.head = 0
+            self._write_header()
+            for timestamp, price in zip(*existing):
+                self.append(timestamp, price)
+        else:
+            magic, _, self.count, self.head = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                self.count = self.head = 0
+                self._write_header()
+
+    @staticmethod
+    def _read_existing(path: Path, capacity: int) -> Optional[Tuple[array, array]]:
+        """Samples of a file written with a different capacity, which is then rebuilt."""
+        if not path.exists() or path.stat().st_size < _HEADER_SIZE:
+            return None
+        data = path.read_bytes()
+        magic, old_capacity, count, head = _HEADER.unpack_from(data)
+        if magic != _MAGIC or old_capacity == capacity:
+            return None
+        body = memoryview(data)[_HEADER_SIZE:_HEADER_SIZE + 2 * old_capacity * _DOUBLE].cast("d")
+        times, prices = _ordered(body[:old_capacity], count, head), _ordered(body[old_capacity:], count, head)
+        return times[-capacity:], prices[-capacity:]
+
+    def _write_header(self):
+        _HEADER.pack_into(self._map, 0, _MAGIC, self.capacity, self.count, self.head)
+
+    def append(self, timestamp: float, price: float):
+        self.times[self.head] = timestamp
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._write_header()
+
+    def last_time(self) -> Optional[float]:
+        return self.times[self.head - 1] if self.count else None
+
+    def series(self) -> Tuple[array, array]:
+        """Timestamps and prices in chronological order."""
+        return _ordered(self.times, self.count, self.head), _ordered(self.prices, self.count, self.head)
+
+    def close(self):
+        self.times.release()
+        self.prices.release()
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+def _ordered(buffer: memoryview, count: int, head: int) -> array:
+    ordered = array("d")
+    if count < len(buffer):
+        ordered.frombytes(buffer[:count].cast("B"))
+    else:
+        ordered.frombytes(buffer[head:].cast("B"))
+        ordered.frombytes(buffer[:head].cast("B"))
+    return ordered
+
+
+class PriceHistory:
+    """
+    Stores sampled prices per forex pair in fixed-size memory-mapped files.
+
+    Each pair keeps its most recent `capacity` samples; older ones are overwritten.
+    Files are only a few tens of kilobytes, so a full history loads instantly.
+    """
+
+    def __init__(self, root: Union[str, Path], capacity: int = 4096):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one file per pair
+            capacity: Samples kept per pair
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.capacity = max(2, capacity)
+        self._buffers: Dict[str, _RingBuffer] = {}
+
+    def _buffer(self, symbol: str) -> _RingBuffer:
+        if symbol not in self._buffers:
+            path = self.root / f"{symbol.replace('/', '_')}.prices"
+            self._buffers[symbol] = _RingBuffer(path, self.capacity)
+        return self._buffers[symbol]
+
+    def record(self, symbol: str, price: float, timestamp: Optional[float] = None):
+        """Append a price sample; samples not newer than the last one are ignored."""
+        timestamp = time.time() if timestamp is None else timestamp
+        buffer = self._buffer(symbol)
+        last = buffer.last_time()
+        if price > 0 and (last is None or timestamp > last):
+            buffer.append(timestamp, price)
+
+    def series(self, symbol: str) -> Tuple[array, array]:
+        """Timestamps (Unix seconds) and prices of a pair in chronological order."""
+        return self._buffer(symbol).series()
+
+    def indicators(self, symbol: str, bar_seconds: int = 3600) -> Optional[Dict[str, Any]]:
+        """Indicators for a pair's recorded history, or None with fewer than two samples."""
+        return compute_indicators(*self.series(symbol), bar_seconds=bar_seconds)
+
+    def close(self):
+        """Flush and unmap all open files."""
+        for buffer in self._buffers.values():
+            buffer.close()
+        self._buffers.clear()
+
+
+def _bars(times: array, prices: array, bar_seconds: int) -> List[Tuple[float, float, float, float]]:
+    """Aggregate samples into (open, high, low, close) bars of bar_seconds; empty bars are skipped."""
+    bars = []
+    start = 0
+    while start < len(times):
+        # Bar boundaries are found by bisection so the samples are only touched by max/min
+        end = bisect_left(times, (times[start] // bar_seconds + 1) * bar_seconds, start)
+        window = prices[start:end]
+        bars.append((window[0], max(window), min(window), window[-1]))
+        start = end
+    return bars
+
+
+def _ema(values: List[float], period: int) -> float:
+    alpha = 2 / (period + 1)
+    ema = values[0]
+    for value in values[1:]:
+        ema += alpha * (value - ema)
+    return ema
+
+
+def compute_indicators(times: array, prices: array, bar_seconds: int = 3600,
+                       period: int = 14, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Compute technical indicators from sampled prices.
+
+    Samples are aggregated into bars of bar_seconds. Moving averages, ATR and
+    realized volatility use the last `period` bars (fewer while the history is
+    short); the range and change cover the last 24 hours; pivots come from the
+    previous UTC day.
+
+    Returns:
+        Dictionary of indicator values, or None with fewer than two samples
+    """
+    if len(prices) < 2:
+        return None
+    now = times[-1] if now is None else now
+    samples, span_hours = len(prices), round((times[-1] - times[0]) / 3600, 1)
+    # Only the samples the indicators look at: enough bars for the EMA, and the previous UTC day
+    today = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    start = bisect_left(times, min(now - (3 * period + 1) * bar_seconds, today - 86400))
+    start = min(start, len(times) - 2)
+    times, prices = times[start:], prices[start:]
+    bars = _bars(times, prices, bar_seconds)
+    closes = [bar[3] for bar in bars]
+    recent = closes[-period:]
+    last = prices[-1]
+
+    # True range of each bar against the previous close
+    true_ranges = [
+        max(high, prev_close) - min(low, prev_close)
+        for (_, high, low, _), prev_close in zip(bars[1:], closes)
+    ][-period:]
+    window = closes[-period - 1:]
+    returns = [math.log(b / a) for a, b in zip(window, window[1:])]
+
+    day_start = now - 86400
+    first_in_day = min(bisect_left(times, day_start), len(times) - 1)
+    day_prices = prices[first_in_day:]
+    day_high, day_low = max(day_prices), min(day_prices)
+    reference = prices[max(first_in_day - 1, 0)]
+
+    indicators = {
+        'samples': samples,
+        'bars': len(bars),
+        'bar_minutes': bar_seconds // 60,
+        'span_hours': span_hours,
+        'last': last,
+        'period': period,
+        'sma': sum(recent) / len(recent),
+        'sma_short': sum(recent[-(period // 2):]) / len(recent[-(period // 2):]),
+        'ema': _ema(closes[-3 * period:], period),
+        'atr': sum(true_ranges) / len(true_ranges) if true_ranges else None,
+        'realized_vol_pct': None,
+        'change_24h_pct': (last / reference - 1) * 100,
+        'range_24h': (day_low, day_high),
+        'range_position_pct': (last - day_low) / (day_high - day_low) * 100 if day_high > day_low else 50.0,
+        'pivots': None,
+    }
+    if len(returns) >= 2:
+        mean = sum(returns) / len(returns)
+        variance = sum((r - mean) ** 2 for r in returns) / (len(returns) - 1)
+        # Scaled to one day of bars
+        indicators['realized_vol_pct'] = math.sqrt(variance * 86400 / bar_seconds) * 100
+
+    # Classic floor pivots from the previous UTC day's high, low and close
+    previous_day = prices[bisect_left(times, today - 86400):bisect_left(times, today)]
+    if previous_day:
+        high, low, close = max(previous_day), min(previous_day), previous_day[-1]
+        pivot = (high + low + close) / 3
+        indicators['pivots'] = {
+            'S2': pivot - (high - low), 'S1': 2 * pivot - high, 'P': pivot,
+            'R1': 2 * pivot - low, 'R2': pivot + (high - low),
+        }
+    return indicators
+
+
+def format_indicators(symbol: str, indicators: Optional[Dict[str, Any]]) -> str:
+    """Format indicators as a compact block for analyst prompts."""
+    if not indicators:
+        return f"No price history recorded for {symbol} yet; rely on the news and market data."
+
+    decimals = 3 if indicators['last'] > 20 else 5
+
+    def price(value: float) -> str:
+        return f"{value:.{decimals}f}"
+
+    low, high = indicators['range_24h']
+    period = indicators['period']
+    trend = 'above' if indicators['last'] > indicators['sma'] else 'below' if indicators['last'] < indicators['sma'] else 'at'
+    lines = [
+        f"PRICE HISTORY {symbol} ({indicators['samples']} samples over {indicators['span_hours']}h, "
+        f"{indicators['bars']} {indicators['bar_minutes']}-minute bars):",
+        f"- Last {price(indicators['last'])} | 24h change {indicators['change_24h_pct']:+.2f}% | "
+        f"24h range {price(low)}-{price(high)} (price at {indicators['range_position_pct']:.0f}% of range)",
+        f"- SMA{period // 2} {price(indicators['sma_short'])} | SMA{period} {price(indicators['sma'])} | "
+        f"EMA{period} {price(indicators['ema'])} | price {trend} SMA{period}",
+    ]
+    volatility = []
+    if indicators['atr'] is not None:
+        volatility.append(f"ATR {price(indicators['atr'])}")
+    if indicators['realized_vol_pct'] is not None:
+        volatility.append(f"realized volatility {indicators['realized_vol_pct']:.2f}%/day")
+    if volatility:
+        lines.append("- " + " | ".join(volatility))
+    if indicators['pivots']:
+        lines.append("- Pivots (previous UTC day): " + " | ".join(
+            f"{level} {price(value)}" for level, value in indicators['pivots'].items()
+        ))
+    return "\n".join(lines)
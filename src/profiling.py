@@ -0,0 +1,259 @@
+"""Run profiling: per-stage CPU profiles and an event-loop lag monitor that finds blocking calls."""
+import asyncio
+import cProfile
+import collections.abc
+import contextvars
+import io
+import json
+import marshal
+import pstats
+import re
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+# Code outside any stage: the event loop itself, callbacks and tasks not started by a stage
+LOOP_STAGE = "event_loop"
+TOP_FUNCTIONS = 25  # functions listed per stage in the summary
+
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("profiled_stage", default=None)
+_SRC_DIR = str(Path(__file__).resolve().parent)
+
+
+class _StageCoroutine(collections.abc.Coroutine):
+    """Runs every step of a coroutine with its stage's profile active."""
+
+    def __init__(self, profiler: 'RunProfiler', stage: str, coro: Coroutine):
+        self._profiler = profiler
+        self._stage = stage
+        self._coro = coro
+
+    def send(self, value):
+        return self._profiler._step(self._stage, self._coro.send, value)
+
+    def throw(self, typ, val=None, tb=None):
+        if val is None and tb is None:
+            return self._profiler._step(self._stage, self._coro.throw, typ)
+        return self._profiler._step(self._stage, self._coro.throw, typ, val, tb)
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+
+class LoopLagMonitor:
+    """
+    Detects callbacks that block the event loop.
+
+    A heartbeat task wakes every interval; a watchdog thread notices when it is
+    late by more than the threshold and captures the loop thread's stack at that
+    moment, which points at the blocking call. The stall's full length is
+    measured when the heartbeat finally runs.
+    """
+
+    def __init__(self, threshold: float = 0.1, stage_of: Optional[Callable[[], str]] = None):
+        self.threshold = threshold
+        self.interval = max(threshold / 4, 0.005)
+        self.stalls: List[Dict[str, Any]] = []
+        self._stage_of = stage_of
+        self._origin = time.monotonic()
+        self._expected = 0.0  # monotonic time the next heartbeat is due
+        self._captured: Optional[Dict[str, Any]] = None  # stack captured for the current late heartbeat
+        self._loop_thread: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start monitoring the running event loop."""
+        self._origin = time.monotonic()
+        self._loop_thread = threading.get_ident()
+        self._expected = time.monotonic() + self.interval
+        self._stop.clear()
+        self._heartbeat = asyncio.get_running_loop().create_task(self._beat(), name="loop-lag-heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop monitoring; must be called from the monitored event loop."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join()
+        self._heartbeat = self._watchdog = None
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            late = now - self._expected
+            captured, self._captured = self._captured, None
+            if late >= self.threshold:
+                self.stalls.append({
+                    "at_s": round(self._expected - self._origin, 3),
+                    "duration_s": round(late, 3),
+                    **(captured or {"stage": None, "call_site": None, "stack": []}),
+                })
+            self._expected = now + self.interval
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._captured is None and time.monotonic() - self._expected >= self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = _callback_stack(frame) if frame is not None else []
+                self._captured = {
+                    "stage": self._stage_of() if self._stage_of else None,
+                    "call_site": _call_site(stack),
+                    "stack": [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in stack],
+                }
+
+
+def _callback_stack(frame) -> List[traceback.FrameSummary]:
+    """The stack of the callback running on the loop, without the event loop's own frames."""
+    stack = traceback.extract_stack(frame)
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index].name == "_run" and stack[index].filename.endswith(("events.py",)):
+            return stack[index + 1:]
+    return stack[-15:]
+
+
+def _call_site(stack: List[traceback.FrameSummary]) -> Optional[str]:
+    """The innermost frame in this project's code, where the blocking call was made."""
+    for entry in reversed(stack):
+        if entry.filename.startswith(_SRC_DIR) and not entry.filename.endswith("profiling.py"):
+            return f"{Path(entry.filename).name}:{entry.lineno} in {entry.name}"
+    return f"{Path(stack[-1].filename).name}:{stack[-1].lineno} in {stack[-1].name}" if stack else None
+
+
+class RunProfiler:
+    """
+    Profiles one workflow run on its event loop.
+
+    Each stage gets its own cProfile profile, active only while the stage's code
+    holds the event loop: coroutines wrapped with stage() and the tasks they
+    start. Everything else (the loop itself, other callbacks) is profiled as
+    "event_loop". An event-loop lag monitor runs alongside.
+    """
+
+    def __init__(self, lag_threshold: float = 0.1):
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.busy: Dict[str, float] = {}  # seconds each stage held the event loop
+        self.cpu: Dict[str, float] = {}  # CPU seconds of the loop thread per stage
+        self.steps: Dict[str, int] = {}
+        self.lag = LoopLagMonitor(lag_threshold, stage_of=lambda: self._active_stage)
+        self._running = False
+        self._active_stage: Optional[str] = None
+        self._switched_at = (0.0, 0.0)
+        self._previous_factory = None
+
+    def start(self):
+        """Start profiling the running event loop."""
+        loop = asyncio.get_running_loop()
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+        self._running = True
+        self._switch(LOOP_STAGE)
+        self.lag.start()
+
+    def stop(self):
+        """Stop profiling; must be called from the profiled event loop."""
+        self.lag.stop()
+        self._switch(None)
+        self._running = False
+        asyncio.get_running_loop().set_task_factory(self._previous_factory)
+
+    def stage(self, name: str, coro: Coroutine) -> Coroutine:
+        """Wrap a coroutine so its steps, and the tasks it starts, are profiled as the given stage."""
+        return _StageCoroutine(self, name, coro)
+
+    def _task_factory(self, loop, coro, **kwargs):
+        # Tasks inherit the stage of the code that created them (contextvars are copied into tasks)
+        stage = _current_stage.get()
+        if stage is not None and self._running:
+            coro = _StageCoroutine(self, stage, coro)
+        if self._previous_factory is not None:
+            return self._previous_factory(loop, coro, **kwargs)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    def _step(self, stage: str, method, *args):
+        if not self._running:
+            return method(*args)
+        outer = self._active_stage
+        token = _current_stage.set(stage)
+        self._switch(stage)
+        self.steps[stage] = self.steps.get(stage, 0) + 1
+        try:
+            return method(*args)
+        finally:
+            _current_stage.reset(token)
+            if self._running:
+                self._switch(outer)
+
+    def _switch(self, stage: Optional[str]):
+        """Charge the time since the last switch to the active stage and activate another one."""
+        now = (time.perf_counter(), time.thread_time())
+        if self._active_stage is not None:
+            self.profiles[self._active_stage].disable()
+            self.busy[self._active_stage] = self.busy.get(self._active_stage, 0.0) + now[0] - self._switched_at[0]
+            self.cpu[self._active_stage] = self.cpu.get(self._active_stage, 0.0) + now[1] - self._switched_at[1]
+        self._active_stage = stage
+        self._switched_at = now
+        if stage is not None:
+            self.profiles.setdefault(stage, cProfile.Profile()).enable()
+
+    def files(self, run_id: str) -> Dict[str, bytes]:
+        """
+        The profiling output of a stopped profiler.
+
+        Returns:
+            File contents by name: <stage>.prof (pstats format, e.g. for snakeviz),
+            stalls.json and a readable summary.txt
+        """
+        files = {}
+        summary = io.StringIO()
+        summary.write(f"Profile of run {run_id}\n\n")
+        summary.write("Event loop time by stage (busy: the stage's code held the loop; "
+                      f"{LOOP_STAGE} includes idle waits)\n")
+        for stage in sorted(self.busy, key=self.busy.get, reverse=True):
+            summary.write(f"  {stage:<32} busy {self.busy[stage]:8.3f}s  cpu {self.cpu[stage]:8.3f}s  "
+                          f"steps {self.steps.get(stage, 0)}\n")
+
+        summary.write(f"\nEvent loop stalls >= {self.lag.threshold * 1000:.0f} ms: {len(self.lag.stalls)}\n")
+        for stall in sorted(self.lag.stalls, key=lambda stall: stall["duration_s"], reverse=True):
+            summary.write(f"  +{stall['at_s']:.2f}s  blocked {stall['duration_s']:.3f}s  [{stall['stage']}]  "
+                          f"{stall['call_site']}\n")
+            for line in stall["stack"][-8:]:
+                summary.write(f"      {line}\n")
+
+        for stage, profile in self.profiles.items():
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            files[f"{_filename(stage)}.prof"] = marshal.dumps(profile.stats)
+            summary.write(f"\n== {stage}: top {TOP_FUNCTIONS} functions by cumulative time ==\n")
+            pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+        files["stalls.json"] = json.dumps(self.lag.stalls, indent=2).encode("utf-8")
+        files["summary.txt"] = summary.getvalue().encode("utf-8")
+        return files
+
+
+def profiled(profiler: Optional[RunProfiler], stage: str, coro: Coroutine) -> Coroutine:
+    """The coroutine, wrapped to be profiled as the stage when a profiler is given."""
+    return coro if profiler is None else profiler.stage(stage, coro)
+
+
+def _filename(stage: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", stage)
@@ -0,0 +1,93 @@
+"""Compaction of analyst reports before they are forwarded to the next tier."""
+import math
+import re
+from typing import Optional
+
+# Reasoning traces emitted by deepseek-r1 style models; an unclosed block runs to the end
+_REASONING_PATTERN = re.compile(r'<think>.*?(?:</think>|\Z)', re.DOTALL | re.IGNORECASE)
+# A closing tag without an opening one only ends a reasoning trace near the start; later it is quoted text
+_ORPHAN_CLOSE_PATTERN = re.compile(r'^.{0,4000}?</think>', re.DOTALL | re.IGNORECASE)
+
+# Lines that carry no information for the next tier
+_BOILERPLATE_PATTERNS = [
+    re.compile(r'^\s*[-=_*─━═~#]{3,}\s*$'),  # separators and horizontal rules
+    re.compile(r'^\s*(?:here(?:\'s| is) (?:my|the) (?:analysis|report|assessment)).*:\s*$', re.IGNORECASE),
+    re.compile(r'^\s*(?:i hope this helps|let me know if|feel free to|please note that this is not financial advice).*$',
+               re.IGNORECASE),
+    re.compile(r'^\s*(?:disclaimer|note)\s*:.*not (?:financial|investment) advice.*$', re.IGNORECASE),
+]
+# Leading pleasantry; the rest of the line is kept ("Certainly, EUR/USD will retest 1.0850")
+_PLEASANTRY_PATTERN = re.compile(r'^\s*(?:sure|certainly|of course|absolutely)[,!.]\s*', re.IGNORECASE)
+_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+_SENTENCE_END_PATTERN = re.compile(r'[.!?](?=\s)')
+
+SUMMARY_PROMPT = """Condense the analyst report below to at most {max_chars} characters for a senior trading manager.
+
+Keep: direction and confidence, exact times (UTC), price levels, key events and the evidence cited, risks.
+Drop: reasoning steps, repetition, pleasantries and formatting.
+Output only the condensed report.
+
+{{ JSON.stringify($json.data, null, 2) }}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for compaction statistics."""
+    return math.ceil(len(text) / 4)
+
+
+def strip_reasoning(text: str) -> str:
+    """Remove <think> reasoning blocks, including unterminated ones."""
+    text = _REASONING_PATTERN.sub('', text)
+    # Some runtimes drop the opening tag and only emit "...</think>"
+    return _ORPHAN_CLOSE_PATTERN.sub('', text, count=1).strip()
+
+
+def remove_boilerplate(text: str) -> str:
+    """Drop separator lines, pleasantries and disclaimers, and collapse blank lines."""
+    lines = []
+    for line in text.splitlines():
+        stripped = _PLEASANTRY_PATTERN.sub('', line, count=1)
+        if stripped != line and not stripped.strip():
+            continue
+        if not any(pattern.match(stripped) for pattern in _BOILERPLATE_PATTERNS):
+            lines.append(stripped.rstrip())
+    return _BLANK_LINES_PATTERN.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def truncate_report(text: str, max_chars: int) -> str:
+    """Cut a report to at most max_chars, preferring paragraph then sentence boundaries."""
+    if len(text) <= max_chars:
+        return text
+
+    marker = ' […]'
+    head = text[:max_chars - len(marker)]
+    cut = head.rfind('\n\n')
+    if cut < max_chars // 2:
+        sentence_ends = [m.end() for m in _SENTENCE_END_PATTERN.finditer(head)]
+        cut = sentence_ends[-1] if sentence_ends else -1
+    if cut < max_chars // 2:
+        cut = len(head)
+    return head[:cut].rstrip() + marker
+
+
+def compact_report(text: str, strip_reasoning_blocks: bool = True, strip_boilerplate: bool = True,
+                   max_chars: Optional[int] = None) -> str:
+    """
+    Apply the deterministic compaction steps to a report.
+
+    Args:
+        text: Report text as produced by the model
+        strip_reasoning_blocks: Remove <think> reasoning traces
+        strip_boilerplate: Remove separators, pleasantries and disclaimers
+        max_chars: Optional hard length limit
+
+    Returns:
+        The compacted report
+    """
+    if strip_reasoning_blocks:
+        text = strip_reasoning(text)
+    if strip_boilerplate:
+        text = remove_boilerplate(text)
+    if max_chars:
+        text = truncate_report(text, max_chars)
+    return text
@@ -2,7 +2,7 @@
 import feedparser
 import asyncio
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from urllib.parse import urlparse
 from collections import defaultdict
 from rich.console import Console
@@ -16,8 +16,12 @@ MAX_CONCURRENT_PER_DOMAIN = 2  # Max simultaneous requests per domain
 REQUEST_DELAY_MIN = 0.1  # Minimum delay between requests (seconds)
 REQUEST_DELAY_MAX = 0.3  # Maximum delay between requests (seconds)
 
-# Global domain semaphores
-_domain_semaphores = defaultdict(lambda: asyncio.Semaphore(MAX_CONCURRENT_PER_DOMAIN))
+# Browser-like headers; some publishers reject unknown clients
+FEED_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+}
+
 
 
 class RSSFeed:
@@ -28,28 +32,35 @@ class RSSFeed:
         self.url = url
         self.domain = urlparse(url).netloc
     
-    async def fetch_async(self) -> List[Dict[str, Any]]:
-        """Fetch and parse the RSS feed asynchronously with per-domain rate limiting."""
+    async def fetch_async(self, client: Optional[httpx.AsyncClient] = None,
+                          semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch and parse the RSS feed asynchronously with per-domain rate limiting.
+        
+        Args:
+            client: Shared HTTP client (a temporary one is used if None)
+            semaphore: Semaphore limiting concurrent requests to this feed's domain
+        """
         # Add random delay to spread out requests
         await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
         
+        if client is None:
+            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as own_client:
+                return await self._do_fetch(own_client)
+        
         # Use per-domain semaphore to limit concurrent requests to same domain
-        semaphore = _domain_semaphores[self.domain]
+        if semaphore is None:
+            return await self._do_fetch(client)
         async with semaphore:
-            return await self._do_fetch()
+            return await self._do_fetch(client)
     
-    async def _do_fetch(self) -> List[Dict[str, Any]]:
+    async def _do_fetch(self, client: httpx.AsyncClient) -> List[Dict[str, Any]]:
         """Internal method to perform the actual fetch."""
         try:
             # Fetch the feed content asynchronously with custom headers
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-            }
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(self.url, headers=headers)
-                response.raise_for_status()
-                feed_content = response.text
+            response = await client.get(self.url, headers=FEED_HEADERS)
+            response.raise_for_status()
+            feed_content = response.text
             
             # Parse with feedparser (synchronous but fast)
             feed = feedparser.parse(feed_content)
@@ -265,12 +276,37 @@ class RSSFeedAggregator:
             RSSFeed("Credit Writedowns", "https://www.creditwritedowns.com/feed"),
         ]
     
+        # One client and set of domain semaphores per event loop, reused across fetches
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client, recreated (with fresh semaphores) when called from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+            self._client_loop = loop
+            self._domain_semaphores = defaultdict(lambda: asyncio.Semaphore(MAX_CONCURRENT_PER_DOMAIN))
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = self._client_loop = None
+    
     def fetch_all(self) -> Dict[str, List[Dict[str, Any]]]:
         """Fetch all RSS feeds concurrently and return aggregated data."""
-        return asyncio.run(self._fetch_all_async())
+        async def fetch_and_close():
+            try:
+                return await self.fetch_all_async()
+            finally:
+                await self.aclose()
+        return asyncio.run(fetch_and_close())
     
-    async def _fetch_all_async(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Internal async method to fetch all feeds concurrently with per-domain rate limiting."""
+    async def fetch_all_async(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch all feeds concurrently with per-domain rate limiting on the running event loop."""
         all_entries = []
         results = {}
         
@@ -286,7 +322,8 @@ class RSSFeedAggregator:
             
             # Create tasks for all feeds with per-domain rate limiting
             console.print(f"[dim]Fetching {len(self.feeds)} feeds from {len(domains)} domains (max {MAX_CONCURRENT_PER_DOMAIN} per domain)...[/dim]")
-            feed_tasks = [feed.fetch_async() for feed in self.feeds]
+            client = self._get_client()
+            feed_tasks = [feed.fetch_async(client, self._domain_semaphores[feed.domain]) for feed in self.feeds]
             
             # Fetch all feeds concurrently with per-domain rate limiting
             feed_results = await asyncio.gather(*feed_tasks, return_exceptions=True)
@@ -0,0 +1,376 @@
+"""Per-run report archive written by a background thread, with an index and retention policy."""
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from rich.console import Console
+
+console = Console()
+
+INDEX_FILENAME = "index.jsonl"
+
+
+class RunArchive:
+    """
+    Stores every pipeline run as one compressed JSONL file plus an index entry.
+
+    All file I/O happens on a single writer thread, so callers on the event
+    loop only enqueue records and never block on disk.
+    """
+
+    def __init__(self, root: Path, retention_runs: Optional[int] = 200, retention_days: Optional[float] = 30,
+                 history: Optional[Any] = None):
+        """
+        Initialize the archive and start its writer thread.
+
+        Args:
+            root: Directory holding the run files and index
+            retention_runs: Keep at most this many runs (None keeps all)
+            retention_days: Delete runs older than this many days (None keeps all)
+            history: Optional RunHistory that every finished run is ingested into
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.retention_runs = retention_runs
+        self.retention_days = retention_days
+        self.history = history
+        self._queue: queue.Queue = queue.Queue()
+        self._issued_ids = set()
+        self._open_runs: Dict[str, Dict[str, Any]] = {}  # only touched by the writer thread
+        self._thread = threading.Thread(target=self._writer_loop, name="run-archive-writer", daemon=True)
+        self._thread.start()
+
+    def begin_run(self, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Start a new run and return its id."""
+        base_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id, suffix = base_id, 1
+        while run_id in self._issued_ids or (self.root / f"run_{run_id}.jsonl.gz").exists():
+            suffix += 1
+            run_id = f"{base_id}_{suffix}"
+        self._issued_ids.add(run_id)
+        self._queue.put(("begin", run_id, {
+            "type": "run_start",
+            "run_id": run_id,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            **(metadata or {})
+        }))
+        return run_id
+
+    def write_report(self, run_id: str, stage: str, name: str, role: str, content: str,
+                     order: Optional[int] = None, **extra: Any):
+        """Queue an analyst report for the run file."""
+        self.write_record(run_id, "report", stage=stage, name=name, role=role, order=order,
+                          content=content, **extra)
+
+    def write_record(self, run_id: str, record_type: str, **fields: Any):
+        """Queue an arbitrary record (digest, consensus, metrics...) for the run file."""
+        self._queue.put(("record", run_id, {
+            "type": record_type,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            **fields
+        }))
+
+    def write_metrics(self, run_id: str, metrics: Dict[str, Any]):
+        """Queue the run's telemetry, written as metrics_<run_id>.json next to the run file."""
+        self._queue.put(("metrics", run_id, metrics))
+
+    def write_profile(self, run_id: str, files: Dict[str, bytes]):
+        """Queue the run's profiling output, written to the profile_<run_id> directory next to the run file."""
+        self._queue.put(("profile", run_id, files))
+
+    def write_checkpoint(self, run_id: str, record_type: str, **fields: Any):
+        """Queue a record for the run's checkpoint, which is synced to disk and kept until the run finishes."""
+        self._queue.put(("checkpoint", run_id, {"type": record_type, **fields}))
+
+    def finish_run(self, run_id: str, summary_text: str, index_fields: Optional[Dict[str, Any]] = None,
+                   keep_checkpoint: bool = False):
+        """
+        Queue the final summary, close the run file, update the index and apply retention.
+
+        The run's checkpoint (and that of the run it resumed) is deleted unless keep_checkpoint
+        is set, e.g. because some calls failed and the run can still be resumed.
+        """
+        self._queue.put(("finish", run_id, {
+            "summary_text": summary_text,
+            "index_fields": index_fields or {},
+            "keep_checkpoint": keep_checkpoint
+        }))
+
+    def abort_run(self, run_id: str):
+        """
+        Queue closing the run file of a run that did not finish, e.g. because it was interrupted.
+
+        The run is not indexed and its checkpoint is kept for a later --resume. Does nothing
+        if the run already finished.
+        """
+        self._queue.put(("abort", run_id, {}))
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending records and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def latest_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the checkpoint of the most recently interrupted (or partly failed) run.
+
+        Returns:
+            None if there is none, otherwise a dict with the run_id, the aggregated_data and
+            instruments of the run, the contexts (market data and indicators per instrument)
+            and the nodes (input_hash, output and raw_output per completed call)
+        """
+        paths = list(self.root.glob("checkpoint_*.jsonl"))
+        if not paths:
+            return None
+        path = max(paths, key=lambda p: p.stat().st_mtime)
+        checkpoint = {"run_id": path.stem[len("checkpoint_"):], "aggregated_data": None, "instruments": [],
+                      "contexts": {}, "nodes": {}}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a record cut off by the interruption
+                if record["type"] == "run":
+                    checkpoint["aggregated_data"] = record["aggregated_data"]
+                    checkpoint["instruments"] = record["instruments"]
+                elif record["type"] == "context":
+                    context = checkpoint["contexts"].setdefault(record["instrument"], {})
+                    context.update({key: record[key] for key in ("market_data", "price_indicators") if key in record})
+                elif record["type"] == "node":
+                    checkpoint["nodes"][record["name"]] = {
+                        key: record[key] for key in ("input_hash", "output", "raw_output", "cascade") if key in record
+                    }
+        return checkpoint if checkpoint["aggregated_data"] is not None else None
+
+    def load_index(self) -> List[Dict[str, Any]]:
+        """Return the index entries of all archived runs, oldest first."""
+        index_path = self.root / INDEX_FILENAME
+        if not index_path.exists():
+            return []
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def read_run(self, run_id: str) -> List[Dict[str, Any]]:
+        """
+        Read all records of a run.
+
+        Runs interrupted before finishing may have a truncated file; the records
+        written before the interruption are still returned.
+        """
+        records = []
+        try:
+            with gzip.open(self.root / f"run_{run_id}.jsonl.gz", 'rt', encoding='utf-8') as f:
+                for line in f:
+                    records.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            pass
+        return records
+
+    def export_run(self, run_id: str, destination: Path) -> Path:
+        """
+        Write a run's reports as the classic per-tier text files under destination/run_id.
+        
+        Runs covering several instruments get one subfolder per instrument (e.g. EUR_USD/).
+        """
+        target = Path(destination) / run_id
+        records = self.read_run(run_id)
+        instruments = {record.get("instrument") for record in records if record["type"] == "report"}
+        for record in records:
+            if record["type"] == "report":
+                safe_name = "".join(c if c.isalnum() or c in (' ', '_', '-') else '_' for c in record["name"])
+                safe_name = safe_name.replace(' ', '_')
+                prefix = f"{record['order']:02d}_" if record.get("order") is not None else ""
+                folder = target / (record.get("folder") or record["stage"])
+                if len(instruments) > 1:
+                    folder = target / str(record.get("instrument")).replace('/', '_') / folder.name
+                filepath = folder / f"{prefix}{safe_name}.txt"
+                filepath.parent.mkdir(parents=True, exist_ok=True)
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(f"{'='*80}\n")
+                    f.write(f"{record['name']}\n")
+                    f.write(f"Role: {record['role']}\n")
+                    f.write(f"Timestamp: {record['timestamp']}\n")
+                    f.write(f"{'='*80}\n\n")
+                    f.write(record["content"])
+            elif record["type"] == "summary":
+                target.mkdir(parents=True, exist_ok=True)
+                with open(target / "FINAL_SUMMARY.txt", 'w', encoding='utf-8') as f:
+                    f.write(record["content"])
+        return target
+
+    def _writer_loop(self):
+        """Consume queued operations until close() is called."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    for state in self._open_runs.values():
+                        state["file"].close()
+                    self._open_runs.clear()
+                    return
+                operation, run_id, payload = item
+                if operation == "begin":
+                    self._begin(run_id, payload)
+                elif operation == "record":
+                    self._write(run_id, payload)
+                elif operation == "metrics":
+                    self._write_metrics(run_id, payload)
+                elif operation == "profile":
+                    self._write_profile(run_id, payload)
+                elif operation == "checkpoint":
+                    self._write_checkpoint(run_id, payload)
+                elif operation == "finish":
+                    self._finish(run_id, payload)
+                elif operation == "abort":
+                    self._abort(run_id)
+            except Exception as e:
+                console.print(f"[red]Error writing run archive: {str(e)}[/red]")
+            finally:
+                self._queue.task_done()
+
+    def _begin(self, run_id: str, record: Dict[str, Any]):
+        self._open_runs[run_id] = {
+            "file": gzip.open(self.root / f"run_{run_id}.jsonl.gz", 'wt', encoding='utf-8'),
+            "started_at": record["started_at"],
+            "reports": {},
+            "resumed_from": record.get("resumed_from"),
+        }
+        self._write(run_id, record)
+
+    def _write(self, run_id: str, record: Dict[str, Any]):
+        state = self._open_runs[run_id]
+        state["file"].write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        state["file"].flush()  # sync-flush so an interrupted run stays readable
+        if record["type"] == "report":
+            state["reports"][record["stage"]] = state["reports"].get(record["stage"], 0) + 1
+
+    def _write_metrics(self, run_id: str, metrics: Dict[str, Any]):
+        filename = f"metrics_{run_id}.json"
+        with open(self.root / filename, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2, ensure_ascii=False, default=str)
+        self._open_runs[run_id]["metrics"] = filename
+
+    def _write_checkpoint(self, run_id: str, record: Dict[str, Any]):
+        with open(self.root / f"checkpoint_{run_id}.jsonl", 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())  # a checkpoint must survive a crash of the machine, not just the process
+
+    def _write_profile(self, run_id: str, files: Dict[str, bytes]):
+        directory = self.root / f"profile_{run_id}"
+        directory.mkdir(exist_ok=True)
+        for filename, content in files.items():
+            (directory / filename).write_bytes(content)
+
+    def _finish(self, run_id: str, payload: Dict[str, Any]):
+        self._write(run_id, {
+            "type": "summary",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "content": payload["summary_text"]
+        })
+        state = self._open_runs.pop(run_id)
+        state["file"].close()
+        if state["resumed_from"]:
+            (self.root / f"checkpoint_{state['resumed_from']}.jsonl").unlink(missing_ok=True)
+        if not payload["keep_checkpoint"]:
+            (self.root / f"checkpoint_{run_id}.jsonl").unlink(missing_ok=True)
+
+        # Human-readable copy of the final summary next to the archive
+        summary_file = f"FINAL_SUMMARY_{run_id}.txt"
+        with open(self.root / summary_file, 'w', encoding='utf-8') as f:
+            f.write(payload["summary_text"])
+
+        entry = {
+            "run_id": run_id,
+            "started_at": state["started_at"],
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "archive": f"run_{run_id}.jsonl.gz",
+            "summary": summary_file,
+            **({"metrics": state["metrics"]} if "metrics" in state else {}),
+            "reports": state["reports"],
+            **payload["index_fields"]
+        }
+        with open(self.root / INDEX_FILENAME, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        # Ingest before retention runs; the history database is never pruned
+        if self.history is not None:
+            try:
+                self.history.ingest_run(entry, self.read_run(run_id))
+            except Exception as e:
+                console.print(f"[red]Error updating run history: {str(e)}[/red]")
+
+        self._apply_retention()
+
+    def _abort(self, run_id: str):
+        if run_id not in self._open_runs:
+            return
+        self._write(run_id, {"type": "interrupted", "timestamp": datetime.now().isoformat(timespec="seconds")})
+        self._open_runs.pop(run_id)["file"].close()
+
+    def _apply_retention(self):
+        """Delete runs beyond the configured count or age, and checkpoints beyond the age, and rewrite the index."""
+        if self.retention_days is not None:
+            cutoff_time = time.time() - self.retention_days * 86400
+            for path in self.root.glob("checkpoint_*.jsonl"):
+                if path.stat().st_mtime < cutoff_time:
+                    path.unlink(missing_ok=True)
+
+        entries = self.load_index()
+        keep = entries
+        if self.retention_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat(timespec="seconds")
+            keep = [entry for entry in keep if entry["started_at"] >= cutoff]
+        if self.retention_runs is not None:
+            keep = keep[-self.retention_runs:] if self.retention_runs > 0 else []
+
+        if len(keep) == len(entries):
+            return
+        kept_ids = {entry["run_id"] for entry in keep}
+        for entry in entries:
+            if entry["run_id"] not in kept_ids:
+                for filename in (entry["archive"], entry.get("summary"), entry.get("metrics")):
+                    if filename:
+                        (self.root / filename).unlink(missing_ok=True)
+                shutil.rmtree(self.root / f"profile_{entry['run_id']}", ignore_errors=True)
+
+        index_path = self.root / INDEX_FILENAME
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in keep:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        tmp_path.replace(index_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect archived analysis runs")
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent / "reports" / "runs"),
+                        help="Archive directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List archived runs")
+    export_parser = subparsers.add_parser("export", help="Export a run as per-tier text files")
+    export_parser.add_argument("run_id")
+    export_parser.add_argument("--dest", default=str(Path(__file__).parent.parent / "reports" / "export"))
+    args = parser.parse_args()
+
+    archive = RunArchive(Path(args.root), retention_runs=None, retention_days=None)
+    if args.command == "list":
+        for entry in archive.load_index():
+            counts = ", ".join(f"{stage}: {count}" for stage, count in entry["reports"].items())
+            console.print(f"{entry['run_id']}  {entry['started_at']}  {counts}")
+    else:
+        console.print(f"[green]✓[/green] Exported to {archive.export_run(args.run_id, Path(args.dest))}")
+    archive.close()
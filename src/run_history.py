@@ -0,0 +1,374 @@
+"""Queryable run history stored in SQLite with FTS5 full-text indexes."""
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+from rich.console import Console
+from rich.table import Table
+from consensus import extract_direction
+
+console = Console()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    instrument TEXT,
+    mode TEXT,
+    article_count INTEGER,
+    duration_s REAL,
+    market_data TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_instrument ON runs(instrument, started_at);
+
+CREATE TABLE IF NOT EXISTS outputs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    name TEXT NOT NULL,
+    role TEXT,
+    model TEXT,
+    position INTEGER,
+    is_final INTEGER NOT NULL DEFAULT 0,
+    instrument TEXT,
+    direction TEXT,
+    duration_s REAL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outputs_run ON outputs(run_id);
+CREATE INDEX IF NOT EXISTS idx_outputs_name_direction ON outputs(name, direction);
+CREATE VIRTUAL TABLE IF NOT EXISTS outputs_fts USING fts5(content, content='outputs', content_rowid='id');
+
+CREATE TABLE IF NOT EXISTS cascades (
+    output_id INTEGER PRIMARY KEY REFERENCES outputs(id) ON DELETE CASCADE,
+    first_model TEXT NOT NULL,
+    escalated INTEGER NOT NULL,
+    reason TEXT,
+    confidence REAL,
+    first_direction TEXT
+);
+
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    title TEXT,
+    published TEXT,
+    snippet TEXT
+);
+CREATE TABLE IF NOT EXISTS run_articles (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    article_id INTEGER NOT NULL REFERENCES articles(id),
+    PRIMARY KEY (run_id, article_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, snippet, content='articles', content_rowid='id');
+"""
+
+
+def _fts_query(text: str) -> str:
+    """Quote each search term so punctuation such as EUR/USD is not parsed as FTS syntax."""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class RunHistory:
+    """Stores archived runs in SQLite and answers queries over past decisions."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before multi-instrument runs lack the per-output instrument
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(outputs)")}
+            if "instrument" not in columns:
+                conn.execute("ALTER TABLE outputs ADD COLUMN instrument TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per call keeps the class safe to use from the archive writer thread
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            # The connection's own context manager commits (or rolls back) but leaves it open
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ingest_run(self, index_entry: Dict[str, Any], records: List[Dict[str, Any]]) -> bool:
+        """
+        Store one archived run.
+
+        Args:
+            index_entry: The run's entry from the archive index
+            records: All records of the run file
+
+        Returns:
+            False if the run was already stored, True otherwise
+        """
+        start = next((r for r in records if r["type"] == "run_start"), {})
+        market_data = next((r["content"] for r in records if r["type"] == "market_data"), start.get("market_data"))
+        summary = next((r["content"] for r in records if r["type"] == "summary"), None)
+
+        with self._connect() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at, finished_at, instrument, mode, article_count, "
+                "duration_s, market_data, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    index_entry["run_id"],
+                    index_entry["started_at"],
+                    index_entry.get("finished_at"),
+                    index_entry.get("instrument", start.get("instrument")),
+                    index_entry.get("mode", start.get("mode")),
+                    start.get("article_count"),
+                    index_entry.get("duration_s"),
+                    json.dumps(market_data, default=str) if market_data else None,
+                    summary,
+                )
+            ).rowcount
+            if not inserted:
+                return False
+
+            for record in records:
+                if record["type"] == "report":
+                    cursor = conn.execute(
+                        "INSERT INTO outputs (run_id, stage, name, role, model, position, is_final, instrument, "
+                        "direction, duration_s, content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            index_entry["run_id"], record["stage"], record["name"], record.get("role"),
+                            record.get("model"), record.get("order"), int(bool(record.get("final"))),
+                            record.get("instrument"), extract_direction(record["content"]),
+                            record.get("duration_s"), record["content"],
+                        )
+                    )
+                    conn.execute("INSERT INTO outputs_fts (rowid, content) VALUES (?, ?)",
+                                 (cursor.lastrowid, record["content"]))
+                    cascade = record.get("cascade")
+                    if cascade:
+                        conn.execute(
+                            "INSERT INTO cascades (output_id, first_model, escalated, reason, confidence, "
+                            "first_direction) VALUES (?, ?, ?, ?, ?, ?)",
+                            (cursor.lastrowid, cascade["model"], int(cascade["escalated"]), cascade.get("reason"),
+                             cascade.get("confidence"), cascade.get("direction"))
+                        )
+                elif record["type"] == "inputs":
+                    self._ingest_articles(conn, index_entry["run_id"], record.get("articles", []))
+        return True
+
+    def _ingest_articles(self, conn: sqlite3.Connection, run_id: str, articles: List[Dict[str, Any]]):
+        # Articles are deduplicated by link; runs only reference them
+        for article in articles:
+            link = article.get("link") or article.get("guid")
+            if not link:
+                continue
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO articles (link, title, published, snippet) VALUES (?, ?, ?, ?)",
+                (link, article.get("title"), article.get("pubDate"), (article.get("contentSnippet") or "")[:1000])
+            )
+            if cursor.rowcount:
+                article_id = cursor.lastrowid
+                conn.execute("INSERT INTO articles_fts (rowid, title, snippet) VALUES (?, ?, ?)",
+                             (article_id, article.get("title"), (article.get("contentSnippet") or "")[:1000]))
+            else:
+                article_id = conn.execute("SELECT id FROM articles WHERE link = ?", (link,)).fetchone()[0]
+            conn.execute("INSERT OR IGNORE INTO run_articles (run_id, article_id) VALUES (?, ?)", (run_id, article_id))
+
+    def search(self, text: Optional[str] = None, name: Optional[str] = None, stage: Optional[str] = None,
+               direction: Optional[str] = None, instrument: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               final_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Find analyst outputs matching all given filters, newest first.
+
+        Args:
+            text: Full-text query over the output content
+            name: Analyst/manager/committee name (case-insensitive substring)
+            stage: Stage name, e.g. executive_committees
+            direction: long, short, neutral or no_trade
+            instrument: Instrument of the run, e.g. EUR/USD
+            since: Earliest run start (ISO date or datetime)
+            until: Latest run start (ISO date or datetime)
+            final_only: Only outputs of the final (terminal) stage
+            limit: Maximum number of rows
+
+        Returns:
+            List of matching outputs with run metadata and a content snippet
+        """
+        clauses, params = [], []
+        if text:
+            snippet = "snippet(outputs_fts, 0, '[', ']', '…', 16)"
+            source = "outputs_fts JOIN outputs o ON o.id = outputs_fts.rowid"
+            clauses.append("outputs_fts MATCH ?")
+            params.append(_fts_query(text))
+        else:
+            snippet = "substr(o.content, 1, 160)"
+            source = "outputs o"
+        if name:
+            clauses.append("o.name LIKE ?")
+            params.append(f"%{name}%")
+        if stage:
+            clauses.append("o.stage = ?")
+            params.append(stage)
+        if direction:
+            clauses.append("o.direction = ?")
+            params.append(direction.lower())
+        if instrument:
+            clauses.append("COALESCE(o.instrument, r.instrument) = ?")
+            params.append(instrument.upper())
+        if since:
+            clauses.append("r.started_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("r.started_at <= ?")
+            params.append(until)
+        if final_only:
+            clauses.append("o.is_final = 1")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (
+            f"SELECT r.run_id, r.started_at, COALESCE(o.instrument, r.instrument) AS instrument, o.stage, o.name, o.model, o.direction, "
+            f"{snippet} AS snippet FROM {source} JOIN runs r ON r.run_id = o.run_id "
+            f"{where} ORDER BY r.started_at DESC, o.position LIMIT ?"
+        )
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, (*params, limit))]
+
+    def search_articles(self, text: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Find input articles by full-text query, with the runs that read them."""
+        query = (
+            "SELECT a.title, a.link, a.published, group_concat(ra.run_id, ', ') AS runs "
+            "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "LEFT JOIN run_articles ra ON ra.article_id = a.id "
+            "WHERE articles_fts MATCH ? GROUP BY a.id ORDER BY a.id DESC LIMIT ?"
+        )
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, (_fts_query(text), limit))]
+
+    def latency_samples(self, limit: int = 2000) -> List[Dict[str, Any]]:
+        """Duration and estimated output tokens of the most recent model calls, oldest first."""
+        query = (
+            "SELECT name, model, duration_s, (length(content) + 3) / 4 AS tokens FROM outputs "
+            "WHERE duration_s > 0 ORDER BY id DESC LIMIT ?"
+        )
+        with self._connect() as conn:
+            return [dict(row) for row in reversed(conn.execute(query, (limit,)).fetchall())]
+
+    def cascade_stats(self, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        How often each analyst's cascade escalated to its configured model.
+
+        Args:
+            since: Earliest run start (ISO date or datetime)
+
+        Returns:
+            One row per analyst and small model with the number of calls, escalations
+            by reason, calls that both models failed, and escalations whose report changed the
+            direction the small model gave
+        """
+        query = (
+            "SELECT o.name, c.first_model, COUNT(*) AS calls, SUM(c.escalated) AS escalations, "
+            "SUM(c.reason IS 'low_confidence' OR c.reason IS 'no_confidence') AS unsure, "
+            "SUM(c.reason IS 'invalid') AS invalid, SUM(c.reason IS 'error') AS errors, "
+            "SUM(o.content LIKE 'Error:%') AS failed, "
+            "SUM(c.escalated AND c.first_direction IS NOT NULL AND o.direction IS NOT c.first_direction) "
+            "AS direction_changes "
+            "FROM cascades c JOIN outputs o ON o.id = c.output_id JOIN runs r ON r.run_id = o.run_id "
+            "WHERE r.started_at >= ? GROUP BY o.name, c.first_model ORDER BY o.name"
+        )
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, (since or "",))]
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return a run with all of its outputs."""
+        with self._connect() as conn:
+            run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            outputs = conn.execute(
+                "SELECT stage, name, role, model, instrument, direction, duration_s, content FROM outputs "
+                "WHERE run_id = ? ORDER BY id", (run_id,)
+            ).fetchall()
+        return {**dict(run), "outputs": [dict(row) for row in outputs]}
+
+
+if __name__ == "__main__":
+    import argparse
+    from run_archive import RunArchive
+
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description="Query the history of past analysis runs")
+    parser.add_argument("--db", default=str(project_root / "reports" / "history.db"), help="History database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="Search analyst outputs")
+    search_parser.add_argument("text", nargs="?", help="Full-text query")
+    search_parser.add_argument("--name", help="Analyst, manager or committee name")
+    search_parser.add_argument("--stage", help="Stage name, e.g. executive_committees")
+    search_parser.add_argument("--direction", choices=["long", "short", "neutral", "no_trade"])
+    search_parser.add_argument("--instrument", help="Instrument, e.g. EUR/USD")
+    search_parser.add_argument("--since", help="Earliest run start (YYYY-MM-DD)")
+    search_parser.add_argument("--until", help="Latest run start (YYYY-MM-DD)")
+    search_parser.add_argument("--final", action="store_true", help="Only final decisions")
+    search_parser.add_argument("--limit", type=int, default=50)
+
+    articles_parser = subparsers.add_parser("articles", help="Search input articles")
+    articles_parser.add_argument("text")
+    articles_parser.add_argument("--limit", type=int, default=50)
+
+    show_parser = subparsers.add_parser("show", help="Show one run")
+    show_parser.add_argument("run_id")
+
+    cascades_parser = subparsers.add_parser("cascades", help="Show how often analyst cascades escalated")
+    cascades_parser.add_argument("--since", help="Earliest run start (YYYY-MM-DD)")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Import runs from the report archive")
+    ingest_parser.add_argument("--archive", default=str(project_root / "reports" / "runs"))
+
+    args = parser.parse_args()
+    history = RunHistory(Path(args.db))
+
+    if args.command == "search":
+        rows = history.search(args.text, args.name, args.stage, args.direction, args.instrument,
+                              args.since, args.until, args.final, args.limit)
+        table = Table(title=f"{len(rows)} matching outputs")
+        for column in ("Run", "Instrument", "Name", "Direction", "Snippet"):
+            table.add_column(column)
+        for row in rows:
+            table.add_row(row["run_id"], row["instrument"] or "", row["name"], row["direction"] or "?",
+                          row["snippet"].replace("\n", " "))
+        console.print(table)
+    elif args.command == "articles":
+        for row in history.search_articles(args.text, args.limit):
+            console.print(f"[bold]{row['title']}[/bold] ({row['published']})\n  {row['link']}\n  [dim]runs: {row['runs']}[/dim]")
+    elif args.command == "show":
+        run = history.get_run(args.run_id)
+        if run is None:
+            console.print(f"[red]Run {args.run_id} not found[/red]")
+        else:
+            console.print(f"[bold]{run['run_id']}[/bold] {run['instrument']} ({run['mode']}), started {run['started_at']}")
+            for output in run["outputs"]:
+                console.print(f"\n[bold cyan]{output['name']}[/bold cyan] [{output['stage']}] {output['instrument'] or ''} "
+                              f"direction={output['direction'] or '?'}\n{output['content']}")
+    elif args.command == "cascades":
+        rows = history.cascade_stats(args.since)
+        table = Table(title="Cascade escalations per analyst")
+        for column in ("Analyst", "Small model", "Calls", "Escalated", "Unsure", "Invalid", "Errors", "Both failed",
+                       "Direction changed"):
+            table.add_column(column)
+        for row in rows:
+            table.add_row(row["name"], row["first_model"], str(row["calls"]),
+                          f"{row['escalations']} ({row['escalations'] / row['calls']:.0%})", str(row["unsure"]),
+                          str(row["invalid"]), str(row["errors"]), str(row["failed"]),
+                          str(row["direction_changes"]))
+        console.print(table)
+    else:
+        archive = RunArchive(Path(args.archive), retention_runs=None, retention_days=None)
+        imported = sum(history.ingest_run(entry, archive.read_run(entry["run_id"])) for entry in archive.load_index())
+        archive.close()
+        console.print(f"[green]✓[/green] Imported {imported} new runs into {args.db}")
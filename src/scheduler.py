@@ -0,0 +1,273 @@
+"""Long-lived asyncio scheduler for daemon mode: cron-aligned runs on one event loop."""
+import asyncio
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from rich.console import Console
+
+console = Console()
+
+OVERLAP_POLICIES = ("skip", "queue")
+
+# (low, high) of the cron fields: minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+_CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_field(text: str, low: int, high: int) -> Set[int]:
+    """Parse one cron field: '*', 'a', 'a-b', lists of those, each with an optional '/step'."""
+    values: Set[int] = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = high if step else start
+        step = int(step) if step else 1
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"Cron field '{text}' out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """
+    A five-field cron expression evaluated in a time zone.
+
+    Example: "0 7 * * 1-5" in Europe/London fires at the London open on weekdays,
+    following the zone's daylight saving changes.
+    """
+
+    def __init__(self, expression: str, tz: str = "UTC"):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+        try:
+            # UTC needs no time zone database (Windows has none without tzdata)
+            self.tz = timezone.utc if tz.upper() == "UTC" else ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone '{tz}' (on Windows, install the tzdata package)") from None
+        self.expression = expression
+        self.label = f"{expression} {tz}"
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            sorted(_parse_field(text, low, high)) for text, (low, high) in zip(fields, _CRON_FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # Standard cron: when both day fields are restricted, either one matching is enough
+        self._day_or_weekday = fields[2] != "*" and fields[4] != "*"
+
+    def _day_matches(self, day) -> bool:
+        day_match = day.day in self.days
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays
+        return day_match or weekday_match if self._day_or_weekday else day_match and weekday_match
+
+    def next_after(self, after: datetime) -> datetime:
+        """First firing time (UTC) strictly after the given aware datetime."""
+        local = after.astimezone(self.tz)
+        # Four years covers every valid day-of-month/month combination, including 29 February
+        for offset in range(4 * 366 + 1):
+            day = local.date() + timedelta(days=offset)
+            if day.month not in self.months or not self._day_matches(day):
+                continue
+            for hour in self.hours:
+                for minute in self.minutes:
+                    candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.tz)
+                    if candidate > local:
+                        return candidate.astimezone(timezone.utc)
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+
+class IntervalSchedule:
+    """Fires every `hours` hours on a fixed grid from its anchor, so run time never shifts later runs."""
+
+    def __init__(self, hours: float, anchor: Optional[datetime] = None):
+        if hours <= 0:
+            raise ValueError("Schedule interval must be positive")
+        self.interval = timedelta(hours=hours)
+        self.anchor = anchor or datetime.now(timezone.utc)
+        self.label = f"every {hours:g}h"
+
+    def next_after(self, after: datetime) -> datetime:
+        periods = max((after - self.anchor) // self.interval + 1, 1)
+        return self.anchor + periods * self.interval
+
+
+def parse_schedules(spec: str) -> List[CronSchedule]:
+    """
+    Parse semicolon-separated cron entries, each optionally followed by a time zone.
+
+    Example: "0 7 * * 1-5 Europe/London; 30 13 * * 1-5 America/New_York"
+    """
+    schedules = []
+    for entry in spec.split(";"):
+        fields = entry.split()
+        if not fields:
+            continue
+        if len(fields) == 6:
+            schedules.append(CronSchedule(" ".join(fields[:5]), fields[5]))
+        else:
+            schedules.append(CronSchedule(" ".join(fields)))
+    return schedules
+
+
+class Scheduler:
+    """
+    Runs a job on a schedule from one long-lived event loop.
+
+    Runs fire at the scheduled wall-clock times, independent of how long earlier
+    runs took. A trigger that arrives while a run is in progress is dropped
+    ('skip') or held for one follow-up run ('queue'). Priority triggers (e.g.
+    breaking news) cancel a regular run in progress and replace a queued one.
+    SIGINT/SIGTERM stop the scheduler after the current run (a second signal
+    cancels it).
+    """
+
+    def __init__(self, job: Callable[[], Awaitable[None]], schedules: List, overlap: str = "skip",
+                 run_at_start: bool = True, shutdown_timeout: float = 300.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            job: Coroutine function performing one run
+            schedules: CronSchedule/IntervalSchedule objects; the earliest next time wins
+                (empty: runs only happen through trigger())
+            overlap: 'skip' or 'queue' for triggers arriving during a run
+            run_at_start: Run once immediately when serving starts
+            shutdown_timeout: Seconds to let a run in progress finish on shutdown
+        """
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"Overlap policy must be one of {OVERLAP_POLICIES}, got '{overlap}'")
+        self.job = job
+        self.schedules = schedules
+        self.overlap = overlap
+        self.run_at_start = run_at_start
+        self.shutdown_timeout = shutdown_timeout
+        self._pending: Optional[Tuple[str, bool]] = None  # reason and priority of the next run
+        self._current: Optional[asyncio.Task] = None
+        self._current_priority = False
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def next_run(self, after: Optional[datetime] = None) -> Tuple[datetime, str]:
+        """Next firing time (UTC) across all schedules and the label of that schedule."""
+        after = after or datetime.now(timezone.utc)
+        return min((schedule.next_after(after), schedule.label) for schedule in self.schedules)
+
+    @property
+    def running(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def trigger(self, reason: str, priority: bool = False) -> bool:
+        """Request a run; returns False if it was dropped by the overlap policy."""
+        if priority and self.running and not self._current_priority:
+            console.print(f"[bold yellow]Pre-empting the current run for: {reason}[/bold yellow]")
+            self._current.cancel()
+        elif priority and self._pending is not None and not self._pending[1]:
+            console.print(f"[cyan]Replacing the queued run with: {reason}[/cyan]")
+        elif self.running or self._pending is not None:
+            if self.overlap == "skip" or self._pending is not None:
+                console.print(f"[yellow]Skipping run ({reason}): a run is already in progress or queued[/yellow]")
+                return False
+            console.print(f"[cyan]Run queued ({reason}) until the current run finishes[/cyan]")
+        self._pending = (reason, priority)
+        self._wake.set()
+        return True
+
+    def stop(self):
+        """Stop after the current run; when called again, cancel the current run as well."""
+        if self._stopping.is_set() and self.running:
+            console.print("[yellow]Cancelling the current run...[/yellow]")
+            self._current.cancel()
+        self._stopping.set()
+
+    async def serve(self, background: Iterable[Callable[[], Awaitable[None]]] = ()):
+        """
+        Run until stop() is called or the process receives SIGINT/SIGTERM.
+        
+        Args:
+            background: Coroutine functions (e.g. a news watch calling trigger()) run
+                alongside the schedule and cancelled on shutdown
+        """
+        self._wake, self._stopping = asyncio.Event(), asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+        worker = asyncio.create_task(self._worker(), name="scheduler-worker")
+        tasks = [asyncio.create_task(function()) for function in background]
+        if self.run_at_start:
+            self.trigger("startup")
+        try:
+            if not self.schedules:
+                await self._stopping.wait()
+            while not self._stopping.is_set():
+                when, label = self.next_run()
+                console.print(f"[dim]Next scheduled run: {when.astimezone():%Y-%m-%d %H:%M:%S %Z} ({label})[/dim]")
+                if await self._sleep_until(when):
+                    self.trigger(label)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._shutdown(worker)
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError):
+                    pass
+
+    async def _sleep_until(self, when: datetime) -> bool:
+        """Sleep until a wall-clock time; returns False if stopped first."""
+        while not self._stopping.is_set():
+            remaining = (when - datetime.now(timezone.utc)).total_seconds()
+            if remaining <= 0:
+                return True
+            # Re-check the wall clock at least every minute, so clock changes and suspends don't shift runs
+            try:
+                await asyncio.wait_for(self._stopping.wait(), min(remaining, 60))
+            except asyncio.TimeoutError:
+                pass
+        return False
+
+    async def _worker(self):
+        """Execute requested runs one at a time."""
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._pending is not None and not self._stopping.is_set():
+                reason, self._current_priority = self._pending
+                self._current = asyncio.create_task(self.job(), name=f"run ({reason})")
+                self._pending = None
+                started = time.perf_counter()
+                try:
+                    await asyncio.shield(self._current)
+                except asyncio.CancelledError:
+                    if not self._current.cancelled():
+                        raise
+                    console.print(f"[yellow]Run ({reason}) cancelled[/yellow]")
+                except Exception as e:
+                    console.print(f"[red]Run ({reason}) failed: {str(e)}[/red]")
+                else:
+                    console.print(f"[dim]Run ({reason}) finished in {time.perf_counter() - started:.1f}s[/dim]")
+
+    async def _shutdown(self, worker: asyncio.Task):
+        """Let the current run finish (up to shutdown_timeout), then stop the worker."""
+        self._stopping.set()
+        self._pending = None
+        if self.running:
+            console.print(f"[cyan]Waiting up to {self.shutdown_timeout:.0f}s for the current run to finish "
+                          f"(signal again to cancel it)...[/cyan]")
+            done, _ = await asyncio.wait({self._current}, timeout=self.shutdown_timeout)
+            if not done:
+                self._current.cancel()
+                await asyncio.wait({self._current})
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        console.print("[dim]Scheduler stopped[/dim]")
@@ -0,0 +1,198 @@
+"""Per-run telemetry: Ollama call timings and wall-clock stage spans, exported as JSON and Prometheus text."""
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from profiling import RunProfiler
+
+# Timing fields of an Ollama /api/generate response; durations are in nanoseconds
+OLLAMA_DURATIONS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+OLLAMA_COUNTS = ("prompt_eval_count", "eval_count")
+
+METRIC_PREFIX = "day_trader"
+
+
+def call_metrics(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Timing fields of an Ollama response, with durations converted to seconds."""
+    metrics: Dict[str, Any] = {}
+    for key in OLLAMA_DURATIONS:
+        if isinstance(response.get(key), (int, float)):
+            metrics[key.replace("_duration", "_s")] = response[key] / 1e9
+    for key in OLLAMA_COUNTS:
+        if isinstance(response.get(key), int):
+            metrics[key] = response[key]
+    return metrics
+
+
+def _rate(tokens: int, seconds: float) -> Optional[float]:
+    return round(tokens / seconds, 2) if seconds > 0 else None
+
+
+class RunTelemetry:
+    """
+    Collects the timings of one run: wall-clock spans (fetch, digest, market data,
+    each tier) and every model call with the timing fields Ollama reports.
+
+    Times are kept as offsets in seconds from the start of the run.
+    """
+
+    def __init__(self):
+        self.run_id = ""
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.origin = time.monotonic()
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self.profiler: Optional[RunProfiler] = None  # set when the run is profiled
+
+    def offset(self, monotonic: Optional[float] = None) -> float:
+        """Seconds since the start of the run of a time.monotonic() value (default: now)."""
+        return round((time.monotonic() if monotonic is None else monotonic) - self.origin, 3)
+
+    def record_span(self, name: str, start: float, end: float):
+        """Record a span from monotonic times; a span recorded again is widened to cover both."""
+        start, end = self.offset(start), self.offset(end)
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = {"start_s": start, "end_s": end, "duration_s": round(end - start, 3)}
+        else:
+            span["start_s"], span["end_s"] = min(span["start_s"], start), max(span["end_s"], end)
+            span["duration_s"] = round(span["end_s"] - span["start_s"], 3)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a span."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_span(name, start, time.monotonic())
+
+    def record_call(self, name: str, stage: str, model: str, start: float, end: float,
+                    metrics: Dict[str, Any], error: bool = False, **extra: Any):
+        """Record one model call from its monotonic start and end and its Ollama timing fields."""
+        self.calls.append({
+            "name": name,
+            "stage": stage,
+            "model": model,
+            "start_s": self.offset(start),
+            "wall_s": round(end - start, 3),
+            "error": error,
+            **metrics,
+            **extra,
+        })
+
+    def model_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model totals: calls, tokens, load overhead and generation and prompt throughput."""
+        models: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            totals = models.setdefault(call["model"], {
+                "calls": 0, "errors": 0, "wall_s": 0.0, "load_s": 0.0,
+                "prompt_eval_count": 0, "prompt_eval_s": 0.0, "eval_count": 0, "eval_s": 0.0,
+            })
+            totals["calls"] += 1
+            totals["errors"] += call["error"]
+            totals["wall_s"] += call["wall_s"]
+            totals["load_s"] += call.get("load_s", 0.0)
+            for key in ("prompt_eval_count", "prompt_eval_s", "eval_count", "eval_s"):
+                totals[key] += call.get(key, 0)
+        for totals in models.values():
+            totals["eval_tokens_per_s"] = _rate(totals["eval_count"], totals["eval_s"])
+            totals["prompt_tokens_per_s"] = _rate(totals["prompt_eval_count"], totals["prompt_eval_s"])
+            for key in ("wall_s", "load_s", "prompt_eval_s", "eval_s"):
+                totals[key] = round(totals[key], 3)
+        return models
+
+    def cascade_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-analyst cascade totals: small-model calls, escalations by reason and calls both models failed."""
+        analysts: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            if "cascade" not in call:
+                continue
+            totals = analysts.setdefault(call["analyst"], {"model": None, "calls": 0, "escalations": 0, "failed": 0,
+                                                            "reasons": {}})
+            if call["cascade"] == "first":
+                totals["model"] = call["model"]
+                totals["calls"] += 1
+            else:
+                totals["escalations"] += 1
+                reason = call.get("escalation_reason")
+                totals["reasons"][reason] = totals["reasons"].get(reason, 0) + 1
+                # Escalated because the small model failed, and the configured model failed too
+                if reason == "error" and call["error"]:
+                    totals["failed"] += 1
+        for totals in analysts.values():
+            totals["escalation_rate"] = round(totals["escalations"] / totals["calls"], 3) if totals["calls"] else None
+        return analysts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """All collected telemetry, with per-model totals."""
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "duration_s": self.offset(),
+            "spans": self.spans,
+            "models": self.model_summary(),
+            "cascades": self.cascade_summary(),
+            "calls": self.calls,
+        }
+
+    def prometheus(self) -> str:
+        """The run's metrics in the Prometheus text exposition format (gauges describing the last run)."""
+        metrics: Dict[str, Dict[str, Any]] = {}
+
+        def gauge(name: str, help_text: str, value: Optional[float], **labels: str):
+            if value is None:
+                return
+            entry = metrics.setdefault(name, {"help": help_text, "samples": []})
+            entry["samples"].append((labels, value))
+
+        gauge("last_run_timestamp_seconds", "Unix time the last run started",
+              round(time.time() - (time.monotonic() - self.origin), 3))
+        gauge("run_duration_seconds", "Wall-clock duration of the last run", self.offset())
+        for span_name, span in self.spans.items():
+            gauge("stage_duration_seconds", "Wall-clock duration of each stage of the last run",
+                  span["duration_s"], stage=span_name)
+        for model, totals in self.model_summary().items():
+            gauge("model_calls", "Model calls in the last run", totals["calls"], model=model)
+            gauge("model_call_errors", "Failed model calls in the last run", totals["errors"], model=model)
+            gauge("model_wall_seconds", "Summed wall-clock time of the model's calls", totals["wall_s"], model=model)
+            gauge("model_load_seconds", "Summed time Ollama spent loading the model", totals["load_s"], model=model)
+            gauge("model_prompt_tokens", "Prompt tokens evaluated", totals["prompt_eval_count"], model=model)
+            gauge("model_eval_tokens", "Output tokens generated", totals["eval_count"], model=model)
+            gauge("model_prompt_tokens_per_second", "Prompt evaluation throughput",
+                  totals["prompt_tokens_per_s"], model=model)
+            gauge("model_eval_tokens_per_second", "Generation throughput", totals["eval_tokens_per_s"], model=model)
+        for analyst, totals in self.cascade_summary().items():
+            gauge("cascade_calls", "Calls answered first by the analyst's small cascade model",
+                  totals["calls"], analyst=analyst, model=totals["model"])
+            gauge("cascade_escalations", "Cascade calls escalated to the analyst's configured model",
+                  totals["escalations"], analyst=analyst, model=totals["model"])
+            gauge("cascade_failures", "Cascade calls that both the small and the configured model failed",
+                  totals["failed"], analyst=analyst, model=totals["model"])
+
+        lines = []
+        for name, entry in metrics.items():
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {entry['help']}")
+            lines.append(f"# TYPE {full_name} gauge")
+            for labels, value in entry["samples"]:
+                label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+                lines.append(f"{full_name}{{{label_text}}} {value}" if label_text else f"{full_name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_textfile(path: Union[str, Path], text: str):
+    """Replace a file atomically, so a collector never reads it half-written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,264 @@
+"""Tests for the analysis pipeline, run against a stubbed Ollama and market data source."""
+import asyncio
+import json
+import re
+
+import pytest
+
+import ai_analyzer
+from ai_analyzer import AdaptiveFanout, CascadeConfig, ForexAnalysisPipeline, GenerationOptions
+from run_archive import RunArchive
+
+NEWS = {"data": [{"title": "EUR/USD slides after ECB", "link": "https://example.com/ecb",
+                  "contentSnippet": "The euro fell.", "content": "The euro fell."}]}
+
+
+def _member(name, stage=None, prompt="", **extra):
+    member = {"name": name, "role": name, "model": "large", "temperature": 0.5,
+              "system_prompt": f"You are {name}. {prompt}", **extra}
+    if stage is None:
+        member.update(personality="calm", focus_area="macro")
+    else:
+        member["stage"] = stage
+    return member
+
+
+def _team(juniors, managers, executives, stages=None):
+    team = {"junior_analysts": juniors, "management_layers": managers + executives}
+    if stages is not None:
+        team["pipeline"] = {"stages": stages}
+    return team
+
+
+class FakeMarketData:
+    """Market data source that counts fetches and returns after a delay."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fetches = []
+        self.done = []
+
+    async def get_forex_data_async(self, symbol="EUR/USD", force_refresh=False):
+        self.fetches.append(symbol)
+        await asyncio.sleep(self.delay)
+        self.done.append(symbol)
+        return {"symbol": symbol}
+
+    def format_market_data(self, data):
+        return f"PRICE OF {data['symbol']}"
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def pipeline_factory(tmp_path, monkeypatch):
+    """Build a pipeline for a team; every model call is answered by respond(model, member name, prompt)."""
+    monkeypatch.setattr(ai_analyzer, "RunArchive", lambda root, *args: RunArchive(tmp_path / "runs", *args))
+    pipelines = []
+
+    def build(team, respond, market_data=None, **options):
+        calls = []
+
+        async def analyze_async(self, prompt, data):
+            name = re.match(r"You are (.+?)\.", prompt).group(1)
+            calls.append({"model": self.model, "name": name, "prompt": prompt, "data": data})
+            await asyncio.sleep(0.01)
+            return respond(self.model, name, prompt)
+
+        monkeypatch.setattr(ai_analyzer.OllamaAnalyzer, "analyze_async", analyze_async)
+        config_path = tmp_path / "team.json"
+        config_path.write_text(json.dumps(team), encoding="utf-8")
+        pipeline = ForexAnalysisPipeline("http://ollama.test", run_concurrent=True, config_path=str(config_path),
+                                         warmup=False, **options)
+        pipeline.market_data_fetcher = market_data or FakeMarketData()
+        pipeline.calls = calls
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield build
+    for pipeline in pipelines:
+        pipeline.close()
+
+
+def _run(pipeline, news=NEWS, **kwargs):
+    async def run():
+        try:
+            return await pipeline.analyze_news_async(news, **kwargs)
+        finally:
+            await pipeline.aclose()
+    result = asyncio.run(run())
+    pipeline.flush_reports()
+    [entry] = pipeline.archive.load_index()[-1:]
+    return result, pipeline.archive.read_run(entry["run_id"])
+
+
+def _reports(records):
+    return {(record.get("instrument"), record["name"]): record for record in records if record["type"] == "report"}
+
+
+def test_market_data_is_awaited_only_by_members_that_use_it(pipeline_factory):
+    market_data = FakeMarketData(delay=0.2)
+    team = _team([_member("J1"), _member("J2")],
+                 [_member("Manager", "senior_managers", "Prices: {{MARKET_DATA}}")],
+                 [_member("Committee", "executive_committees")])
+    fetched_when_called = {}
+
+    def respond(model, name, prompt):
+        fetched_when_called[name] = list(market_data.done)
+        return f"{name} says long"
+
+    pipeline = pipeline_factory(team, respond, market_data)
+    result, records = _run(pipeline)
+
+    # The juniors ran while the fetch was still in flight
+    assert fetched_when_called == {"J1": [], "J2": [], "Manager": ["EUR/USD"], "Committee": ["EUR/USD"]}
+    manager = next(call for call in pipeline.calls if call["name"] == "Manager")
+    assert "Prices: PRICE OF EUR/USD" in manager["prompt"]
+    assert market_data.fetches == ["EUR/USD"]
+    assert [record["content"] for record in records if record["type"] == "market_data"] == [{"symbol": "EUR/USD"}]
+    assert "Committee says long" in result
+
+
+def test_instruments_share_one_run(pipeline_factory):
+    team = _team([_member("J1", prompt="Trade {{INSTRUMENT}}.")],
+                 [_member("Manager", "senior_managers", "{{MARKET_DATA}}")],
+                 [_member("Committee", "executive_committees", "Decide on {{INSTRUMENT}}.")])
+    pipeline = pipeline_factory(team, lambda model, name, prompt: f"{name}: {prompt.split('. ', 1)[1]}")
+
+    result, records = _run(pipeline, instruments=["EUR/USD", "GBP/USD"])
+
+    assert [record["type"] for record in records].count("run_start") == 1
+    assert sorted(pipeline.market_data_fetcher.fetches) == ["EUR/USD", "GBP/USD"]
+    reports = _reports(records)
+    assert reports[("GBP/USD", "J1")]["content"] == "J1: Trade GBP/USD."
+    assert reports[("EUR/USD", "Committee")]["content"] == "Committee: Decide on EUR/USD."
+    assert result.index("EUR/USD") < result.index("GBP/USD")
+
+
+def test_member_generation_options_override_stage_defaults():
+    stage = GenerationOptions.from_dict({"num_predict": 300, "num_ctx": 4096, "timeout": 60}, "Stage 'juniors'")
+    member = GenerationOptions.from_dict({"num_predict": 800, "stop": "###"}, "'J1'")
+    merged = stage.merged(member)
+    assert merged.to_ollama() == {"num_predict": 800, "num_ctx": 4096, "stop": ["###"]}
+    assert merged.timeout == 60
+    assert stage.merged(None) is stage
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({"max_tokens": 100}, "'J1' has unknown generation settings: max_tokens"),
+    ({"num_predict": 0}, "num_predict=0 must be a positive integer"),
+    ({"num_predict": True}, "num_predict=True must be a positive integer"),
+    ({"num_ctx": 128}, "num_ctx=128 must be an integer of at least 256"),
+    ({"stop": ["###", ""]}, "stop=\\['###', ''\\] must be a list of non-empty strings"),
+    ({"top_p": 1.5}, "top_p=1.5 must be between 0 and 1"),
+    ({"timeout": 0}, "timeout=0 must be a positive number of seconds"),
+])
+def test_invalid_generation_options_are_rejected(settings, message):
+    with pytest.raises(ValueError, match=message):
+        GenerationOptions.from_dict(settings, "'J1'")
+
+
+ADAPTIVE_STAGES = [
+    {"name": "junior_analysts", "title": "Junior Analysts", "input": "news"},
+    {"name": "senior_managers", "title": "Senior Managers", "depends_on": ["junior_analysts"],
+     "adaptive": {"min_agreement": 0.8, "min_confidence": 0.6, "min_reports": 3, "members": 1}},
+    {"name": "executive_committees", "title": "Executive Committees", "depends_on": ["senior_managers"],
+     "input": "review"},
+]
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({"min_agreement": 0.8, "quorum": 3}, "'senior_managers' has unknown adaptive settings: quorum"),
+    ({"min_agreement": 80}, "min_agreement=80 must be between 0 and 1"),
+    ({"members": 0}, "members=0 must be a positive integer"),
+    ({"min_reports": True}, "min_reports=True must be a positive integer"),
+])
+def test_invalid_adaptive_settings_are_rejected(settings, message):
+    with pytest.raises(ValueError, match=message):
+        AdaptiveFanout.from_dict(settings, "'senior_managers'")
+
+
+def _adaptive_team(juniors=3):
+    return _team([_member(f"J{n}") for n in range(1, juniors + 1)],
+                 [_member("M1", "senior_managers"), _member("M2", "senior_managers", priority=1),
+                  _member("M3", "senior_managers")],
+                 [_member("Committee", "executive_committees")], ADAPTIVE_STAGES)
+
+
+def test_strong_consensus_runs_only_the_top_managers(pipeline_factory):
+    pipeline = pipeline_factory(_adaptive_team(),
+                                lambda model, name, prompt: "Direction: Long\nConfidence: High")
+
+    _, records = _run(pipeline)
+
+    assert {call["name"] for call in pipeline.calls} == {"J1", "J2", "J3", "M2", "Committee"}
+    [fanout] = [record["content"] for record in records if record["type"] == "fanout"]
+    assert fanout["strong_consensus"] and fanout["members_run"] == ["M2"]
+    assert {name for _, name in _reports(records)} == {"J1", "J2", "J3", "M2", "Committee"}
+    # Skipped managers are not failures, so the run leaves no checkpoint to resume
+    assert pipeline.archive.latest_checkpoint() is None
+
+
+@pytest.mark.parametrize("juniors, respond", [
+    (3, lambda model, name, prompt: "Direction: Long\nConfidence: Low"),
+    (3, lambda model, name, prompt: "Direction: Short" if name == "J3" else "Direction: Long\nConfidence: High"),
+    (2, lambda model, name, prompt: "Direction: Long\nConfidence: High"),
+])
+def test_weak_or_small_consensus_runs_the_full_stage(pipeline_factory, juniors, respond):
+    pipeline = pipeline_factory(_adaptive_team(juniors), respond)
+    _, records = _run(pipeline)
+    assert {"M1", "M2", "M3"} <= {call["name"] for call in pipeline.calls}
+    [fanout] = [record["content"] for record in records if record["type"] == "fanout"]
+    assert not fanout["strong_consensus"]
+
+
+def _cascade_team():
+    cascade = {"model": "small", "min_confidence": 0.6}
+    return _team([_member(f"J{n}", cascade=cascade) for n in range(1, 4)],
+                 [_member("Manager", "senior_managers")],
+                 [_member("Committee", "executive_committees")])
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({"min_confidence": 0.6}, "'J1' cascade requires a 'model'"),
+    ({"model": "small", "fallback": "large"}, "'J1' has unknown cascade settings: fallback"),
+    ({"model": "small", "temperature": -0.1}, "temperature=-0.1 must be a non-negative number"),
+    ({"model": "small", "min_confidence": 60}, "min_confidence=60 must be between 0 and 1"),
+])
+def test_invalid_cascade_settings_are_rejected(settings, message):
+    with pytest.raises(ValueError, match=message):
+        CascadeConfig.from_dict(settings, "'J1'")
+
+
+def test_cascade_escalates_unsure_and_failed_answers(pipeline_factory):
+    def respond(model, name, prompt):
+        if model == "small":
+            return {"J1": "Direction: Long\nConfidence: 80%", "J2": "Direction: Long\nConfidence: 30%",
+                    "J3": "Error: model crashed"}[name]
+        return f"Direction: Short\nConfidence: High ({name})"
+
+    pipeline = pipeline_factory(_cascade_team(), respond)
+    _, records = _run(pipeline)
+
+    reports = _reports(records)
+    assert reports[("EUR/USD", "J1")]["model"] == "small"
+    assert reports[("EUR/USD", "J2")]["cascade"]["reason"] == "low_confidence"
+    assert reports[("EUR/USD", "J2")]["model"] == "large"
+    assert reports[("EUR/USD", "J3")]["cascade"]["answered_by"] == "large"
+    assert [call["model"] for call in pipeline.calls if call["name"] == "J1"] == ["small"]
+
+
+def test_cascade_records_no_answering_model_when_both_fail(pipeline_factory):
+    def respond(model, name, prompt):
+        if name == "J3":
+            return f"Error: {model} crashed"
+        return "Direction: Long\nConfidence: 90%"
+
+    pipeline = pipeline_factory(_cascade_team(), respond)
+    _, records = _run(pipeline)
+
+    report = _reports(records)[("EUR/USD", "J3")]
+    assert report["cascade"]["answered_by"] is None
+    assert report["model"] == "large"
+    assert pipeline.archive.latest_checkpoint() is not None  # the failed call can be resumed
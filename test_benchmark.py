@@ -0,0 +1,85 @@
+"""Tests for the benchmark's statistics, regression check, stub Ollama server and self-check."""
+import asyncio
+import json
+
+import httpx
+
+from benchmark import Benchmark, MockOllama, OllamaProfile, check_results, compare, percentile
+
+
+def test_percentile_interpolates_between_samples():
+    assert percentile([], 50) is None
+    assert percentile([3.0, 1.0, 2.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 95) == 4.8
+    assert percentile([7.0], 99) == 7.0
+
+
+def _results(run_p50=10.0, call_p95=2.0, calls_per_s=5.0, call_errors=0):
+    return {"modes": {"concurrent": {
+        "failed": 0, "call_errors": call_errors, "run_s": {"p50": run_p50, "p95": run_p50 * 1.2},
+        "call_s": {"p95": call_p95}, "calls_per_s": calls_per_s,
+    }}}
+
+
+def test_compare_reports_regressions_beyond_the_tolerance():
+    baseline = _results()
+    assert compare(_results(run_p50=11.0, calls_per_s=4.5), baseline, 0.2) == []
+    assert compare(_results(run_p50=13.0), baseline, 0.2) == [
+        "concurrent: run_s p50 10 -> 13 (+30%)", "concurrent: run_s p95 12 -> 15.6 (+30%)",
+    ]
+    assert compare(_results(calls_per_s=3.0), baseline, 0.2) == ["concurrent: calls_per_s 5 -> 3 (-40%)"]
+    assert compare(_results(call_errors=1), baseline, 0.2) == [
+        "concurrent: more failed runs or calls than the baseline"
+    ]
+    assert compare(_results(run_p50=30.0), {"modes": {}}, 0.2) == []
+
+
+def test_mock_ollama_loads_models_and_caps_the_output():
+    profile = OllamaProfile(latency=0.0, token_rate=1e6, load_delay=0.05, response_tokens=100, max_loaded_models=1)
+    ollama = MockOllama(profile).start()
+    try:
+        def generate(model, **request):
+            response = httpx.post(f"{ollama.url}/api/generate", json={"model": model, "prompt": "EUR/USD?", **request})
+            return response.json()
+
+        first = generate("small", options={"num_predict": 10})
+        assert first["eval_count"] <= 10 and first["load_duration"] == 50_000_000
+        assert generate("small")["load_duration"] == 0
+        structured = json.loads(generate("large", format="json")["response"])
+        assert structured["direction"] in ("long", "short", "neutral", "no_trade")
+        # Only one model fits: "small" was evicted by "large"
+        assert generate("small")["load_duration"] == 50_000_000
+        assert ollama.loads == 3 and len(ollama.requests) == 4
+        assert httpx.get(f"{ollama.url}/api/tags").status_code == 404
+    finally:
+        ollama.stop()
+
+
+def test_stub_server_accepts_a_burst_of_concurrent_requests():
+    ollama = MockOllama(OllamaProfile(latency=0.2, load_delay=0.0, num_parallel=64)).start()
+
+    async def burst():
+        async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=None)) as client:
+            return await asyncio.gather(*(
+                client.post(f"{ollama.url}/api/generate", json={"model": "large", "prompt": f"Report {n}"})
+                for n in range(40)
+            ), return_exceptions=True)
+
+    try:
+        responses = asyncio.run(burst())
+    finally:
+        ollama.stop()
+    assert [getattr(response, "status_code", response) for response in responses] == [200] * 40
+
+
+def test_benchmark_self_check_passes_against_the_stubs():
+    # Fast models serving every request at once: the juniors of three instruments hit the stub in one burst
+    profile = OllamaProfile(latency=0.01, token_rate=100000.0, prompt_rate=1e7, load_delay=0.01, num_parallel=64)
+    results = Benchmark(profile, runs=1, feed_latency=0.0, rate_latency=0.0).run(["multi-instrument"])
+
+    [result] = results["modes"].values()
+    assert result["completed"] == 1 and result["calls"] > 40
+    assert check_results(results) == []
+    assert check_results({"modes": {"concurrent": {**result, "call_errors": 2}}}) == [
+        "concurrent: 0 failed runs, 2 failed calls"
+    ]
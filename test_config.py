@@ -48,8 +48,8 @@ def test_configuration():
         print()
         
         # Count management layers
-        senior_managers = [m for m in management_layers if 'senior' in m['name'].lower() and 'executive' not in m['name'].lower()]
-        executive_committees = [m for m in management_layers if 'executive' in m['name'].lower()]
+        senior_managers = [m for m in management_layers if m.get('stage') == 'senior_managers']
+        executive_committees = [m for m in management_layers if m.get('stage') == 'executive_committees']
         
         print("MANAGEMENT LAYERS:")
         print(f"  Total: {len(management_layers)}")
@@ -67,6 +67,17 @@ def test_configuration():
             print(f"    {i}. {committee['name']:30s} - Temp: {committee['temperature']}")
         print()
         
+        # Check pipeline topology
+        stages = config.get('pipeline', {}).get('stages', [])
+        stage_names = {stage['name'] for stage in stages}
+        print("PIPELINE STAGES:")
+        for stage in stages:
+            depends_on = ', '.join(stage.get('depends_on', [])) or 'news'
+            print(f"  - {stage['name']:25s} <- {depends_on}")
+        print()
+        unknown = [m['name'] for m in junior_analysts + management_layers if m.get('stage', 'junior_analysts') not in stage_names]
+        print(f"✓ Stage assignments: {'All valid' if not unknown else 'Unknown stage for ' + ', '.join(unknown)}")
+        
         # Check for market data integration
         has_market_data = any('{{MARKET_DATA}}' in m['system_prompt'] for m in management_layers)
         print(f"✓ Market data integration: {'Enabled' if has_market_data else 'Not found'}")
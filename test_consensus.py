@@ -0,0 +1,93 @@
+"""Tests for structured junior report parsing, the numeric consensus and stage agreement."""
+import json
+
+from consensus import compute_consensus, extract_direction, measure_agreement, parse_structured_report, score_confidence
+
+
+def _report(direction="long", confidence=0.7, **extra):
+    return json.dumps({"direction": direction, "confidence": confidence, "time_windows": [],
+                       "evidence_ids": ["E1"], "justification": "CPI beat.", **extra})
+
+
+def test_parse_structured_report_normalises_fields():
+    parsed = parse_structured_report(_report("No Trade", "high", risks=["a", "b", "c", "d"]))
+    assert parsed["direction"] == "no_trade"
+    assert parsed["confidence"] == 0.8
+    assert parsed["risks"] == ["a", "b", "c"]
+    assert parsed["evidence_ids"] == ["E1"]
+
+
+def test_parse_structured_report_skips_reasoning_and_clamps_confidence():
+    output = "<think>maybe {not json}</think>\nHere you go: " + _report("short", 1.5)
+    parsed = parse_structured_report(output)
+    assert parsed["direction"] == "short"
+    assert parsed["confidence"] == 1.0
+
+
+def test_parse_structured_report_rejects_invalid_reports():
+    assert parse_structured_report("Direction: long") is None
+    assert parse_structured_report("{broken json") is None
+    assert parse_structured_report(_report("sideways")) is None
+    assert parse_structured_report(_report(confidence="very")) is None
+    assert parse_structured_report("[1, 2]") is None
+
+
+def test_extract_direction_from_free_text():
+    assert extract_direction("**Direction:** SELL below 1.0850") == "short"
+    assert extract_direction("Direction - Buy") == "long"
+    assert extract_direction("We recommend no trade today.") == "no_trade"
+    assert extract_direction("Direction: long/short depending on CPI") is None
+    assert extract_direction("Markets are quiet.") is None
+    assert extract_direction(_report("neutral")) == "neutral"
+
+
+def test_compute_consensus_weights_votes_by_confidence():
+    reports = [
+        {"parsed": parse_structured_report(_report("long", 0.9))},
+        {"parsed": parse_structured_report(_report("long", 0.5))},
+        {"parsed": parse_structured_report(_report("short", 0.6))},
+        {"parsed": None},
+    ]
+    consensus = compute_consensus(reports)
+    assert consensus["analysts_total"] == 4
+    assert consensus["analysts_structured"] == 3
+    assert consensus["votes"] == {"long": 2, "short": 1, "neutral": 0, "no_trade": 0}
+    assert consensus["leading_direction"] == "long"
+    assert consensus["agreement"] == 0.7
+    assert consensus["leading_mean_confidence"] == 0.7
+    assert consensus["top_evidence"] == [{"id": "E1", "citations": 3}]
+
+
+def test_compute_consensus_without_structured_reports():
+    consensus = compute_consensus([{"parsed": None}])
+    assert consensus["leading_direction"] is None
+    assert consensus["agreement"] == 0.0
+
+
+def test_score_confidence_reads_levels_percentages_and_scores():
+    assert score_confidence(_report(confidence=0.35)) == 0.35
+    assert score_confidence("Direction: Long\nConfidence: High") == 0.8
+    assert score_confidence("Confidence: 65%") == 0.65
+    assert score_confidence("**Confidence:** 7/10") == 0.7
+    assert score_confidence("Direction: Long") is None
+
+
+def test_measure_agreement_counts_every_report():
+    agreement = measure_agreement([
+        "Direction: Long\nConfidence: 90%",
+        "Direction: Long",
+        _report("long", 0.7),
+        "No clear view today.",
+    ])
+    assert agreement["reports"] == 4
+    assert agreement["votes"]["long"] == 3
+    assert agreement["leading_direction"] == "long"
+    assert agreement["agreement"] == 0.75
+    # A leading report without a stated confidence counts as medium
+    assert agreement["leading_mean_confidence"] == round((0.9 + 0.5 + 0.7) / 3, 3)
+
+
+def test_measure_agreement_without_directions():
+    agreement = measure_agreement(["Markets are quiet.", "Error: timeout"])
+    assert agreement["leading_direction"] is None
+    assert agreement["agreement"] == 0.0
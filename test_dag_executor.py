@@ -0,0 +1,90 @@
+"""Tests for the DAG executor that runs the analyst stages."""
+import asyncio
+
+import pytest
+
+from dag_executor import DagExecutor, DagNode, topological_levels
+
+
+def test_topological_levels_orders_by_depth():
+    levels = topological_levels({
+        "juniors": [],
+        "digest": [],
+        "managers": ["juniors"],
+        "committees": ["managers", "digest"],
+    })
+    assert levels == {"juniors": 0, "digest": 0, "managers": 1, "committees": 2}
+
+
+def test_topological_levels_rejects_cycles_and_unknown_nodes():
+    with pytest.raises(ValueError, match="cycle"):
+        topological_levels({"a": ["b"], "b": ["c"], "c": ["a"], "d": []})
+    with pytest.raises(ValueError, match="unknown"):
+        topological_levels({"a": ["missing"]})
+
+
+def _record(log, name, result=None, delay=0.01):
+    async def action(upstream):
+        log.append(("start", name, sorted(upstream)))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        if isinstance(result, Exception):
+            raise result
+        return result if result is not None else name
+    return action
+
+
+def test_executor_runs_dependents_after_their_inputs():
+    log = []
+    nodes = [
+        DagNode("j1", "juniors", _record(log, "j1")),
+        DagNode("j2", "juniors", _record(log, "j2")),
+        DagNode("m1", "managers", _record(log, "m1"), depends_on=["j1", "j2"]),
+    ]
+    results = asyncio.run(DagExecutor().run(nodes))
+
+    assert results == {"j1": "j1", "j2": "j2", "m1": "m1"}
+    assert log.index(("start", "m1", ["j1", "j2"])) > max(log.index(("end", "j1")), log.index(("end", "j2")))
+
+
+def test_executor_passes_only_successful_inputs():
+    log = []
+    nodes = [
+        DagNode("ok", "juniors", _record(log, "ok")),
+        DagNode("bad", "juniors", _record(log, "bad", RuntimeError("model crashed"))),
+        DagNode("manager", "managers", _record(log, "manager"), depends_on=["ok", "bad"]),
+    ]
+    completed = []
+    results = asyncio.run(DagExecutor(on_complete=lambda node, result: completed.append(node.name)).run(nodes))
+
+    assert isinstance(results["bad"], RuntimeError)
+    assert ("start", "manager", ["ok"]) in log
+    assert sorted(completed) == ["bad", "manager", "ok"]
+
+
+def test_executor_respects_group_and_global_limits():
+    running = {"now": 0, "peak": 0}
+
+    async def action(upstream):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+
+    nodes = [DagNode(f"j{i}", "juniors", action) for i in range(6)]
+    asyncio.run(DagExecutor(group_limits={"juniors": 2}).run(nodes))
+    assert running["peak"] == 2
+
+    running["peak"] = 0
+    asyncio.run(DagExecutor(max_concurrency=1).run(nodes))
+    assert running["peak"] == 1
+
+    running["peak"] = 0
+    asyncio.run(DagExecutor().run(nodes))
+    assert running["peak"] == 6
+
+
+def test_executor_rejects_duplicate_names():
+    nodes = [DagNode("a", "g", _record([], "a")), DagNode("a", "g", _record([], "a"))]
+    with pytest.raises(ValueError, match="unique"):
+        asyncio.run(DagExecutor().run(nodes))
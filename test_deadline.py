@@ -0,0 +1,83 @@
+"""Tests for run deadline planning and admission."""
+import time
+
+import pytest
+
+from deadline import (DEFAULT_CALL_SECONDS, MIN_REPORT_TOKENS, CallEstimate, DeadlineCall, LatencyStats,
+                      RunDeadline, ShedError)
+
+LEVELS = {"juniors": 0, "committees": 1}
+
+
+def _calls(seconds=10.0, tokens=800):
+    return [
+        DeadlineCall("j1", "juniors", 1, CallEstimate(seconds, tokens), protected=True),
+        DeadlineCall("j2", "juniors", 0, CallEstimate(seconds, tokens)),
+        DeadlineCall("j3", "juniors", 0, CallEstimate(seconds, tokens)),
+        DeadlineCall("c1", "committees", 1, CallEstimate(seconds, tokens), protected=True),
+        DeadlineCall("c2", "committees", 0, CallEstimate(seconds, tokens)),
+    ]
+
+
+def _plan(seconds_left, concurrent=False, concurrency=None):
+    return RunDeadline.plan(time.monotonic() + seconds_left, _calls(), LEVELS,
+                            concurrency or {"juniors": None, "committees": None}, concurrent)
+
+
+def test_plan_drops_lowest_priority_last_configured_first():
+    deadline = _plan(35)
+    assert set(deadline.dropped) == {"c2", "j3"}
+    assert deadline.reserves == {"juniors": 10.0, "committees": 0.0}
+
+
+def test_plan_keeps_everything_that_fits():
+    assert _plan(60).dropped == {}
+    # Side by side, every stage takes one call's time
+    assert _plan(25, concurrent=True).dropped == {}
+
+
+def test_plan_accounts_for_stage_concurrency():
+    # Two slots: the three juniors take two waves
+    assert set(_plan(25, concurrent=True, concurrency={"juniors": 2, "committees": None}).dropped) == {"j3"}
+
+
+def test_plan_never_drops_protected_calls():
+    deadline = _plan(1)
+    assert set(deadline.dropped) == {"j2", "j3", "c2"}
+
+
+def test_admit_runs_shortens_or_sheds():
+    deadline = _plan(35)
+    with pytest.raises(ShedError):
+        deadline.admit("c2")
+    assert deadline.admit("j1") is None
+
+    # 14s left, 10s reserved for the committee: 4s of a 10s call
+    deadline = _plan(60)
+    deadline.deadline = time.monotonic() + 14
+    assert 300 <= deadline.admit("j2") <= 320
+    assert "j2" in deadline.shortened
+
+    deadline.deadline = time.monotonic() + 10.5
+    with pytest.raises(ShedError):
+        deadline.admit("j3")
+    assert "j3" in deadline.dropped
+    assert deadline.admit("j1") == MIN_REPORT_TOKENS
+
+
+def test_timeout_only_bounds_unprotected_calls():
+    deadline = _plan(60)
+    assert deadline.timeout("j1") is None
+    assert 49 <= deadline.timeout("j2") <= 50
+
+
+def test_latency_stats_fall_back_to_the_model_then_all_calls():
+    stats = LatencyStats(quantile=0.8)
+    assert stats.estimate("a", "m").seconds == DEFAULT_CALL_SECONDS
+    for seconds in (10, 20, 30, 40, 50):
+        stats.record("a", "m", seconds, 500)
+    stats.record("b", "other", 5, 100)
+
+    assert stats.estimate("a", "m") == CallEstimate(50, 500)
+    assert stats.estimate("c", "m") == CallEstimate(50, 500)
+    assert stats.estimate("c", "unknown").tokens == 500
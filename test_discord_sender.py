@@ -0,0 +1,42 @@
+"""Tests for splitting long analyses into Discord messages."""
+import re
+
+from discord_sender import MESSAGE_LIMIT, SEPARATOR, split_message
+
+
+def _section(title, paragraphs, words=60):
+    body = "\n\n".join(" ".join(f"{title.lower()}{p}w{i}" for i in range(words)) for p in range(paragraphs))
+    return f"{'─' * 80}\n{title}\n{'─' * 80}\n\n{body}\n"
+
+
+def _strip_label(chunk):
+    return re.sub(r"\n\(\d+/\d+\)$", "", chunk)
+
+
+def test_short_message_is_one_part_with_separator():
+    assert split_message("Hello") == ["Hello" + SEPARATOR]
+
+
+def test_parts_fit_the_limit_and_keep_every_word():
+    content = "\n".join(_section(f"Committee{n}", 4) for n in range(6))
+    chunks = split_message(content)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MESSAGE_LIMIT for chunk in chunks)
+    assert [c.rsplit("\n", 1)[-1] for c in chunks[:-1]] == [f"({i}/{len(chunks)})" for i in range(1, len(chunks))]
+    assert chunks[-1].endswith(f"({len(chunks)}/{len(chunks)})" + SEPARATOR)
+    rejoined = " ".join(_strip_label(chunk.replace(SEPARATOR, "")) for chunk in chunks)
+    assert rejoined.split() == content.split()
+
+
+def test_sections_start_a_new_part_when_they_fit():
+    content = _section("Alpha", 2, words=25) + _section("Beta", 2, words=25)
+    chunks = split_message(content, limit=900)
+    assert len(chunks) == 2
+    assert chunks[1].startswith("─" * 80 + "\nBeta")
+
+
+def test_a_single_long_line_is_cut():
+    chunks = split_message("x" * 5000)
+    assert all(len(chunk) <= MESSAGE_LIMIT for chunk in chunks)
+    assert sum(chunk.count("x") for chunk in chunks) == 5000
@@ -0,0 +1,178 @@
+"""Tests for rate tables, the market data cache, pair detection and the source race."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from market_data import MarketDataFetcher, RateTable, SourceStats, count_pair_mentions, rank_instruments
+
+
+def _table(age=0.0, base="USD"):
+    return RateTable(base=base, rates={"EUR": 0.9, "GBP": 0.8, "JPY": 150.0}, source="test",
+                     timestamp="2026-01-01T00:00:00Z", fetched_at=time.monotonic() - age,
+                     fetched_unix=time.time() - age)
+
+
+def test_rate_table_derives_direct_inverse_and_cross_rates():
+    table = _table()
+    assert table.rate("USD", "JPY") == 150.0
+    assert round(table.rate("EUR", "USD"), 6) == round(1 / 0.9, 6)
+    assert round(table.rate("EUR", "GBP"), 6) == round(0.8 / 0.9, 6)
+    assert table.covers("EUR", "JPY") and table.covers("USD", "GBP")
+    assert not table.covers("EUR", "CHF")
+
+
+def test_rate_table_round_trip_keeps_its_age():
+    restored = RateTable.from_dict(_table(age=300).to_dict())
+    assert restored.rates == _table().rates
+    assert 299 <= restored.age <= 301
+
+
+def _fetcher(table, fetched):
+    fetcher = MarketDataFetcher(max_stale=3600)
+    if table is not None:
+        fetcher.rate_tables[table.base] = table
+
+    async def race(base):
+        fetched.append(base)
+        return _table()
+
+    fetcher._race_sources = race
+    return fetcher
+
+
+def _get(fetcher, symbol="EUR/USD"):
+    async def get():
+        try:
+            data = await fetcher.get_forex_data_async(symbol)
+            await asyncio.sleep(0)  # let a background refresh run
+            return data
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(get())
+
+
+def test_fresh_table_is_served_without_fetching():
+    fetched = []
+    data = _get(_fetcher(_table(age=10), fetched))
+    assert fetched == []
+    assert data["age_seconds"] < 60
+
+
+def test_stale_table_is_served_while_refreshing():
+    fetched = []
+    fetcher = _fetcher(_table(age=600), fetched)
+    data = _get(fetcher)
+    assert data["age_seconds"] >= 600
+    assert fetched == ["EUR"]
+    assert fetcher.rate_tables["USD"].age < 60
+
+
+def test_expired_table_waits_for_a_fetch_and_falls_back_when_it_fails():
+    fetched = []
+    data = _get(_fetcher(_table(age=7200), fetched))
+    assert fetched == ["EUR"]
+    assert data["age_seconds"] < 60
+
+    fetcher = _fetcher(_table(age=7200), [])
+
+    async def failing(base):
+        return None
+
+    fetcher._race_sources = failing
+    assert _get(fetcher)["source"] == "Fallback (APIs unavailable)"
+
+
+def test_pair_mentions_in_any_case_and_spelling():
+    counts = count_pair_mentions("EUR/USD rallies; eurusd bid, usd-jpy and Gbp / Usd slip. EURUSDX is not a pair.")
+    assert counts == {"EUR/USD": 2, "USD/JPY": 1, "GBP/USD": 1}
+
+
+def test_rank_instruments_weights_titles():
+    ranking = rank_instruments({"data": [
+        {"title": "usd/jpy jumps", "content": "EUR/USD and eur/usd flat"},
+        {"title": "Markets", "content": "EURUSD"},
+    ]})
+    assert [(entry["pair"], entry["score"], entry["articles"]) for entry in ranking] == [
+        ("EUR/USD", 3, 2), ("USD/JPY", 3, 1)
+    ]
+
+
+def _source(log, name, delay, result):
+    """Fake source answering after a delay; result may be an exception to raise."""
+    async def fetch(base, client):
+        loop = asyncio.get_running_loop()
+        log.append((name, "start", loop.time()))
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append((name, "cancelled", loop.time()))
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return fetch
+
+
+def _race(fetcher, log):
+    async def race():
+        try:
+            log.append(("race", "start", asyncio.get_running_loop().time()))
+            return await fetcher._race_sources("USD")
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(race())
+
+
+def _answer(source):
+    return SimpleNamespace(rates={"EUR": 0.9}, source=source)
+
+
+def test_race_hedges_a_slow_leader_and_cancels_it():
+    fetcher, log = MarketDataFetcher(), []
+    fetcher.source_stats["exchangerate-api"] = SourceStats(attempts=10, successes=10, latency=0.2)
+    fetcher.source_stats["frankfurter"] = SourceStats(attempts=10, successes=10, latency=0.5)
+    fetcher._fetch_from_exchangerate_api = _source(log, "exchangerate-api", 1.0, _answer("slow"))
+    fetcher._fetch_from_frankfurter = _source(log, "frankfurter", 0.05, _answer("fast"))
+
+    assert _race(fetcher, log).source == "fast"
+
+    times = {(name, event): at for name, event, at in log}
+    # The next source starts after the hedge delay (1.5x the leader's latency)
+    assert times[("frankfurter", "start")] - times[("exchangerate-api", "start")] >= 0.3 - 0.01
+    assert ("exchangerate-api", "cancelled") in times
+    assert fetcher.source_stats["exchangerate-api"].attempts == 10  # cancelled, not counted as a failure
+    fast = fetcher.source_stats["frankfurter"]
+    assert (fast.attempts, fast.successes) == (11, 11)
+    assert 0.7 * 0.5 + 0.3 * 0.05 <= fast.latency < 0.7 * 0.5 + 0.3 * 0.2
+
+
+def test_race_moves_on_at_once_when_sources_fail():
+    fetcher, log = MarketDataFetcher(api_key="key"), []
+    for name in ("exchangerate-api", "frankfurter", "fixer"):
+        fetcher.source_stats[name] = SourceStats(attempts=1, successes=1, latency=1.0)
+    fetcher.source_stats["exchangerate-api"].latency = 0.5
+    fetcher.source_stats["fixer"].attempts = 2  # less reliable, so tried last
+    fetcher._fetch_from_exchangerate_api = _source(log, "exchangerate-api", 0.01, RuntimeError("HTTP 500"))
+    fetcher._fetch_from_frankfurter = _source(log, "frankfurter", 0.01, None)
+    fetcher._fetch_from_fixer = _source(log, "fixer", 0.01, _answer("fixer"))
+
+    assert _race(fetcher, log).source == "fixer"
+
+    assert [name for name, event, _ in log if event == "start"] == ["race", "exchangerate-api", "frankfurter", "fixer"]
+    # Well within the 0.75s hedge delay: each failure starts the next source immediately
+    assert log[-1][2] - log[0][2] < 0.3
+    stats = fetcher.source_stats
+    assert [(stats[name].attempts, stats[name].successes) for name in ("exchangerate-api", "frankfurter", "fixer")] \
+        == [(2, 1), (2, 1), (3, 2)]
+
+
+def test_race_starts_unmeasured_sources_together_and_returns_none_when_all_fail():
+    fetcher, log = MarketDataFetcher(), []
+    fetcher._fetch_from_exchangerate_api = _source(log, "exchangerate-api", 0.1, None)
+    fetcher._fetch_from_frankfurter = _source(log, "frankfurter", 0.05, RuntimeError("timeout"))
+
+    assert _race(fetcher, log) is None
+
+    starts = [at for name, event, at in log if event == "start" and name != "race"]
+    assert len(starts) == 2 and max(starts) - min(starts) < 0.05
+    assert all(stats.latency is None and stats.attempts == 1 for stats in fetcher.source_stats.values())
@@ -0,0 +1,73 @@
+"""Tests for background model preloading."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import model_warmup
+from config import Settings
+from model_warmup import ModelWarmer
+
+
+def _warmer(monkeypatch, handler):
+    transport = httpx.MockTransport(handler)
+    client_class = httpx.AsyncClient
+    monkeypatch.setattr(model_warmup.httpx, "AsyncClient", lambda **kwargs: client_class(transport=transport, **kwargs))
+    return ModelWarmer("http://ollama:11434/", keep_alive="10m")
+
+
+def test_models_load_one_at_a_time_in_request_order(monkeypatch):
+    requests, running = [], {"now": 0, "peak": 0}
+
+    async def handler(request):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        requests.append(json.loads(request.content))
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return httpx.Response(200, json={"done": True})
+
+    warmer = _warmer(monkeypatch, handler)
+
+    async def run():
+        assert len(warmer.warm(["a", "b", "a", ""])) == 2
+        assert warmer.warm(["b", "c"])[0].get_name() == "warm-up c"
+        await warmer.wait()
+        await warmer.close()
+
+    asyncio.run(run())
+    assert [request["model"] for request in requests] == ["a", "b", "c"]
+    assert all(request["keep_alive"] == "10m" and "prompt" not in request for request in requests)
+    assert running["peak"] == 1
+    assert set(warmer.load_times) == {"a", "b", "c"}
+
+
+def test_failed_and_cancelled_loads_are_not_raised(monkeypatch):
+    async def handler(request):
+        if json.loads(request.content)["model"] == "missing":
+            return httpx.Response(404, json={"error": "model not found"})
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={})
+
+    warmer = _warmer(monkeypatch, handler)
+
+    async def run():
+        warmer.warm(["missing", "slow"])
+        await asyncio.sleep(0.05)
+        await warmer.close()
+
+    asyncio.run(run())
+    assert warmer.load_times == {}
+
+
+@pytest.mark.parametrize("variable", ["OLLAMA_WARMUP", "MODEL_WARMUP", "model_warmup"])
+def test_warmup_can_be_turned_off_from_the_environment(monkeypatch, variable):
+    assert Settings(_env_file=None).ollama_warmup is True
+    monkeypatch.setenv(variable, "false")
+    assert Settings(_env_file=None).ollama_warmup is False
+
+
+def test_warmup_can_be_turned_off_by_field_name():
+    assert Settings(_env_file=None, ollama_warmup=False).ollama_warmup is False
+    assert Settings(_env_file=None, MODEL_WARMUP=False).ollama_warmup is False
@@ -0,0 +1,75 @@
+"""Tests for the Stage 0 news digest."""
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from news_digest import (build_news_digest, classify_impact, detect_currencies, extract_event_times,
+                         parse_digest_response)
+
+# Winter and summer reference days, so time zone offsets differ
+WINTER = datetime(2026, 1, 15, 9, 0, tzinfo=timezone.utc)
+SUMMER = datetime(2026, 7, 15, 9, 0, tzinfo=timezone.utc)
+
+
+def _article(title, hours_ago=1.0, snippet="", link="https://example.com"):
+    published = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return {"title": title, "pubDate": format_datetime(published), "contentSnippet": snippet, "link": link}
+
+
+def test_keywords_are_case_sensitive_when_capitalised():
+    assert detect_currencies("Fed holds rates; the euro slips") == ["USD", "EUR"]
+    assert detect_currencies("Fans fed up with the stadium") == []
+    assert detect_currencies("The Dollar rallies") == ["USD"]
+    assert classify_impact("US CPI beats forecasts") == "high"
+    assert classify_impact("Flash PMI surprises") == "medium"
+    assert classify_impact("cpi talk") == "low"
+
+
+def test_event_times_are_converted_to_utc():
+    text = "Data at 8:30 a.m. ET, the decision at 13:45 CET and the speech at 2:00 pm GMT"
+    assert extract_event_times(text, WINTER) == ["13:30", "12:45", "14:00"]
+    assert extract_event_times(text, SUMMER) == ["12:30", "11:45", "14:00"]
+    assert extract_event_times("12:15 am ET and again at 00:15 ET", WINTER) == ["05:15"]
+    assert extract_event_times("Opens at 9:00 local time", WINTER) == []
+
+
+def test_digest_dedups_titles_drops_old_and_irrelevant_articles():
+    digest = build_news_digest({"data": [
+        _article("Fed's Powell signals a rate cut", snippet="Remarks due at 14:00 GMT."),
+        _article("<b>FED'S POWELL SIGNALS A RATE CUT</b>"),
+        _article("Euro PMI improves", hours_ago=2),
+        _article("ECB minutes published", hours_ago=48),
+        _article("Local bakery wins award"),
+    ]})
+
+    assert digest["article_count"] == 5
+    assert [event["title"] for event in digest["events"]] == ["Fed's Powell signals a rate cut", "Euro PMI improves"]
+    first = digest["events"][0]
+    assert first["id"] == "E1"
+    assert first["impact"] == "high"
+    assert first["currencies"] == ["USD"]
+    assert first["event_times_utc"] == ["14:00"]
+    assert first["summary"] == "Remarks due at 14:00 GMT."
+    assert "summary" not in digest["events"][1]
+
+
+def test_digest_keeps_the_most_important_events():
+    digest = build_news_digest({"data": [
+        _article("Euro slips", hours_ago=1),
+        _article("US CPI beats", hours_ago=3),
+        _article("UK PMI firm", hours_ago=2),
+    ]}, max_events=2, max_age_hours=None)
+    assert [event["title"] for event in digest["events"]] == ["US CPI beats", "UK PMI firm"]
+    assert digest["omitted_events"] == 1
+
+
+def test_parse_digest_response_skips_reasoning_and_fences():
+    events = [{"id": "E1", "title": "CPI", "currencies": ["USD"], "impact": "high"}]
+    response = ("<think>Should I output {\"events\": []}?</think>\n```json\n"
+                + json.dumps({"events": events}) + "\n```")
+    parsed = parse_digest_response(response, {"data": [{}, {}]})
+    assert parsed["events"] == events
+    assert parsed["article_count"] == 2
+    assert parse_digest_response("No events today.", {}) is None
+    assert parse_digest_response('{"events": "none"}', {}) is None
+    assert parse_digest_response("{broken", {}) is None
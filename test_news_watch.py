@@ -0,0 +1,133 @@
+"""Tests for watch mode: headline classification, conditional feed polling and the debounced trigger."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from news_watch import FeedWatcher, HeadlineClassifier, NewsWatch
+from rss_fetcher import RSSFeed
+
+
+@pytest.mark.parametrize("headline, event, currencies", [
+    ("US CPI rises 0.4% m/m, above forecast", "Inflation", ["USD"]),
+    ("U.S. GDP grows 2.1% annualized", "GDP", ["USD"]),
+    ("ECB leaves rates unchanged as expected", "Rate decision", ["EUR"]),
+    ("EUR/USD jumps after German inflation rate surprise", "Inflation", ["EUR", "USD"]),
+    ("BoJ unexpectedly widens the yield band", "Central bank", ["JPY"]),
+    ("Nonfarm payrolls 250K vs 180K expected", "Employment", ["EUR", "GBP", "USD"]),
+])
+def test_high_impact_headlines(headline, event, currencies):
+    classifier = HeadlineClassifier(["USD", "EUR", "GBP", "JPY"] if event != "Employment" else ["USD", "EUR", "GBP"])
+    assert classifier.classify(headline) == {"event": event, "currencies": currencies, "headline": headline}
+
+
+@pytest.mark.parametrize("headline", [
+    "Fans fed up with ticket prices",
+    "Fed's Powell speaks on the economy",
+    "GDPR fines hit tech firms",
+    "Space tourism booms",
+    "Swiss watch exports slow",
+])
+def test_near_misses_do_not_fire(headline):
+    assert HeadlineClassifier().classify(headline) is None
+
+
+def test_unwatched_currencies_do_not_fire():
+    assert HeadlineClassifier(["JPY"]).classify("UK retail sales slump") is None
+    assert HeadlineClassifier(["GBP"]).classify("UK retail sales slump")["currencies"] == ["GBP"]
+
+
+def _rss(*titles):
+    items = "".join(f"<item><title>{title}</title><link>https://example.com/{title.replace(' ', '-')}</link></item>"
+                    for title in titles)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>{items}</channel></rss>'
+
+
+def test_feed_watcher_seeds_then_polls_conditionally():
+    requests = []
+    responses = [
+        httpx.Response(200, text=_rss("CPI beats", "PMI misses"),
+                       headers={"ETag": '"v1"', "Last-Modified": "Thu, 15 Jan 2026 09:00:00 GMT"}),
+        httpx.Response(304),
+        httpx.Response(200, text=_rss("Fed hikes rates", "CPI beats", "PMI misses"), headers={"ETag": '"v2"'}),
+        httpx.Response(500),
+    ]
+
+    def handler(request):
+        requests.append(request)
+        return responses[len(requests) - 1]
+
+    watcher = FeedWatcher([RSSFeed("Squawk", "https://feeds.example.com/squawk")])
+
+    async def poll_four_times():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return [await watcher.poll(client) for _ in range(4)]
+
+    seeded, not_modified, changed, failed = asyncio.run(poll_four_times())
+
+    # The first poll only records what is already in the feed
+    assert seeded == [] and not_modified == [] and failed == []
+    assert changed == [{"title": "Fed hikes rates", "link": "https://example.com/Fed-hikes-rates", "feed": "Squawk"}]
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert requests[1].headers["If-Modified-Since"] == "Thu, 15 Jan 2026 09:00:00 GMT"
+    # A 304 leaves the validators alone; a new response replaces them
+    assert requests[2].headers["If-None-Match"] == '"v1"'
+    assert requests[3].headers["If-None-Match"] == '"v2"'
+    assert "If-Modified-Since" not in requests[3].headers
+    assert watcher.stats == {"polls": 4, "not_modified": 1, "errors": 1}
+
+
+class ScriptedWatcher:
+    """Returns one scripted list of entries per poll, then nothing."""
+
+    timeout = 1.0
+    feeds = [RSSFeed("Squawk", "https://feeds.example.com/squawk")]
+
+    def __init__(self, polls):
+        self.polls = polls
+        self.count = 0
+
+    async def poll(self, client):
+        self.count += 1
+        return self.polls.get(self.count, [])
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.triggers = []
+
+    def trigger(self, reason, priority=False):
+        self.triggers.append((time.monotonic(), reason, priority))
+        return True
+
+
+def test_news_watch_debounces_and_cools_down():
+    scheduler = RecordingScheduler()
+    watcher = ScriptedWatcher({
+        1: [{"title": "US CPI rises 0.4%", "feed": "Squawk"}],
+        2: [{"title": "US nonfarm payrolls beat", "feed": "Squawk"}, {"title": "Fans fed up", "feed": "Squawk"}],
+        6: [{"title": "Fed unexpectedly cuts rates", "feed": "Squawk"}],
+    })
+    watch = NewsWatch(watcher, HeadlineClassifier(), lambda reason: scheduler.trigger(reason, priority=True),
+                      poll_seconds=0.05, debounce_seconds=0.15, cooldown_seconds=0.5)
+
+    async def watch_for(seconds):
+        task = asyncio.create_task(watch.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    started = time.monotonic()
+    asyncio.run(watch_for(0.45))
+    # Both headlines of the first release are covered by one run; the third waits for the cooldown
+    [(first, reason, priority)] = scheduler.triggers
+    assert priority
+    assert reason == "news: Inflation, Employment - US CPI rises 0.4% (+1 more)"
+    assert 0.15 <= first - started < 0.3
+
+    asyncio.run(watch_for(0.4))
+    [_, (second, reason, _)] = scheduler.triggers
+    assert reason == "news: Rate decision - Fed unexpectedly cuts rates"
+    assert second - first >= 0.5
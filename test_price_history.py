@@ -0,0 +1,82 @@
+"""Tests for the memory-mapped price history and the indicators computed from it."""
+import math
+import statistics
+from datetime import datetime, timezone
+
+import pytest
+
+from price_history import PriceHistory, compute_indicators, format_indicators
+
+HOUR = 3600
+TODAY = datetime(2026, 1, 15, tzinfo=timezone.utc).timestamp()
+
+
+def test_ring_buffer_overwrites_the_oldest_samples_and_survives_reopening(tmp_path):
+    history = PriceHistory(tmp_path, capacity=4)
+    for n in range(6):
+        history.record("EUR/USD", 1.0 + n / 100, timestamp=1000.0 + n)
+    history.record("EUR/USD", 2.0, timestamp=1005.0)  # not newer than the last sample
+    history.record("EUR/USD", 0.0, timestamp=1010.0)  # not a price
+    history.close()
+
+    assert (tmp_path / "EUR_USD.prices").stat().st_size == 32 + 2 * 4 * 8
+    reopened = PriceHistory(tmp_path, capacity=4)
+    times, prices = reopened.series("EUR/USD")
+    assert list(times) == [1002.0, 1003.0, 1004.0, 1005.0]
+    assert list(prices) == pytest.approx([1.02, 1.03, 1.04, 1.05])
+
+    reopened.record("EUR/USD", 1.06, timestamp=1006.0)
+    assert list(reopened.series("EUR/USD")[0]) == [1003.0, 1004.0, 1005.0, 1006.0]
+    reopened.close()
+
+
+def test_changing_the_capacity_keeps_the_newest_samples(tmp_path):
+    history = PriceHistory(tmp_path, capacity=4)
+    for n in range(6):
+        history.record("GBP/USD", 1.2 + n / 100, timestamp=1000.0 + n)
+    history.close()
+
+    smaller = PriceHistory(tmp_path, capacity=3)
+    assert list(smaller.series("GBP/USD")[0]) == [1003.0, 1004.0, 1005.0]
+    smaller.close()
+
+
+def _samples():
+    """Two samples late on the previous UTC day, then five today with two in the first hourly bar."""
+    samples = [(-4, 1.00), (-2, 1.04), (0, 1.02), (0.5, 1.06), (1, 1.03), (2, 1.05), (3, 1.08)]
+    return [TODAY + hours * HOUR for hours, _ in samples], [price for _, price in samples]
+
+
+def test_indicators_match_a_hand_computed_series():
+    times, prices = _samples()
+    indicators = compute_indicators(times, prices, bar_seconds=HOUR, period=3)
+
+    # Hourly closes: 1.00, 1.04, 1.06, 1.03, 1.05, 1.08
+    assert indicators["bars"] == 6
+    assert indicators["sma"] == pytest.approx((1.03 + 1.05 + 1.08) / 3)
+    assert indicators["sma_short"] == pytest.approx(1.08)
+    # EMA with alpha 0.5: 1.00 -> 1.02 -> 1.04 -> 1.035 -> 1.0425 -> 1.06125
+    assert indicators["ema"] == pytest.approx(1.06125)
+    # True ranges of the last three bars: |1.03-1.06|, |1.05-1.03|, |1.08-1.05|
+    assert indicators["atr"] == pytest.approx(0.08 / 3)
+    returns = [math.log(1.03 / 1.06), math.log(1.05 / 1.03), math.log(1.08 / 1.05)]
+    assert indicators["realized_vol_pct"] == pytest.approx(statistics.stdev(returns) * math.sqrt(24) * 100)
+    assert indicators["change_24h_pct"] == pytest.approx(8.0)
+    assert indicators["range_24h"] == (1.00, 1.08)
+    assert indicators["range_position_pct"] == pytest.approx(100.0)
+
+    # Previous day: high 1.04, low 1.00, close 1.04
+    pivot = (1.04 + 1.00 + 1.04) / 3
+    assert indicators["pivots"] == pytest.approx({
+        "S2": pivot - 0.04, "S1": 2 * pivot - 1.04, "P": pivot, "R1": 2 * pivot - 1.00, "R2": pivot + 0.04,
+    })
+
+
+def test_indicators_need_two_samples():
+    assert compute_indicators([TODAY], [1.08]) is None
+    assert "No price history recorded for EUR/USD" in format_indicators("EUR/USD", None)
+
+    times, prices = _samples()
+    block = format_indicators("EUR/USD", compute_indicators(times, prices, bar_seconds=HOUR, period=3))
+    assert "SMA1 1.08000 | SMA3 1.05333 | EMA3 1.06125 | price above SMA3" in block
+    assert "Pivots (previous UTC day): S2 0.98667" in block
@@ -0,0 +1,52 @@
+"""Tests for per-stage run profiling and the event-loop lag monitor."""
+import asyncio
+import json
+import time
+
+from profiling import RunProfiler, profiled
+
+
+def _blocking_call():
+    time.sleep(0.3)
+
+
+async def _blocking_task():
+    _blocking_call()
+
+
+async def _fetch_stage():
+    await asyncio.sleep(0.01)
+    # Tasks started by the stage are profiled as the stage
+    await asyncio.create_task(_blocking_task())
+
+
+def test_stage_profiles_and_a_blocking_call_are_attributed_to_the_stage():
+    async def run():
+        profiler = RunProfiler(lag_threshold=0.1)
+        profiler.start()
+        try:
+            await profiled(profiler, "fetch", _fetch_stage())
+            await asyncio.sleep(0.05)  # the heartbeat measures the stall's length when it runs again
+        finally:
+            profiler.stop()
+        return profiler
+
+    profiler = asyncio.run(run())
+
+    assert profiler.busy["fetch"] >= 0.3
+    assert profiler.busy["event_loop"] < profiler.busy["fetch"]
+    [stall] = profiler.lag.stalls
+    assert stall["stage"] == "fetch"
+    assert stall["duration_s"] >= 0.2
+    assert stall["call_site"].startswith("test_profiling.py:") and stall["call_site"].endswith("in _blocking_call")
+
+    files = profiler.files("20260115_090000")
+    assert {"fetch.prof", "event_loop.prof", "stalls.json", "summary.txt"} <= set(files)
+    assert json.loads(files["stalls.json"])[0]["stage"] == "fetch"
+    assert "_blocking_call" in files["summary.txt"].decode("utf-8")
+
+
+def test_profiled_without_a_profiler_returns_the_coroutine():
+    coro = _fetch_stage()
+    assert profiled(None, "fetch", coro) is coro
+    coro.close()
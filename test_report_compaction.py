@@ -0,0 +1,47 @@
+"""Tests for compacting analyst reports before they are forwarded."""
+from report_compaction import compact_report, remove_boilerplate, strip_reasoning, truncate_report
+
+
+def test_strip_reasoning_removes_closed_unclosed_and_orphan_blocks():
+    assert strip_reasoning("<think>weigh CPI</think>\nLong EUR/USD") == "Long EUR/USD"
+    assert strip_reasoning("Long EUR/USD\n<think>still thinking") == "Long EUR/USD"
+    assert strip_reasoning("weigh CPI first\n</think>\n\nLong EUR/USD") == "Long EUR/USD"
+
+
+def test_strip_reasoning_keeps_a_quoted_close_tag_late_in_the_report():
+    report = "Long EUR/USD. " * 400 + "The model printed </think> mid-answer."
+    assert strip_reasoning(report) == report.strip()
+
+
+def test_remove_boilerplate_strips_only_the_leading_pleasantry():
+    report = "\n".join([
+        "Sure!",
+        "Certainly, here is my analysis:",
+        "Certainly, EUR/USD will retest 1.0850 after CPI.",
+        "─" * 40,
+        "Absolutely not a chase above 1.0900.",
+        "",
+        "",
+        "",
+        "I hope this helps!",
+        "Disclaimer: this is not financial advice.",
+    ])
+    assert remove_boilerplate(report) == (
+        "EUR/USD will retest 1.0850 after CPI.\n"
+        "Absolutely not a chase above 1.0900."
+    )
+
+
+def test_truncate_report_prefers_paragraph_then_sentence_boundaries():
+    paragraphs = "First paragraph is here.\n\nSecond paragraph is a lot longer than the first one."
+    assert truncate_report(paragraphs, 40) == "First paragraph is here. […]"
+    sentences = "One sentence here. Another sentence follows. And a third."
+    assert truncate_report(sentences, 50) == "One sentence here. Another sentence follows. […]"
+    assert truncate_report("short", 50) == "short"
+
+
+def test_compact_report_applies_the_enabled_steps():
+    report = "<think>hmm</think>Sure, long EUR/USD.\n---\nTarget 1.0900."
+    assert compact_report(report) == "long EUR/USD.\nTarget 1.0900."
+    assert compact_report(report, strip_boilerplate=False) == "Sure, long EUR/USD.\n---\nTarget 1.0900."
+    assert len(compact_report(report, max_chars=20)) <= 20
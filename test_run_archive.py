@@ -0,0 +1,112 @@
+"""Tests for the run archive, its background writer and run checkpoints."""
+import pytest
+
+from run_archive import RunArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = RunArchive(tmp_path, retention_runs=None, retention_days=None)
+    yield archive
+    archive.close()
+
+
+def _finished_run(archive, summary="Summary"):
+    run_id = archive.begin_run({"instrument": "EUR/USD"})
+    archive.write_report(run_id, "juniors", "Analyst 1", "Macro", "Long", order=1, folder="tier1_junior_analysts")
+    archive.write_report(run_id, "juniors", "Analyst 2", "Flows", "Short", order=2, folder="tier1_junior_analysts")
+    archive.write_report(run_id, "executives", "Committee A", "Decision", "Long", order=1)
+    archive.finish_run(run_id, summary, {"instrument": "EUR/USD"})
+    return run_id
+
+
+def test_finished_run_is_indexed_and_exported(archive, tmp_path):
+    run_id = _finished_run(archive)
+    archive.flush()
+
+    [entry] = archive.load_index()
+    assert entry["run_id"] == run_id
+    assert entry["reports"] == {"juniors": 2, "executives": 1}
+    assert entry["instrument"] == "EUR/USD"
+    assert (tmp_path / entry["summary"]).read_text(encoding="utf-8") == "Summary"
+    assert [record["type"] for record in archive.read_run(run_id)] == ["run_start", "report", "report", "report",
+                                                                       "summary"]
+
+    target = archive.export_run(run_id, tmp_path / "export")
+    assert (target / "tier1_junior_analysts" / "02_Analyst_2.txt").read_text(encoding="utf-8").endswith("Short")
+    assert (target / "executives" / "01_Committee_A.txt").exists()
+    assert (target / "FINAL_SUMMARY.txt").read_text(encoding="utf-8") == "Summary"
+
+
+def test_run_ids_are_unique_within_a_second(archive):
+    assert len({archive.begin_run() for _ in range(3)}) == 3
+
+
+def test_retention_keeps_the_newest_runs(tmp_path):
+    archive = RunArchive(tmp_path, retention_runs=2, retention_days=None)
+    try:
+        run_ids = [_finished_run(archive, f"Summary {n}") for n in range(3)]
+        archive.flush()
+    finally:
+        archive.close()
+
+    assert [entry["run_id"] for entry in archive.load_index()] == run_ids[1:]
+    assert not (tmp_path / f"run_{run_ids[0]}.jsonl.gz").exists()
+    assert not (tmp_path / f"FINAL_SUMMARY_{run_ids[0]}.txt").exists()
+    assert archive.read_run(run_ids[2])[-1]["content"] == "Summary 2"
+
+
+def _checkpointed_run(archive):
+    run_id = archive.begin_run({"instrument": "EUR/USD"})
+    archive.write_checkpoint(run_id, "run", aggregated_data={"data": [{"title": "CPI beat"}]},
+                             instruments=["EUR/USD"])
+    archive.write_checkpoint(run_id, "context", instrument="EUR/USD", market_data="1.0850")
+    archive.write_checkpoint(run_id, "node", name="Analyst 1", input_hash="abc", output="Long",
+                             raw_output="<think>...</think>Long")
+    archive.write_report(run_id, "juniors", "Analyst 1", "Macro", "Long")
+    return run_id
+
+
+def test_checkpoint_round_trip(archive):
+    run_id = _checkpointed_run(archive)
+    archive.flush()
+
+    checkpoint = archive.latest_checkpoint()
+    assert checkpoint["run_id"] == run_id
+    assert checkpoint["aggregated_data"] == {"data": [{"title": "CPI beat"}]}
+    assert checkpoint["instruments"] == ["EUR/USD"]
+    assert checkpoint["contexts"] == {"EUR/USD": {"market_data": "1.0850"}}
+    assert checkpoint["nodes"] == {
+        "Analyst 1": {"input_hash": "abc", "output": "Long", "raw_output": "<think>...</think>Long"}
+    }
+
+
+def test_aborted_run_is_readable_and_keeps_its_checkpoint(archive):
+    run_id = _checkpointed_run(archive)
+    archive.abort_run(run_id)
+    archive.flush()
+
+    assert [record["type"] for record in archive.read_run(run_id)] == ["run_start", "report", "interrupted"]
+    assert archive.latest_checkpoint()["run_id"] == run_id
+    assert archive.load_index() == []
+
+
+def test_finished_run_deletes_its_checkpoint_and_that_of_the_resumed_run(archive):
+    interrupted = _checkpointed_run(archive)
+    archive.abort_run(interrupted)
+    resumed = archive.begin_run({"resumed_from": interrupted})
+    archive.write_checkpoint(resumed, "run", aggregated_data={"data": []}, instruments=["EUR/USD"])
+    archive.finish_run(resumed, "Summary")
+    archive.abort_run(resumed)  # no-op once finished
+    archive.flush()
+
+    assert archive.latest_checkpoint() is None
+    assert [entry["run_id"] for entry in archive.load_index()] == [resumed]
+    assert archive.read_run(resumed)[-1]["content"] == "Summary"
+
+
+def test_failed_run_can_keep_its_checkpoint(archive):
+    run_id = _checkpointed_run(archive)
+    archive.finish_run(run_id, "Summary", keep_checkpoint=True)
+    archive.flush()
+    assert archive.latest_checkpoint()["nodes"]["Analyst 1"]["output"] == "Long"
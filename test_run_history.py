@@ -0,0 +1,72 @@
+"""Tests for the searchable run history."""
+from run_archive import RunArchive
+from run_history import RunHistory
+
+ENTRY = {"run_id": "20260115_090000", "started_at": "2026-01-15T09:00:00", "finished_at": "2026-01-15T09:05:00",
+         "instrument": "EUR/USD", "mode": "Concurrent", "duration_s": 300.0}
+
+
+def _records():
+    return [
+        {"type": "run_start", "run_id": ENTRY["run_id"], "article_count": 2},
+        {"type": "inputs", "articles": [
+            {"title": "ECB holds rates", "link": "https://example.com/ecb", "contentSnippet": "Lagarde speaks"},
+            {"title": "US CPI beats", "link": "https://example.com/cpi", "contentSnippet": "Core inflation up"},
+        ]},
+        {"type": "report", "stage": "junior_analysts", "name": "Marcus (Rates)", "role": "Rates", "order": 1,
+         "model": "m", "content": "Direction: Short\nThe ECB pause weighs on EUR/USD below 1.0850."},
+        {"type": "report", "stage": "junior_analysts", "name": "Yuki (Employment)", "role": "Jobs", "order": 2,
+         "model": "m", "content": "Direction: Long\nPayrolls support the dollar."},
+        {"type": "report", "stage": "executive_committees", "name": "Committee A", "role": "Decision", "order": 1,
+         "model": "m", "final": True, "content": "Direction: Short\nSell EUR/USD at 1.0850."},
+        {"type": "summary", "content": "Sell EUR/USD."},
+    ]
+
+
+def test_ingest_run_once(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    assert history.ingest_run(ENTRY, _records()) is True
+    assert history.ingest_run(ENTRY, _records()) is False
+
+    run = history.get_run(ENTRY["run_id"])
+    assert run["summary"] == "Sell EUR/USD."
+    assert [output["name"] for output in run["outputs"]] == ["Marcus (Rates)", "Yuki (Employment)", "Committee A"]
+    [row] = history.search(text="ECB pause", name="Marcus", direction="short", instrument="EUR/USD")
+    assert row["name"] == "Marcus (Rates)"
+    # Every connection is closed after use, so the last one checkpoints and removes the write-ahead log
+    assert not (tmp_path / "history.db-wal").exists()
+
+
+def test_search_combines_full_text_and_filters(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    history.ingest_run(ENTRY, _records())
+
+    [row] = history.search(text="ECB pause", name="marcus", direction="short", instrument="eur/usd")
+    assert row["run_id"] == ENTRY["run_id"]
+    assert row["name"] == "Marcus (Rates)"
+    assert "[ECB]" in row["snippet"]
+    assert history.search(text="ECB pause", direction="long") == []
+    assert history.search(name="marcus", instrument="GBP/USD") == []
+    assert [row["name"] for row in history.search(direction="short", final_only=True)] == ["Committee A"]
+    assert history.search(since="2026-02-01") == []
+
+
+def test_search_articles(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    history.ingest_run(ENTRY, _records())
+    [article] = history.search_articles("inflation")
+    assert article["title"] == "US CPI beats"
+    assert article["runs"] == ENTRY["run_id"]
+
+
+def test_finished_archive_runs_are_ingested(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    archive = RunArchive(tmp_path / "runs", None, None, history)
+    try:
+        run_id = archive.begin_run({"instrument": "EUR/USD"})
+        archive.write_report(run_id, "executive_committees", "Committee A", "Decision", "Direction: Long", order=1)
+        archive.finish_run(run_id, "Buy EUR/USD.", {"instrument": "EUR/USD"})
+        archive.flush()
+    finally:
+        archive.close()
+    assert [row["run_id"] for row in history.search(direction="long", instrument="EUR/USD")] == [run_id]
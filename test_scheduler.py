@@ -0,0 +1,150 @@
+"""Tests for cron and interval schedules and the daemon scheduler's overlap handling."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import CronSchedule, IntervalSchedule, Scheduler, parse_schedules
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_london_open_follows_daylight_saving():
+    schedule = CronSchedule("0 7 * * 1-5", "Europe/London")
+    # Clocks go forward on Sunday 29 March 2026 and back on Sunday 25 October 2026
+    assert schedule.next_after(_utc(2026, 3, 26, 12)) == _utc(2026, 3, 27, 7)
+    assert schedule.next_after(_utc(2026, 3, 27, 7)) == _utc(2026, 3, 30, 6)
+    assert schedule.next_after(_utc(2026, 10, 23, 5, 59)) == _utc(2026, 10, 23, 6)
+    assert schedule.next_after(_utc(2026, 10, 23, 6)) == _utc(2026, 10, 26, 7)
+
+
+def test_restricted_day_of_month_and_weekday_fire_on_either():
+    schedule = CronSchedule("0 12 13 * 5")  # the 13th, or any Friday
+    assert schedule.next_after(_utc(2026, 4, 10, 12)) == _utc(2026, 4, 13, 12)  # Monday the 13th
+    assert schedule.next_after(_utc(2026, 4, 13, 12)) == _utc(2026, 4, 17, 12)  # the next Friday
+    # With one day field left at '*', only the other one applies
+    assert CronSchedule("0 12 * * 5").next_after(_utc(2026, 4, 10, 12)) == _utc(2026, 4, 17, 12)
+    assert CronSchedule("0 12 13 * *").next_after(_utc(2026, 4, 13, 12)) == _utc(2026, 5, 13, 12)
+    # 7 is Sunday as well as 0
+    assert CronSchedule("30 9 * * 7").next_after(_utc(2026, 4, 10)) == _utc(2026, 4, 12, 9, 30)
+
+
+def test_utc_needs_no_time_zone_database(monkeypatch):
+    def missing(key):
+        raise scheduler_module.ZoneInfoNotFoundError(key)
+
+    monkeypatch.setattr(scheduler_module, "ZoneInfo", missing)
+    assert CronSchedule("0 7 * * *", "utc").next_after(_utc(2026, 1, 15, 8)) == _utc(2026, 1, 16, 7)
+    with pytest.raises(ValueError, match="tzdata"):
+        CronSchedule("0 7 * * *", "Europe/London")
+
+
+@pytest.mark.parametrize("expression", [
+    "60 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 32 * *", "0 0 * 13 *", "0 0 * * 8",
+    "5-1 * * * *", "*/0 * * * *", "0 7 * *", "0 0 31 2 *",
+])
+def test_invalid_expressions_raise(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(_utc(2026, 1, 1))
+
+
+def test_parse_schedules_reads_a_time_zone_per_entry():
+    london, new_york, utc = parse_schedules("0 7 * * 1-5 Europe/London; 30 13 * * 1-5 America/New_York;; 0 0 * * *")
+    assert london.label == "0 7 * * 1-5 Europe/London"
+    assert new_york.next_after(_utc(2026, 1, 15)) == _utc(2026, 1, 15, 18, 30)
+    assert utc.next_after(_utc(2026, 1, 15, 0, 0, 1)) == _utc(2026, 1, 16)
+    with pytest.raises(ValueError, match="Unknown time zone"):
+        parse_schedules("0 7 * * * Mars/Olympus")
+
+
+def test_interval_grid_does_not_drift():
+    anchor = _utc(2026, 1, 1)
+    schedule = IntervalSchedule(1.5, anchor)
+    assert schedule.next_after(anchor - timedelta(days=1)) == anchor + timedelta(hours=1.5)
+
+    when = anchor
+    for _ in range(10000):
+        # Each run finishes a little late; the next one still lands on the grid
+        when = schedule.next_after(when + timedelta(minutes=7, seconds=13))
+    assert when == anchor + 10000 * timedelta(hours=1.5)
+    with pytest.raises(ValueError):
+        IntervalSchedule(0)
+
+
+def _serve(overlap, scenario):
+    """Serve a scheduler whose only runs are the ones the scenario triggers; returns the runs' outcomes."""
+    runs = []
+
+    async def job():
+        name = asyncio.current_task().get_name()
+        runs.append(f"{name} started")
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            runs.append(f"{name} cancelled")
+            raise
+
+    async def main():
+        scheduler = Scheduler(job, [IntervalSchedule(1000)], overlap=overlap, run_at_start=False)
+        serving = asyncio.create_task(scheduler.serve())
+        await asyncio.sleep(0)
+        try:
+            await scenario(scheduler)
+        finally:
+            scheduler.stop()
+            await serving
+
+    asyncio.run(main())
+    return runs
+
+
+def test_triggers_during_a_run_are_skipped():
+    async def scenario(scheduler):
+        assert scheduler.trigger("first")
+        await asyncio.sleep(0.05)
+        assert not scheduler.trigger("second")
+        await asyncio.sleep(0.3)
+
+    assert _serve("skip", scenario) == ["run (first) started"]
+
+
+def test_one_trigger_during_a_run_is_queued():
+    async def scenario(scheduler):
+        assert scheduler.trigger("first")
+        await asyncio.sleep(0.05)
+        assert scheduler.trigger("second")
+        assert not scheduler.trigger("third")
+        await asyncio.sleep(0.5)
+
+    assert _serve("queue", scenario) == ["run (first) started", "run (second) started"]
+
+
+@pytest.mark.parametrize("overlap", ["skip", "queue"])
+def test_priority_trigger_cancels_a_regular_run(overlap):
+    async def scenario(scheduler):
+        assert scheduler.trigger("schedule")
+        await asyncio.sleep(0.05)
+        assert scheduler.trigger("news", priority=True)
+        await asyncio.sleep(0.05)
+        # A priority run is never pre-empted; the overlap policy applies instead
+        assert scheduler.trigger("more news", priority=True) == (overlap == "queue")
+        await asyncio.sleep(0.5)
+
+    runs = _serve(overlap, scenario)
+    assert runs[:3] == ["run (schedule) started", "run (schedule) cancelled", "run (news) started"]
+    assert runs[3:] == (["run (more news) started"] if overlap == "queue" else [])
+
+
+def test_priority_trigger_replaces_a_queued_run():
+    async def scenario(scheduler):
+        assert scheduler.trigger("news", priority=True)
+        await asyncio.sleep(0.05)
+        assert scheduler.trigger("schedule")
+        assert scheduler.trigger("more news", priority=True)
+        assert not scheduler.trigger("even more news", priority=True)
+        await asyncio.sleep(0.5)
+
+    assert _serve("queue", scenario) == ["run (news) started", "run (more news) started"]
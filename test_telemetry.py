@@ -0,0 +1,76 @@
+"""Tests for run telemetry summaries and their Prometheus export."""
+import time
+
+from telemetry import RunTelemetry, call_metrics, write_textfile
+
+
+def test_call_metrics_converts_ollama_durations_to_seconds():
+    response = {"response": "Long", "total_duration": 2_500_000_000, "load_duration": 500_000_000,
+                "prompt_eval_count": 120, "eval_count": 40, "eval_duration": "n/a"}
+    assert call_metrics(response) == {"total_s": 2.5, "load_s": 0.5, "prompt_eval_count": 120, "eval_count": 40}
+
+
+def test_model_summary_totals_calls_and_throughput():
+    telemetry = RunTelemetry()
+    now = time.monotonic()
+    metrics = {"load_s": 1.0, "prompt_eval_count": 100, "prompt_eval_s": 0.5, "eval_count": 50, "eval_s": 2.0}
+    telemetry.record_call("A", "juniors", "large", now, now + 3, metrics)
+    telemetry.record_call("B", "juniors", "large", now, now + 4, {**metrics, "load_s": 0.0})
+    telemetry.record_call("C", "juniors", "large", now, now + 1, {}, error=True)
+
+    assert telemetry.model_summary() == {"large": {
+        "calls": 3, "errors": 1, "wall_s": 8.0, "load_s": 1.0,
+        "prompt_eval_count": 200, "prompt_eval_s": 1.0, "eval_count": 100, "eval_s": 4.0,
+        "eval_tokens_per_s": 25.0, "prompt_tokens_per_s": 200.0,
+    }}
+
+
+def test_spans_recorded_again_are_widened():
+    telemetry = RunTelemetry()
+    origin = telemetry.origin
+    telemetry.record_span("tier1", origin + 1, origin + 2)
+    telemetry.record_span("tier1", origin + 1.5, origin + 4)
+    assert telemetry.spans == {"tier1": {"start_s": 1.0, "end_s": 4.0, "duration_s": 3.0}}
+
+
+def test_prometheus_text_has_one_header_per_metric_and_escaped_labels(tmp_path):
+    telemetry = RunTelemetry()
+    now = time.monotonic()
+    telemetry.record_call("A", "juniors", 'qwen"3', now, now + 2, {"eval_count": 10, "eval_s": 1.0})
+    telemetry.record_call("B", "juniors", "llama3", now, now + 1, {})
+    text = telemetry.prometheus()
+
+    assert text.count("# TYPE day_trader_model_calls gauge") == 1
+    assert 'day_trader_model_calls{model="qwen\\"3"} 1' in text
+    assert 'day_trader_model_eval_tokens_per_second{model="qwen\\"3"} 10.0' in text
+    # No throughput without timing fields
+    assert 'day_trader_model_eval_tokens_per_second{model="llama3"}' not in text
+
+    path = tmp_path / "metrics" / "day_trader.prom"
+    write_textfile(path, text)
+    assert path.read_text(encoding="utf-8") == text
+    assert [p.name for p in path.parent.iterdir()] == ["day_trader.prom"]
+
+
+def _cascade_call(telemetry, analyst, cascade, model, error=False, reason=None):
+    now = time.monotonic()
+    extra = {"escalation_reason": reason} if reason else {}
+    telemetry.record_call(analyst, "juniors", model, now, now + 1, {}, error=error, analyst=analyst,
+                          cascade=cascade, **extra)
+
+
+def test_cascade_summary_counts_escalations_and_calls_both_models_failed():
+    telemetry = RunTelemetry()
+    _cascade_call(telemetry, "A", "first", "small")
+    _cascade_call(telemetry, "A", "first", "small")
+    _cascade_call(telemetry, "A", "escalation", "large", reason="low_confidence")
+    _cascade_call(telemetry, "A", "first", "small", error=True)
+    _cascade_call(telemetry, "A", "escalation", "large", error=True, reason="error")
+    _cascade_call(telemetry, "A", "first", "small", error=True)
+    _cascade_call(telemetry, "A", "escalation", "large", reason="error")
+
+    assert telemetry.cascade_summary() == {"A": {
+        "model": "small", "calls": 4, "escalations": 3, "failed": 1,
+        "reasons": {"low_confidence": 1, "error": 2}, "escalation_rate": 0.75,
+    }}
+    assert 'day_trader_cascade_failures{analyst="A",model="small"} 1' in telemetry.prometheus()
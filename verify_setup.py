@@ -27,7 +27,6 @@ def check_packages():
         "pydantic",
         "pydantic_settings",
         "dotenv",
-        "schedule",
     ]
     
     results = []